@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Motorcycle Database Benchmark
+
+Times the generation, save, load, filter and analysis paths of both databases
+at fixed seeds and scalable sizes, and reports rows/s and peak traced memory
+as JSON so runs can be compared before rolling out generator changes.
+
+Each benchmark runs once for its wall time and, unless --skip-memory is
+given, a second time under tracemalloc for its peak memory (tracing slows
+allocations down, so the two are kept apart). Peak memory covers the
+benchmarking process only, not generator worker processes.
+
+Usage:
+    python3 benchmark.py --sizes 10k 100k --output bench.json
+    python3 benchmark.py --sizes 1m 10m --batch --workers 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import enhanced_database_demo
+import example_usage
+import generate_motorcycle_database
+import generate_taiwan_specific_database
+import taiwan_specific_usage
+from generation_shards import scale_quotas
+from motorcycle_analytics import analyze_file
+from stats_cube import remove_cube
+
+# Preset sizes; plain integers are accepted as well
+SIZES = {
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+DEFAULT_SIZES = ['10k', '100k']
+DEFAULT_SEED = 20240601
+
+def parse_size(value):
+    """Parse a size preset ("100k") or a plain row count"""
+    if value.lower() in SIZES:
+        return SIZES[value.lower()]
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size {value!r} (use {', '.join(SIZES)} or a number)")
+
+def run_quietly(func):
+    """Call func with its progress output suppressed and return its result"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func()
+
+def measure(name, rows, func, memory=True):
+    """Run one benchmark and return (result, measurement)"""
+    start = time.perf_counter()
+    result = run_quietly(func)
+    seconds = time.perf_counter() - start
+    
+    measurement = {
+        'name': name,
+        'rows': rows,
+        'seconds': round(seconds, 6),
+        'rows_per_s': round(rows / seconds, 1) if seconds > 0 else None,
+        'peak_bytes': None,
+    }
+    if memory:
+        del result
+        tracemalloc.start()
+        try:
+            result = run_quietly(func)
+            measurement['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    
+    print(f"  {name}: {measurement['seconds']:.3f}s, {measurement['rows_per_s'] or 0:,.0f} rows/s", file=sys.stderr)
+    return result, measurement
+
+def bench_complete(size, args, directory):
+    """Benchmark the complete database paths at one size"""
+    results = []
+    brands = scale_quotas(generate_motorcycle_database.BRANDS, size)
+    
+    def run(name, func):
+        result, measurement = measure(name, size, func, memory=not args.skip_memory)
+        measurement.update(database='complete', size=size)
+        results.append(measurement)
+        return result
+    
+    database = run('generate_database', lambda: generate_motorcycle_database.generate_database(
+        batch=args.batch, workers=args.workers, seed=args.seed, brands=brands))
+    
+    json_file = os.path.join(directory, f'complete_{size}.json')
+    ndjson_file = os.path.join(directory, f'complete_{size}.ndjson')
+    run('save_database', lambda: generate_motorcycle_database.save_database(database, json_file))
+    run('save_database_ndjson', lambda: generate_motorcycle_database.save_database(database, ndjson_file))
+    del database
+    
+    data = run('load_database', lambda: example_usage.load_database(json_file))
+    run('load_database_ndjson', lambda: example_usage.load_database(ndjson_file))
+    run('load_enhanced_database', lambda: enhanced_database_demo.load_enhanced_database(json_file))
+    run('load_database_lazy', lambda: list(example_usage.load_database(json_file, lazy=True)['motorcycles']))
+    
+    motorcycles = data['motorcycles']
+    run('filter_by_brand', lambda: example_usage.filter_by_brand(motorcycles, 'Yamaha'))
+    run('filter_by_displacement', lambda: example_usage.filter_by_displacement(motorcycles, 250, 600))
+    run('filter_by_type', lambda: example_usage.filter_by_type(motorcycles, 'scooter'))
+    run('filter_by_price_range', lambda: example_usage.filter_by_price_range(motorcycles, 100000))
+    run('filter_by_era_and_status', lambda: enhanced_database_demo.filter_by_era_and_status(json_file))
+    
+    run('analyze_database', lambda: example_usage.analyze_database(data))
+    run('demonstrate_enhanced_features', lambda: enhanced_database_demo.demonstrate_enhanced_features(data))
+    # The generators save a statistics cube next to each file: time the scan and the cube separately
+    run('analyze_file_ndjson', lambda: analyze_file(ndjson_file, use_cube=False))
+    run('analyze_file_cube', lambda: analyze_file(ndjson_file))
+    
+    for filename in (json_file, ndjson_file):
+        os.remove(filename)
+        remove_cube(filename)
+    return results
+
+def bench_taiwan(size, args, directory):
+    """Benchmark the Taiwan specific database paths at one size"""
+    results = []
+    brands = scale_quotas(generate_taiwan_specific_database.TAIWAN_BRANDS, size)
+    
+    def run(name, func):
+        result, measurement = measure(name, size, func, memory=not args.skip_memory)
+        measurement.update(database='taiwan', size=size)
+        results.append(measurement)
+        return result
+    
+    database = run('generate_taiwan_database', lambda: generate_taiwan_specific_database.generate_taiwan_database(
+        workers=args.workers, seed=args.seed, brands=brands))
+    
+    json_file = os.path.join(directory, f'taiwan_{size}.json')
+    ndjson_file = os.path.join(directory, f'taiwan_{size}.ndjson')
+    run('save_database', lambda: generate_taiwan_specific_database.save_database(database, json_file))
+    run('save_database_ndjson', lambda: generate_taiwan_specific_database.save_database(database, ndjson_file))
+    del database
+    
+    data = run('load_taiwan_specific_database',
+               lambda: taiwan_specific_usage.load_taiwan_specific_database(json_file))
+    run('load_taiwan_specific_database_ndjson',
+        lambda: taiwan_specific_usage.load_taiwan_specific_database(ndjson_file))
+    run('load_taiwan_specific_database_lazy',
+        lambda: list(taiwan_specific_usage.load_taiwan_specific_database(json_file, lazy=True)['motorcycles']))
+    
+    motorcycles = data['motorcycles']
+    run('filter_by_brand', lambda: taiwan_specific_usage.filter_by_brand(motorcycles, 'SYM'))
+    run('filter_by_displacement', lambda: taiwan_specific_usage.filter_by_displacement(motorcycles, min_cc=150))
+    run('filter_by_price_range', lambda: taiwan_specific_usage.filter_by_price_range(motorcycles, 70000))
+    
+    run('analyze_taiwan_database', lambda: taiwan_specific_usage.analyze_taiwan_database(data))
+    # The generators save a statistics cube next to each file: time the scan and the cube separately
+    run('analyze_file_ndjson', lambda: analyze_file(ndjson_file, use_cube=False))
+    run('analyze_file_cube', lambda: analyze_file(ndjson_file))
+    
+    for filename in (json_file, ndjson_file):
+        os.remove(filename)
+        remove_cube(filename)
+    return results
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Benchmark the motorcycle database code paths")
+    parser.add_argument('--sizes', nargs='+', type=parse_size, default=[SIZES[s] for s in DEFAULT_SIZES],
+                        help=f"row counts or presets {', '.join(SIZES)} (default: {' '.join(DEFAULT_SIZES)})")
+    parser.add_argument('--database', choices=['complete', 'taiwan', 'both'], default='both',
+                        help="which database to benchmark (default: both)")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                        help=f"generation seed (default: {DEFAULT_SEED})")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="generator worker processes (default: 1)")
+    parser.add_argument('--batch', action='store_true',
+                        help="use the NumPy batch engine for the complete database")
+    parser.add_argument('--skip-memory', action='store_true',
+                        help="only time each benchmark, without the tracemalloc run")
+    parser.add_argument('--output', default=None,
+                        help="write the JSON results to this file instead of stdout")
+    parser.add_argument('--tmpdir', default=None,
+                        help="directory for the generated database files (default: a temporary directory)")
+    return parser.parse_args()
+
+def main():
+    """Run the benchmarks and emit the results as JSON"""
+    args = parse_args()
+    
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'workers': args.workers,
+        'batch': args.batch,
+        'results': [],
+    }
+    
+    with tempfile.TemporaryDirectory(dir=args.tmpdir) as directory:
+        for size in args.sizes:
+            if args.database in ('complete', 'both'):
+                print(f"Complete database, {size:,} rows:", file=sys.stderr)
+                report['results'].extend(bench_complete(size, args, directory))
+            if args.database in ('taiwan', 'both'):
+                print(f"Taiwan specific database, {size:,} rows:", file=sys.stderr)
+                report['results'].extend(bench_taiwan(size, args, directory))
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
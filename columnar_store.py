@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Columnar Motorcycle Store
+
+Exports a motorcycle database (JSON or NDJSON) to a NumPy .npz file of typed
+columns and loads it back. Display strings are parsed once at export time:
+- brand, type and availability become categorical codes
+- displacement, power, torque, price, model year, weight and seat height
+  become numeric arrays
+- features become a packed bitmask over the feature vocabulary
+Analytics can then load only the columns they need and skip string parsing.
+
+Usage:
+    python3 columnar_store.py taiwan_specific_motorcycles.json taiwan_specific_motorcycles.npz
+"""
+
+import argparse
+
+import numpy as np
+
+from motorcycle_fields import (displacement_cc, fuel_efficiency_km_l, model_year, power_hp,
+                               price_bounds, seat_height_mm, torque_nm, weight_kg)
+from motorcycle_io import iter_records
+
+# Marker for missing values in integer columns (float columns use NaN)
+MISSING = -1
+
+# Categorical columns stored as codes into a per-column category table
+CATEGORICAL_COLUMNS = ['brand', 'type', 'availability']
+
+# Numeric columns: (name, dtype, parser)
+NUMERIC_COLUMNS = [
+    ('displacement_cc', np.int32, displacement_cc),
+    ('power_hp', np.float32, power_hp),
+    ('torque_nm', np.float32, torque_nm),
+    ('model_year', np.int16, model_year),
+    ('weight_kg', np.int32, weight_kg),
+    ('seat_height_mm', np.int32, seat_height_mm),
+    ('fuel_efficiency_km_l', np.float32, fuel_efficiency_km_l),
+]
+
+def build_columns(motorcycles):
+    """Parse records into a dict of typed NumPy columns"""
+    codes = {name: [] for name in CATEGORICAL_COLUMNS}
+    categories = {name: {} for name in CATEGORICAL_COLUMNS}
+    numeric = {name: [] for name, _, _ in NUMERIC_COLUMNS}
+    prices_min, prices_max = [], []
+    vocabulary = {}
+    feature_rows = []
+    
+    for m in motorcycles:
+        for name in CATEGORICAL_COLUMNS:
+            table = categories[name]
+            codes[name].append(table.setdefault(m[name], len(table)))
+        for name, _, parser in NUMERIC_COLUMNS:
+            numeric[name].append(parser(m))
+        lower, upper = price_bounds(m)
+        prices_min.append(lower)
+        prices_max.append(upper)
+        feature_rows.append([vocabulary.setdefault(f, len(vocabulary)) for f in m['features']])
+    
+    columns = {}
+    for name in CATEGORICAL_COLUMNS:
+        columns[name] = np.array(codes[name], dtype=np.int32)
+        columns[f'{name}_categories'] = np.array(list(categories[name]), dtype=str)
+    for name, dtype, _ in NUMERIC_COLUMNS:
+        missing = np.nan if np.issubdtype(dtype, np.floating) else MISSING
+        columns[name] = np.array([missing if v is None else v for v in numeric[name]], dtype=dtype)
+    columns['price_min'] = np.array(prices_min, dtype=np.int64)
+    columns['price_max'] = np.array(prices_max, dtype=np.int64)
+    
+    # Features: one bit per vocabulary entry, packed eight to a byte
+    feature_bits = np.zeros((len(feature_rows), max(len(vocabulary), 1)), dtype=bool)
+    for row, feature_ids in enumerate(feature_rows):
+        feature_bits[row, feature_ids] = True
+    columns['features'] = np.packbits(feature_bits, axis=1)
+    columns['feature_vocabulary'] = np.array(list(vocabulary), dtype=str)
+    
+    return columns
+
+def export_columnar(source, filename, compress=False):
+    """Export a database file (or iterable of records) to a columnar .npz file
+    
+    Returns the number of records exported.
+    """
+    motorcycles = iter_records(source) if isinstance(source, str) else source
+    columns = build_columns(motorcycles)
+    if compress:
+        np.savez_compressed(filename, **columns)
+    else:
+        np.savez(filename, **columns)
+    return len(columns['price_min'])
+
+def load_columnar(filename, columns=None):
+    """Load columns from a columnar .npz file
+    
+    Only the requested columns are read from disk; by default all of them are.
+    """
+    with np.load(filename) as store:
+        names = store.files if columns is None else columns
+        return {name: store[name] for name in names}
+
+def decode_categories(columns, name):
+    """Get the string value of every row of a categorical column"""
+    return columns[f'{name}_categories'][columns[name]]
+
+def category_code(columns, name, value):
+    """Get the code of a category value, or None if it never occurs"""
+    matches = np.flatnonzero(columns[f'{name}_categories'] == value)
+    return int(matches[0]) if len(matches) else None
+
+def feature_mask(columns, features):
+    """Get a boolean row mask of records that have all of the given features"""
+    vocabulary = list(columns['feature_vocabulary'])
+    packed = columns['features']
+    wanted = np.zeros(packed.shape[1] * 8, dtype=bool)
+    for feature in features:
+        if feature not in vocabulary:
+            return np.zeros(len(packed), dtype=bool)
+        wanted[vocabulary.index(feature)] = True
+    wanted = np.packbits(wanted)
+    return ((packed & wanted) == wanted).all(axis=1)
+
+def main():
+    """Export a database to the columnar format and print a short summary"""
+    parser = argparse.ArgumentParser(description="Export a motorcycle database to typed NumPy columns")
+    parser.add_argument('source', help="database file (.json or .ndjson)")
+    parser.add_argument('output', help="columnar output file (.npz)")
+    parser.add_argument('--compress', action='store_true', help="write a compressed .npz file")
+    args = parser.parse_args()
+    
+    count = export_columnar(args.source, args.output, compress=args.compress)
+    print(f"Exported {count} motorcycles to {args.output}")
+    
+    columns = load_columnar(args.output, ['brand', 'brand_categories', 'price_min'])
+    brand_counts = np.bincount(columns['brand'])
+    print(f"Brands: {len(columns['brand_categories'])}")
+    print(f"Most common brand: {columns['brand_categories'][brand_counts.argmax()]}")
+    print(f"Average lower price: NT$ {columns['price_min'].mean():,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,19 @@ This script demonstrates how to load and use the motorcycle database
 for various analysis and filtering tasks.
 """
 
-import json
-from collections import Counter
+import argparse
 
-def load_database(filename='complete_motorcycle_database.json'):
-    """Load the motorcycle database"""
-    with open(filename, 'r', encoding='utf-8') as f:
-        return json.load(f)
+import motorcycle_analytics
+from motorcycle_fields import displacement_cc, price_min
+from motorcycle_io import load_database_file
+from motorcycle_query import Q
+
+def load_database(filename='complete_motorcycle_database.json', lazy=False, compact=False, workers=1):
+    """Load the motorcycle database (JSON or NDJSON)
+    
+    lazy, compact and workers are passed to motorcycle_io.load_database_file.
+    """
+    return load_database_file(filename, lazy=lazy, compact=compact, workers=workers)
 
 def filter_by_brand(motorcycles, brand):
     """Filter motorcycles by brand"""
@@ -22,12 +28,13 @@ def filter_by_displacement(motorcycles, min_cc=None, max_cc=None):
     """Filter motorcycles by engine displacement"""
     result = []
     for m in motorcycles:
-        cc_str = m['engine']['displacement'].replace('cc', '')
-        cc = int(cc_str)
+        cc = displacement_cc(m)
+        if cc is None:
+            continue
         
-        if min_cc and cc < min_cc:
+        if min_cc is not None and cc < min_cc:
             continue
-        if max_cc and cc > max_cc:
+        if max_cc is not None and cc > max_cc:
             continue
         
         result.append(m)
@@ -42,49 +49,45 @@ def filter_by_price_range(motorcycles, max_price_nt):
     """Filter motorcycles by maximum price"""
     result = []
     for m in motorcycles:
-        # Extract price from string like "NT$ 47,500 - 52,500"
-        price_str = m['price_range'].replace('NT$', '').replace(',', '').strip()
-        price_parts = price_str.split(' - ')
-        min_price = int(price_parts[0].strip())
+        # Lower price of a range like "NT$ 47,500 - 52,500"
+        min_price = price_min(m)
         
         if min_price <= max_price_nt:
             result.append(m)
     
     return result
 
-def analyze_database(data):
-    """Perform basic analysis of the database"""
-    motorcycles = data['motorcycles']
+def analyze_database(data, filename=None):
+    """Perform basic analysis of the database
+    
+    Given the database filename, the statistics come from its cube when it
+    is up to date (see stats_cube).
+    """
+    analytics = motorcycle_analytics.analyze_database(data['motorcycles'], filename)
     
     print("=== Taiwan Motorcycle Database Analysis ===")
-    print(f"Total motorcycles: {len(motorcycles)}")
+    print(f"Total motorcycles: {analytics.total}")
     print(f"Database last updated: {data.get('last_updated', 'Unknown')}")
     print()
     
     # Brand distribution
-    brands = Counter(m['brand'] for m in motorcycles)
     print("Brand Distribution:")
-    for brand, count in brands.most_common():
+    for brand, count in analytics.brands.most_common():
         print(f"  {brand}: {count}")
     print()
     
     # Vehicle type distribution
-    types = Counter(m['type'] for m in motorcycles)
     print("Vehicle Type Distribution:")
-    for vtype, count in types.most_common(10):  # Top 10
+    for vtype, count in analytics.types.most_common(10):  # Top 10
         print(f"  {vtype}: {count}")
     print()
     
     # Displacement distribution
-    displacements = []
-    for m in motorcycles:
-        cc_str = m['engine']['displacement'].replace('cc', '')
-        displacements.append(int(cc_str))
-    
+    displacement = analytics.displacement
     print("Displacement Statistics:")
-    print(f"  Minimum: {min(displacements)}cc")
-    print(f"  Maximum: {max(displacements)}cc")
-    print(f"  Average: {sum(displacements) / len(displacements):.1f}cc")
+    print(f"  Minimum: {displacement.minimum}cc")
+    print(f"  Maximum: {displacement.maximum}cc")
+    print(f"  Average: {displacement.mean:.1f}cc")
     print()
 
 def example_queries(motorcycles):
@@ -121,24 +124,32 @@ def example_queries(motorcycles):
 
 def main():
     """Main function demonstrating database usage"""
+    parser = argparse.ArgumentParser(description="Analyze the Taiwan motorcycle database")
+    parser.add_argument('filename', nargs='?', default='complete_motorcycle_database.json',
+                        help="database file, .json or .ndjson (default: complete_motorcycle_database.json)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of processes parsing the database (default: 1)")
+    args = parser.parse_args()
+    
     # Load the database
     try:
-        data = load_database()
+        data = load_database(args.filename, workers=args.workers)
         motorcycles = data['motorcycles']
     except FileNotFoundError:
-        print("Error: complete_motorcycle_database.json not found!")
+        print(f"Error: {args.filename} not found!")
         print("Please run generate_motorcycle_database.py first to create the database.")
         return
     
     # Perform analysis
-    analyze_database(data)
+    analyze_database(data, args.filename)
     
     # Run example queries
     example_queries(motorcycles)
     
     print("=== Custom Query Example ===")
     print("Find all Yamaha motorcycles between 250cc and 600cc:")
-    yamaha_mid = filter_by_displacement(filter_by_brand(motorcycles, 'Yamaha'), 250, 600)
+    # One fused pass instead of nested filter_by_* calls (see motorcycle_query)
+    yamaha_mid = list((Q(brand__iexact='Yamaha') & Q(cc__between=(250, 600))).filter(motorcycles))
     
     for bike in yamaha_mid[:5]:  # Show first 5 results
         print(f"  {bike['model']} - {bike['engine']['displacement']} ({bike['price_range']})")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+SQLite Exporter for the Motorcycle Databases
+
+Writes either generated database (JSON or NDJSON) into a SQLite file with
+normalized tables and indexes for ad-hoc filtered lookups:
+- motorcycles: one row per motorcycle with parsed price, year, weight, ...
+  plus the full record as compact JSON
+- engines: displacement, engine type, power and torque per motorcycle
+- features / motorcycle_features: feature names and the per-motorcycle join table
+- metadata: header fields such as title and last_updated
+
+Query the result with sqlite_usage.py.
+
+Usage:
+    python3 export_sqlite.py taiwan_specific_motorcycles.json taiwan_specific_motorcycles.db
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+
+from motorcycle_fields import (displacement_cc, fuel_efficiency_km_l, model_year, power_hp,
+                               price_bounds, range_km, seat_height_mm, torque_nm, weight_kg)
+from motorcycle_io import iter_records, read_header
+
+# Rows per executemany() batch
+BATCH_SIZE = 10000
+
+SCHEMA = """
+CREATE TABLE metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE motorcycles (
+    id INTEGER PRIMARY KEY,
+    brand TEXT NOT NULL,
+    model TEXT NOT NULL,
+    model_english TEXT,
+    model_year INTEGER,
+    type TEXT NOT NULL,
+    price_range TEXT,
+    price_min INTEGER,
+    price_max INTEGER,
+    fuel_efficiency TEXT,
+    fuel_efficiency_km_l REAL,
+    range_km REAL,
+    weight TEXT,
+    weight_kg INTEGER,
+    seat_height TEXT,
+    seat_height_mm INTEGER,
+    availability TEXT,
+    category TEXT,
+    target_audience TEXT,
+    record TEXT NOT NULL
+);
+CREATE TABLE engines (
+    motorcycle_id INTEGER PRIMARY KEY REFERENCES motorcycles(id),
+    displacement TEXT,
+    displacement_cc INTEGER,
+    type TEXT,
+    power TEXT,
+    power_hp REAL,
+    torque TEXT,
+    torque_nm REAL
+);
+CREATE TABLE features (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE motorcycle_features (
+    motorcycle_id INTEGER NOT NULL REFERENCES motorcycles(id),
+    feature_id INTEGER NOT NULL REFERENCES features(id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (motorcycle_id, feature_id)
+);
+"""
+
+# Created after the bulk load, which is much faster than maintaining them row by row
+INDEXES = """
+CREATE INDEX idx_motorcycles_brand ON motorcycles(brand COLLATE NOCASE);
+CREATE INDEX idx_motorcycles_type ON motorcycles(type);
+CREATE INDEX idx_motorcycles_price_min ON motorcycles(price_min);
+CREATE INDEX idx_motorcycles_model_year ON motorcycles(model_year);
+CREATE INDEX idx_motorcycles_availability ON motorcycles(availability);
+CREATE INDEX idx_engines_displacement_cc ON engines(displacement_cc);
+CREATE INDEX idx_motorcycle_features_feature ON motorcycle_features(feature_id);
+"""
+
+def motorcycle_row(motorcycle_id, m):
+    """Get the motorcycles table row for a record"""
+    lower_price, upper_price = price_bounds(m)
+    return (
+        motorcycle_id, m['brand'], m['model'], m.get('model_english'), model_year(m), m['type'],
+        m['price_range'], lower_price, upper_price,
+        m.get('fuel_efficiency'), fuel_efficiency_km_l(m), range_km(m),
+        m.get('weight'), weight_kg(m), m.get('seat_height'), seat_height_mm(m),
+        m.get('availability'), m.get('category'), m.get('target_audience'),
+        json.dumps(m, ensure_ascii=False, separators=(',', ':'))
+    )
+
+def engine_row(motorcycle_id, m):
+    """Get the engines table row for a record"""
+    engine = m['engine']
+    return (
+        motorcycle_id, engine.get('displacement'), displacement_cc(m), engine.get('type'),
+        engine.get('power'), power_hp(m), engine.get('torque'), torque_nm(m)
+    )
+
+def export_sqlite(source, filename):
+    """Export a database file to a new SQLite file
+    
+    Records are streamed from the source and inserted in batches.
+    Returns the number of motorcycles exported.
+    """
+    if os.path.exists(filename):
+        os.remove(filename)
+    
+    conn = sqlite3.connect(filename)
+    try:
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.executescript(SCHEMA)
+        
+        conn.executemany('INSERT INTO metadata (key, value) VALUES (?, ?)',
+                         [(k, json.dumps(v, ensure_ascii=False)) for k, v in read_header(source).items()])
+        
+        feature_ids = {}
+        motorcycles, engines, links = [], [], []
+        count = 0
+        for count, m in enumerate(iter_records(source), start=1):
+            motorcycles.append(motorcycle_row(count, m))
+            engines.append(engine_row(count, m))
+            for position, feature in enumerate(m['features']):
+                if feature not in feature_ids:
+                    feature_ids[feature] = len(feature_ids) + 1
+                    conn.execute('INSERT INTO features (id, name) VALUES (?, ?)', (feature_ids[feature], feature))
+                links.append((count, feature_ids[feature], position))
+            
+            if len(motorcycles) >= BATCH_SIZE:
+                insert_batch(conn, motorcycles, engines, links)
+                motorcycles, engines, links = [], [], []
+        insert_batch(conn, motorcycles, engines, links)
+        
+        conn.executescript(INDEXES)
+        conn.execute('ANALYZE')
+        conn.commit()
+    finally:
+        conn.close()
+    
+    return count
+
+def insert_batch(conn, motorcycles, engines, links):
+    """Insert one batch of motorcycles, engines and feature links"""
+    conn.executemany(f'INSERT INTO motorcycles VALUES ({", ".join("?" * 20)})', motorcycles)
+    conn.executemany(f'INSERT INTO engines VALUES ({", ".join("?" * 8)})', engines)
+    conn.executemany('INSERT OR IGNORE INTO motorcycle_features VALUES (?, ?, ?)', links)
+
+def main():
+    """Export a database file to SQLite"""
+    parser = argparse.ArgumentParser(description="Export a motorcycle database to SQLite")
+    parser.add_argument('source', help="database file (.json or .ndjson)")
+    parser.add_argument('output', help="SQLite output file")
+    args = parser.parse_args()
+    
+    count = export_sqlite(args.source, args.output)
+    print(f"Exported {count} motorcycles to {args.output}")
+
+if __name__ == "__main__":
+    main()
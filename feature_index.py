@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Feature Bitmask Index
+
+Record features are free strings, but the generators draw them from fixed
+vocabularies: FEATURES of generate_motorcycle_database, FEATURES_BY_TYPE and
+BRAND_FEATURES of generate_taiwan_specific_database. FeatureVocabulary gives
+each of them a fixed bit number (features found in a file but in no
+generator vocabulary get the next free bits), and FeatureIndex encodes the
+features of every record once, at load time, as uint64 bitmask words: one
+contiguous array per 64 features.
+
+Questions such as "has ABS system and Smart key but not Battery swapping"
+then become a few bitwise operations over one NumPy array instead of list
+membership tests on every record.
+
+Usage:
+    python3 feature_index.py taiwan_specific_motorcycles.json --all "ABS system" "Smart key" --none "Battery swapping"
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from motorcycle_io import load_database_file
+
+WORD_BITS = 64
+
+def registered_features():
+    """Get the features of the generator vocabularies, each once, in a fixed order"""
+    from generate_motorcycle_database import FEATURES
+    from generate_taiwan_specific_database import BRAND_FEATURES, FEATURES_BY_TYPE
+    
+    features = {}
+    for vocabulary in (FEATURES, FEATURES_BY_TYPE, BRAND_FEATURES):
+        for names in vocabulary.values():
+            features.update(dict.fromkeys(names))
+    return list(features)
+
+class FeatureVocabulary:
+    """Feature name <-> bit number registry"""
+    
+    def __init__(self, features=None):
+        self.features = []
+        self.bits = {}
+        for feature in registered_features() if features is None else features:
+            self.add(feature)
+    
+    def __len__(self):
+        return len(self.features)
+    
+    def __contains__(self, feature):
+        return feature in self.bits
+    
+    def add(self, feature):
+        """Get the bit of a feature, giving it the next free bit if it is new"""
+        bit = self.bits.get(feature)
+        if bit is None:
+            bit = self.bits[feature] = len(self.features)
+            self.features.append(feature)
+        return bit
+    
+    @property
+    def words(self):
+        """Get the number of uint64 words a record's mask needs"""
+        return max(1, -(-len(self.features) // WORD_BITS))
+    
+    def mask(self, features):
+        """Get the integer bitmask of known features (unknown ones are left out)"""
+        mask = 0
+        for feature in features:
+            bit = self.bits.get(feature)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+    
+    def decode(self, mask):
+        """Get the features of an integer bitmask, in bit order"""
+        return [feature for bit, feature in enumerate(self.features) if mask >> bit & 1]
+    
+    def words_of(self, mask, words=None):
+        """Split an integer bitmask into a uint64 word array"""
+        words = self.words if words is None else words
+        return np.array([mask >> (WORD_BITS * word) & (1 << WORD_BITS) - 1 for word in range(words)],
+                        dtype=np.uint64)
+
+class FeatureIndex:
+    """The features of every record as a (words x records) uint64 bitmask array"""
+    
+    def __init__(self, motorcycles, vocabulary=None):
+        self.vocabulary = vocabulary or FeatureVocabulary()
+        self.size = 0
+        rows, bits = [], []
+        for m in motorcycles:
+            for feature in m.get('features', ()):
+                rows.append(self.size)
+                bits.append(self.vocabulary.add(feature))
+            self.size += 1
+        
+        # Set every (row, bit) pair: the word is bit // 64, the value 1 << bit % 64;
+        # a word's values for all records are contiguous, so a query reads only its words
+        self.masks = np.zeros((self.vocabulary.words, self.size), dtype=np.uint64)
+        rows = np.array(rows, dtype=np.intp)
+        bits = np.array(bits, dtype=np.uint64)
+        np.bitwise_or.at(self.masks, ((bits // WORD_BITS).astype(np.intp), rows),
+                         np.left_shift(np.uint64(1), bits % np.uint64(WORD_BITS)))
+    
+    def __len__(self):
+        return self.size
+    
+    def row_mask(self, all_of=(), any_of=(), none_of=()):
+        """Get a boolean array of the records that have every feature of all_of,
+        at least one of any_of (when given) and none of none_of
+        
+        A feature no record has makes all_of match nothing; in any_of and
+        none_of it is ignored.
+        """
+        vocabulary = self.vocabulary
+        matched = np.ones(self.size, dtype=bool)
+        if any(feature not in vocabulary for feature in all_of):
+            return np.zeros(self.size, dtype=bool)
+        
+        words = len(self.masks)
+        wanted = vocabulary.words_of(vocabulary.mask(all_of), words)
+        rejected = vocabulary.words_of(vocabulary.mask(none_of), words)
+        for word in np.flatnonzero(wanted | rejected):
+            if wanted[word]:
+                matched &= (self.masks[word] & wanted[word]) == wanted[word]
+            if rejected[word]:
+                matched &= (self.masks[word] & rejected[word]) == 0
+        if any_of:
+            accepted = vocabulary.words_of(vocabulary.mask(any_of), words)
+            found = np.zeros(self.size, dtype=bool)
+            for word in np.flatnonzero(accepted):
+                found |= (self.masks[word] & accepted[word]) != 0
+            matched &= found
+        return matched
+    
+    def rows(self, all_of=(), any_of=(), none_of=()):
+        """Get the row numbers matching a feature query (see row_mask), in ascending order"""
+        return np.flatnonzero(self.row_mask(all_of, any_of, none_of))
+    
+    def count(self, all_of=(), any_of=(), none_of=()):
+        """Get the number of records matching a feature query"""
+        return int(np.count_nonzero(self.row_mask(all_of, any_of, none_of)))
+    
+    def features(self, row):
+        """Get the features of one record, in bit order"""
+        mask = 0
+        for word, value in enumerate(self.masks[:, row].tolist()):
+            mask |= value << (WORD_BITS * word)
+        return self.vocabulary.decode(mask)
+
+def main():
+    """Run one feature query with the bitmask index and with list membership tests"""
+    parser = argparse.ArgumentParser(description="Query motorcycle features with a bitmask index")
+    parser.add_argument('filename', nargs='?', default='taiwan_specific_motorcycles.json',
+                        help="database file, .json or .ndjson (default: taiwan_specific_motorcycles.json)")
+    parser.add_argument('--all', nargs='+', default=['ABS system', 'Smart key'], dest='all_of',
+                        help="features every result must have")
+    parser.add_argument('--any', nargs='+', default=[], dest='any_of',
+                        help="features of which a result must have at least one")
+    parser.add_argument('--none', nargs='+', default=['Battery swapping'], dest='none_of',
+                        help="features no result may have")
+    args = parser.parse_args()
+    
+    motorcycles = load_database_file(args.filename)['motorcycles']
+    start = time.perf_counter()
+    index = FeatureIndex(motorcycles)
+    built = time.perf_counter() - start
+    print(f"Indexed {len(index)} motorcycles over {len(index.vocabulary)} features "
+          f"({index.vocabulary.words} word(s) per record) in {built * 1000:.1f} ms")
+    
+    start = time.perf_counter()
+    rows = index.rows(args.all_of, args.any_of, args.none_of)
+    indexed = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    scanned = [m for m in motorcycles
+               if all(f in m['features'] for f in args.all_of)
+               and (not args.any_of or any(f in m['features'] for f in args.any_of))
+               and not any(f in m['features'] for f in args.none_of)]
+    scan = time.perf_counter() - start
+    
+    print(f"{len(rows)} matches: {indexed * 1000:.2f} ms with the bitmask, "
+          f"{scan * 1000:.2f} ms with list membership ({len(scanned)} matches)")
+    for row in rows[:5].tolist():
+        m = motorcycles[row]
+        print(f"  {m['brand']} {m['model']} - {', '.join(index.features(row))}")
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,28 @@ This script generates a comprehensive database of motorcycles available in Taiwa
 with realistic specifications, pricing, and features.
 """
 
+import argparse
 import json
 import random
 from datetime import datetime
 
+import incremental_generation
+import stats_cube
+from generation_shards import new_seed, run_shards, split_quotas
+from motorcycle_io import is_ndjson, with_format, write_json_stream, write_ndjson
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only required for the batch engine
+    np = None
+
 # Configuration
 TARGET_ENTRIES = 20000
 OUTPUT_FILE = 'complete_motorcycle_database.json'
 
+# Record schemas: 1 = display strings only, 2 = display strings plus raw numbers
+SCHEMA_VERSIONS = (1, 2)
+
 # Taiwan motorcycle brands and their market distribution
 BRANDS = {
     'Honda': 2980,
@@ -81,52 +95,62 @@ FEATURES = {
     'classic': ['Retro styling', 'Classic design', 'Heritage appeal', 'Chrome details', 'Vintage instruments', 'Classic ergonomics', 'Timeless look', 'Traditional controls', 'Classic paint schemes', 'Nostalgic feel']
 }
 
+FEATURE_CATEGORIES = list(FEATURES.keys())
+
 # Model years - Extended from 2000 to 2025 as requested
 MODEL_YEARS = list(range(2000, 2026))
 
 # Variants and special editions
 VARIANTS = ['', 'Special Edition', 'Anniversary', 'ABS', 'Limited', 'Sport', 'Touring', 'Adventure', 'Premium', 'Deluxe', 'SE', 'X', 'S', 'R', 'GT']
 
-def calculate_power(displacement, vehicle_type):
+# Common displacements used when a model name rounds its cc value
+COMMON_DISPLACEMENTS = [50, 100, 125, 150, 200, 250, 300, 400, 500, 600, 650, 750, 900, 1000, 1200]
+
+# Fallback model name templates for brands without their own
+DEFAULT_MODEL_TEMPLATES = ['Model {cc}', 'Bike {cc}', '{cc} Series']
+DEFAULT_TEMPLATE_PARTS = [template.split('{cc}') for template in DEFAULT_MODEL_TEMPLATES]
+
+# Engine type for displacements outside every ENGINE_TYPES range
+DEFAULT_ENGINE_TYPE = '4-stroke, liquid-cooled'
+
+# Brand premium multipliers
+BRAND_PRICE_MULTIPLIERS = {
+    'Honda': 1.3, 'Yamaha': 1.25, 'Kawasaki': 1.4, 'Suzuki': 1.2,
+    'Kymco': 1.0, 'SYM': 0.95, 'Aeon': 0.9, 'Sanyang': 0.85,
+    'CFMOTO': 0.8, 'PGO': 0.9
+}
+
+# Type multipliers
+TYPE_PRICE_MULTIPLIERS = {
+    'Sport': 1.5, 'Adventure': 1.4, 'Touring': 1.3, 'Sport Touring': 1.4,
+    'Naked': 1.2, 'Cruiser': 1.1, 'Supermoto': 1.3, 'Dual Sport': 1.2,
+    'Maxi Scooter': 1.2, 'Sport Scooter': 1.1, 'Touring Scooter': 1.15,
+    'Urban Scooter': 1.0, 'Classic Scooter': 1.05, 'Retro Scooter': 1.05,
+    'Standard': 1.0, 'Retro': 1.1
+}
+
+def calculate_power(displacement, vehicle_type, rng=random):
     """Calculate realistic power output based on displacement and vehicle type"""
     multiplier = VEHICLE_TYPES[vehicle_type]['power_multiplier']
     base_power = displacement * multiplier
     # Add some variation
-    variation = random.uniform(0.85, 1.15)
+    variation = rng.uniform(0.85, 1.15)
     return round(base_power * variation, 1)
 
-def get_engine_type(displacement):
+def get_engine_type(displacement, rng=random):
     """Get appropriate engine type based on displacement"""
-    for (min_cc, max_cc), engine_types in ENGINE_TYPES.items():
-        if min_cc <= displacement <= max_cc:
-            return random.choice(engine_types)
-    return '4-stroke, liquid-cooled'
+    engine_types = GENERATION_PLAN['engine_types']
+    choices = engine_types[displacement] if 0 <= displacement < len(engine_types) else None
+    if choices is None:
+        return DEFAULT_ENGINE_TYPE
+    return rng.choice(choices)
 
-def calculate_price(brand, displacement, vehicle_type):
-    """Calculate Taiwan market pricing in NT$"""
+def calculate_price(brand, displacement, vehicle_type, rng=random):
+    """Calculate Taiwan market pricing in NT$ as (lower, upper)"""
     # Base price calculation
     base_price = displacement * 0.8  # Base: 0.8 NT$ per cc
     
-    # Brand premium multipliers
-    brand_multipliers = {
-        'Honda': 1.3, 'Yamaha': 1.25, 'Kawasaki': 1.4, 'Suzuki': 1.2,
-        'Kymco': 1.0, 'SYM': 0.95, 'Aeon': 0.9, 'Sanyang': 0.85,
-        'CFMOTO': 0.8, 'PGO': 0.9
-    }
-    
-    # Type multipliers
-    type_multipliers = {
-        'Sport': 1.5, 'Adventure': 1.4, 'Touring': 1.3, 'Sport Touring': 1.4,
-        'Naked': 1.2, 'Cruiser': 1.1, 'Supermoto': 1.3, 'Dual Sport': 1.2,
-        'Maxi Scooter': 1.2, 'Sport Scooter': 1.1, 'Touring Scooter': 1.15,
-        'Urban Scooter': 1.0, 'Classic Scooter': 1.05, 'Retro Scooter': 1.05,
-        'Standard': 1.0, 'Retro': 1.1
-    }
-    
-    brand_mult = brand_multipliers.get(brand, 1.0)
-    type_mult = type_multipliers.get(vehicle_type, 1.0)
-    
-    price = base_price * brand_mult * type_mult * random.uniform(0.9, 1.1)
+    price = base_price * price_multiplier(brand, vehicle_type) * rng.uniform(0.9, 1.1)
     
     # Convert to reasonable Taiwan pricing
     price = max(price * 100, 50000)  # Minimum 50,000 NT$
@@ -134,55 +158,88 @@ def calculate_price(brand, displacement, vehicle_type):
     lower_price = int(price * 0.95)
     upper_price = int(price * 1.05)
     
+    return lower_price, upper_price
+
+def format_price_range(lower_price, upper_price):
+    """Format a price range as "NT$ 47,500 - 52,500" """
     return f"NT$ {lower_price:,} - {upper_price:,}"
 
-def get_features(vehicle_type):
-    """Get appropriate features for vehicle type"""
-    # Determine feature category
+def get_feature_category(vehicle_type):
+    """Get the feature category for a vehicle type (None means pick one at random)"""
     if 'Scooter' in vehicle_type:
-        category = 'scooter'
+        return 'scooter'
     elif 'Sport' in vehicle_type:
-        category = 'sport'
+        return 'sport'
     elif 'Touring' in vehicle_type or 'Adventure' in vehicle_type:
-        category = 'touring' if 'Touring' in vehicle_type else 'adventure'
+        return 'touring' if 'Touring' in vehicle_type else 'adventure'
     elif 'Naked' in vehicle_type:
-        category = 'naked'
+        return 'naked'
     elif 'Retro' in vehicle_type or 'Classic' in vehicle_type:
-        category = 'classic'
-    else:
-        category = random.choice(list(FEATURES.keys()))
+        return 'classic'
+    return None
+
+def get_features(vehicle_type, rng=random):
+    """Get appropriate features for vehicle type"""
+    # Determine feature category
+    category = GENERATION_PLAN['feature_categories'].get(vehicle_type)
+    if category is None:
+        category = rng.choice(FEATURE_CATEGORIES)
     
     # Select 3-5 features
-    num_features = random.randint(3, 5)
-    selected_features = random.sample(FEATURES[category], min(num_features, len(FEATURES[category])))
+    num_features = rng.randint(3, 5)
+    selected_features = rng.sample(FEATURES[category], min(num_features, len(FEATURES[category])))
     
     return selected_features
 
-def generate_model_name(brand, displacement, vehicle_type):
+def get_vehicle_type_choices(brand):
+    """Get the vehicle types a brand builds"""
+    if brand in ['Kymco', 'SYM', 'PGO']:
+        # Taiwanese brands focus more on scooters
+        return [
+            'Urban Scooter', 'Sport Scooter', 'Maxi Scooter', 'Classic Scooter',
+            'Retro Scooter', 'Touring Scooter', 'Standard', 'Retro'
+        ]
+    elif brand in ['Honda', 'Yamaha']:
+        # Japanese brands have diverse portfolios
+        return list(VEHICLE_TYPES.keys())
+    elif brand in ['Kawasaki', 'Suzuki']:
+        # Focus more on sport and performance bikes
+        return [
+            'Sport', 'Naked', 'Adventure', 'Touring', 'Sport Touring',
+            'Supermoto', 'Dual Sport', 'Standard', 'Cruiser'
+        ]
+    else:
+        # Other brands
+        return list(VEHICLE_TYPES.keys())
+
+def generate_model_name(brand, displacement, vehicle_type, rng=random):
     """Generate realistic model name"""
-    templates = MODEL_TEMPLATES.get(brand, ['Model {cc}', 'Bike {cc}', '{cc} Series'])
-    template = random.choice(templates)
+    return generate_model(brand, displacement, rng)[0]
+
+def generate_model(brand, displacement, rng=random):
+    """Generate a realistic model name and its model year as (name, year)"""
+    # Templates are stored pre-split around {cc}, so filling one is a single join
+    template_parts = rng.choice(GENERATION_PLAN['model_templates'].get(brand, DEFAULT_TEMPLATE_PARTS))
     
     # Some models use actual displacement, others use rounded values
-    if random.random() < 0.7:
+    if rng.random() < 0.7:
         cc_value = displacement
     else:
         # Round to nearest common displacement
-        common_displacements = [50, 100, 125, 150, 200, 250, 300, 400, 500, 600, 650, 750, 900, 1000, 1200]
-        cc_value = min(common_displacements, key=lambda x: abs(x - displacement))
+        cc_value = nearest_common_displacement(displacement)
     
-    model_name = template.format(cc=cc_value)
+    model_name = str(cc_value).join(template_parts)
     
     # Add year and variant
-    year = random.choice(MODEL_YEARS)
-    variant = random.choice(VARIANTS)
+    year = rng.choice(MODEL_YEARS)
+    variant = rng.choice(VARIANTS)
     
     if variant:
-        return f"{model_name} {variant} ({year})"
+        return f"{model_name} {variant} ({year})", year
     else:
-        return f"{model_name} ({year})"
+        return f"{model_name} ({year})", year
 
-def get_availability_status(model_year):
+def get_availability_status(model_year, rng=random):
     """Determine availability status based on model year"""
     current_year = 2024
     
@@ -190,33 +247,87 @@ def get_availability_status(model_year):
         return "Available"
     elif model_year >= 2018:
         # Some recent models might still be available as new-old-stock
-        return random.choice(["Available", "Limited Availability", "Discontinued"])
+        return rng.choice(["Available", "Limited Availability", "Discontinued"])
     elif model_year >= 2010:
-        return random.choice(["Discontinued", "Used Market Only"])
+        return rng.choice(["Discontinued", "Used Market Only"])
     else:
         # Older models from 2000-2009
-        return random.choice(["Discontinued", "Used Market Only", "Collector Item"])
+        return rng.choice(["Discontinued", "Used Market Only", "Collector Item"])
 
-def generate_motorcycle(brand, vehicle_type):
-    """Generate a single motorcycle entry"""
+def compile_generation_plan():
+    """Precompute the static lookups used for every generated row
+    
+    - engine_types: list indexed by cc with the engine type choices of the
+      first matching ENGINE_TYPES range (None where no range matches)
+    - nearest_displacements: list indexed by cc with the closest common displacement
+    - feature_categories: vehicle type -> FEATURES category (absent = random)
+    - price_multipliers: (brand, vehicle type) -> brand x type price multiplier
+    - model_templates: brand -> templates split around {cc}
+    """
+    max_cc = max(max_cc for _, max_cc in ENGINE_TYPES)
+    max_cc = max(max_cc, max(info['displacement_range'][1] for info in VEHICLE_TYPES.values()))
+    
+    engine_types = [None] * (max_cc + 1)
+    for (min_cc, range_max), choices in reversed(list(ENGINE_TYPES.items())):
+        # Filled in reverse so the first matching range wins, as in a linear scan
+        engine_types[min_cc:range_max + 1] = [tuple(choices)] * (range_max + 1 - min_cc)
+    
+    brands = set(BRANDS) | set(BRAND_PRICE_MULTIPLIERS)
+    return {
+        'engine_types': engine_types,
+        'nearest_displacements': [
+            min(COMMON_DISPLACEMENTS, key=lambda x: abs(x - cc)) for cc in range(max_cc + 1)
+        ],
+        'feature_categories': {
+            vehicle_type: category for vehicle_type in VEHICLE_TYPES
+            if (category := get_feature_category(vehicle_type)) is not None
+        },
+        'price_multipliers': {
+            (brand, vehicle_type): BRAND_PRICE_MULTIPLIERS.get(brand, 1.0) * TYPE_PRICE_MULTIPLIERS.get(vehicle_type, 1.0)
+            for brand in brands for vehicle_type in VEHICLE_TYPES
+        },
+        'model_templates': {
+            brand: [template.split('{cc}') for template in templates]
+            for brand, templates in MODEL_TEMPLATES.items()
+        },
+    }
+
+def price_multiplier(brand, vehicle_type):
+    """Get the combined brand and vehicle type price multiplier"""
+    multiplier = GENERATION_PLAN['price_multipliers'].get((brand, vehicle_type))
+    if multiplier is None:
+        multiplier = BRAND_PRICE_MULTIPLIERS.get(brand, 1.0) * TYPE_PRICE_MULTIPLIERS.get(vehicle_type, 1.0)
+    return multiplier
+
+def nearest_common_displacement(displacement):
+    """Get the common displacement closest to displacement"""
+    nearest = GENERATION_PLAN['nearest_displacements']
+    if 0 <= displacement < len(nearest):
+        return nearest[displacement]
+    return min(COMMON_DISPLACEMENTS, key=lambda x: abs(x - displacement))
+
+# Built once per process; the per-row helpers above only index into it
+GENERATION_PLAN = compile_generation_plan()
+
+def generate_motorcycle(brand, vehicle_type, rng=random, schema=1):
+    """Generate a single motorcycle entry
+    
+    Schema 2 also stores the raw numbers behind the display strings
+    (displacement_cc, power_hp, price_min, price_max, model_year).
+    """
     # Get displacement range for vehicle type
     min_cc, max_cc = VEHICLE_TYPES[vehicle_type]['displacement_range']
-    displacement = random.randint(min_cc, max_cc)
+    displacement = rng.randint(min_cc, max_cc)
     
     # Generate all attributes
-    model = generate_model_name(brand, displacement, vehicle_type)
-    power = calculate_power(displacement, vehicle_type)
-    engine_type = get_engine_type(displacement)
-    features = get_features(vehicle_type)
-    price_range = calculate_price(brand, displacement, vehicle_type)
-    
-    # Extract year from model name to determine availability
-    import re
-    year_match = re.search(r'\((\d{4})\)', model)
-    model_year = int(year_match.group(1)) if year_match else 2024
-    availability = get_availability_status(model_year)
+    model, model_year = generate_model(brand, displacement, rng)
+    power = calculate_power(displacement, vehicle_type, rng)
+    engine_type = get_engine_type(displacement, rng)
+    features = get_features(vehicle_type, rng)
+    price_min, price_max = calculate_price(brand, displacement, vehicle_type, rng)
+    availability = get_availability_status(model_year, rng)
     
-    return {
+    motorcycle = {
         "brand": brand,
         "model": model,
         "type": vehicle_type,
@@ -226,86 +337,319 @@ def generate_motorcycle(brand, vehicle_type):
             "power": f"{power} hp"
         },
         "features": features,
-        "price_range": price_range,
+        "price_range": format_price_range(price_min, price_max),
         "availability": availability
     }
+    
+    if schema >= 2:
+        add_numeric_fields(motorcycle, displacement, power, price_min, price_max, model_year)
+    
+    return motorcycle
 
-def generate_database():
-    """Generate the complete motorcycle database"""
+def add_numeric_fields(motorcycle, displacement, power, price_min, price_max, model_year):
+    """Add the schema 2 raw numeric fields to a motorcycle entry"""
+    motorcycle["engine"]["displacement_cc"] = displacement
+    motorcycle["engine"]["power_hp"] = power
+    motorcycle["price_min"] = price_min
+    motorcycle["price_max"] = price_max
+    motorcycle["model_year"] = model_year
+
+def generate_motorcycle_block(brand, vehicle_type, count, rng, schema=1):
+    """Generate count entries of one brand and vehicle type with NumPy
+    
+    Every random attribute is drawn for the whole block at once, using the
+    same distributions as generate_motorcycle(), and the arrays are then
+    turned into records.
+    """
+    type_info = VEHICLE_TYPES[vehicle_type]
+    min_cc, max_cc = type_info['displacement_range']
+    displacement = rng.integers(min_cc, max_cc + 1, size=count)
+    
+    # Model name: template, actual or rounded cc value, year and variant
+    # str.join over the pre-split template is much cheaper than str.format per row
+    template_parts = GENERATION_PLAN['model_templates'].get(brand, DEFAULT_TEMPLATE_PARTS)
+    template_idx = rng.integers(0, len(template_parts), size=count)
+    use_actual_cc = rng.random(count) < 0.7
+    nearest_cc = np.array(GENERATION_PLAN['nearest_displacements'])[displacement]
+    cc_value = np.where(use_actual_cc, displacement, nearest_cc)
+    model_year = np.array(MODEL_YEARS)[rng.integers(0, len(MODEL_YEARS), size=count)]
+    variant_idx = rng.integers(0, len(VARIANTS), size=count)
+    
+    # Power
+    base_power = displacement * type_info['power_multiplier']
+    power = np.round(base_power * rng.uniform(0.85, 1.15, size=count), 1)
+    
+    # Engine type: first displacement range that matches, as in get_engine_type()
+    engine_type = np.full(count, DEFAULT_ENGINE_TYPE, dtype=object)
+    assigned = np.zeros(count, dtype=bool)
+    for (range_min, range_max), engine_types in ENGINE_TYPES.items():
+        mask = ~assigned & (displacement >= range_min) & (displacement <= range_max)
+        choices = np.array(engine_types, dtype=object)
+        engine_type[mask] = choices[rng.integers(0, len(choices), size=int(mask.sum()))]
+        assigned |= mask
+    
+    # Features: 3-5 distinct features from the category pool
+    categories = FEATURE_CATEGORIES
+    category = GENERATION_PLAN['feature_categories'].get(vehicle_type)
+    if category is None:
+        category_idx = rng.integers(0, len(categories), size=count)
+    else:
+        category_idx = np.full(count, categories.index(category))
+    features = [None] * count
+    for cat in np.unique(category_idx).tolist():
+        rows = np.flatnonzero(category_idx == cat)
+        pool = np.array(FEATURES[categories[cat]], dtype=object)
+        num_features = np.minimum(rng.integers(3, 6, size=len(rows)), len(pool))
+        shuffled = pool[np.argsort(rng.random((len(rows), len(pool))), axis=1)].tolist()
+        for row, n_features, row_features in zip(rows.tolist(), num_features.tolist(), shuffled):
+            features[row] = row_features[:n_features]
+    
+    # Price
+    base_price = displacement * 0.8
+    price = base_price * price_multiplier(brand, vehicle_type) * rng.uniform(0.9, 1.1, size=count)
+    price = np.maximum(price * 100, 50000)
+    lower_price = (price * 0.95).astype(np.int64)
+    upper_price = (price * 1.05).astype(np.int64)
+    
+    # Availability, following get_availability_status()
+    availability = np.select(
+        [model_year >= 2022, model_year >= 2018, model_year >= 2010],
+        [
+            np.full(count, "Available", dtype=object),
+            np.array(["Available", "Limited Availability", "Discontinued"], dtype=object)[rng.integers(0, 3, size=count)],
+            np.array(["Discontinued", "Used Market Only"], dtype=object)[rng.integers(0, 2, size=count)],
+        ],
+        np.array(["Discontinued", "Used Market Only", "Collector Item"], dtype=object)[rng.integers(0, 3, size=count)]
+    )
+    
+    motorcycles = []
+    rows = zip(
+        template_idx.tolist(), cc_value.tolist(), model_year.tolist(), variant_idx.tolist(),
+        displacement.tolist(), engine_type.tolist(), power.tolist(), features,
+        lower_price.tolist(), upper_price.tolist(), availability.tolist()
+    )
+    for (template, cc, year, variant, disp, engine, hp,
+         selected_features, lower, upper, status) in rows:
+        model_name = str(cc).join(template_parts[template])
+        if VARIANTS[variant]:
+            model = f"{model_name} {VARIANTS[variant]} ({year})"
+        else:
+            model = f"{model_name} ({year})"
+        
+        motorcycle = {
+            "brand": brand,
+            "model": model,
+            "type": vehicle_type,
+            "engine": {
+                "displacement": f"{disp}cc",
+                "type": engine,
+                "power": f"{hp} hp"
+            },
+            "features": selected_features,
+            "price_range": f"NT$ {lower:,} - {upper:,}",
+            "availability": status
+        }
+        if schema >= 2:
+            add_numeric_fields(motorcycle, disp, hp, lower, upper, year)
+        motorcycles.append(motorcycle)
+    
+    return motorcycles
+
+def generate_brand_batch(brand, count, rng, schema=1):
+    """Generate count entries for a brand, one NumPy block per vehicle type"""
+    vehicle_types = get_vehicle_type_choices(brand)
+    type_idx = rng.integers(0, len(vehicle_types), size=count)
+    
+    # Keep the per-row type draw order so the output interleaves like the scalar path
+    motorcycles = [None] * count
+    for i, vehicle_type in enumerate(vehicle_types):
+        positions = np.flatnonzero(type_idx == i)
+        if len(positions) == 0:
+            continue
+        block = generate_motorcycle_block(brand, vehicle_type, len(positions), rng, schema)
+        for position, motorcycle in zip(positions.tolist(), block):
+            motorcycles[position] = motorcycle
+    
+    return motorcycles
+
+def generate_brand(brand, count, rng=random, batch=False, schema=1):
+    """Generate count entries for a brand"""
+    if batch:
+        return generate_brand_batch(brand, count, rng, schema)
+    
+    vehicle_types = get_vehicle_type_choices(brand)
     motorcycles = []
+    for i in range(count):
+        # Choose vehicle type based on brand characteristics
+        vehicle_type = rng.choice(vehicle_types)
+        motorcycles.append(generate_motorcycle(brand, vehicle_type, rng, schema))
+    
+    return motorcycles
+
+def generate_shard(shard):
+    """Generate one (brand, count, seed, batch, schema) shard with its own RNG"""
+    brand, count, seed, batch, schema = shard
+    rng = np.random.default_rng(seed) if batch else random.Random(seed)
+    return generate_brand(brand, count, rng, batch, schema)
+
+def iter_motorcycles(batch=False, workers=1, seed=None, schema=1, brands=None):
+    """Yield every motorcycle entry, one shard at a time
+    
+    The brand quotas (BRANDS unless given) are split into shards (see generation_shards) that each
+    get an independent RNG derived from seed, so the same seed gives the same
+    records for any number of workers. With batch=True each shard is
+    generated by the NumPy batch engine (see generate_brand_batch) instead of
+    one generate_motorcycle() call per row.
+    """
+    if batch and np is None:
+        raise RuntimeError("Batch generation requires numpy (pip install numpy)")
+    if seed is None:
+        seed = new_seed()
+    if brands is None:
+        brands = BRANDS
     
     print("Generating Taiwan Motorcycle Database...")
-    print(f"Target entries: {TARGET_ENTRIES}")
+    print(f"Target entries: {sum(brands.values())} (seed {seed}, {workers} worker(s))")
     
-    for brand, target_count in BRANDS.items():
+    for brand, target_count in brands.items():
         print(f"Generating {target_count} entries for {brand}...")
-        
-        for i in range(target_count):
-            # Choose vehicle type based on brand characteristics
-            if brand in ['Kymco', 'SYM', 'PGO']:
-                # Taiwanese brands focus more on scooters
-                vehicle_type = random.choice([
-                    'Urban Scooter', 'Sport Scooter', 'Maxi Scooter', 'Classic Scooter',
-                    'Retro Scooter', 'Touring Scooter', 'Standard', 'Retro'
-                ])
-            elif brand in ['Honda', 'Yamaha']:
-                # Japanese brands have diverse portfolios
-                vehicle_type = random.choice(list(VEHICLE_TYPES.keys()))
-            elif brand in ['Kawasaki', 'Suzuki']:
-                # Focus more on sport and performance bikes
-                vehicle_type = random.choice([
-                    'Sport', 'Naked', 'Adventure', 'Touring', 'Sport Touring',
-                    'Supermoto', 'Dual Sport', 'Standard', 'Cruiser'
-                ])
-            else:
-                # Other brands
-                vehicle_type = random.choice(list(VEHICLE_TYPES.keys()))
-            
-            motorcycle = generate_motorcycle(brand, vehicle_type)
-            motorcycles.append(motorcycle)
     
-    # Create the complete database structure
-    database = {
+    shards = [shard + (batch, schema) for shard in split_quotas(brands, seed)]
+    for records in run_shards(generate_shard, shards, workers):
+        yield from records
+
+def database_header(schema=1):
+    """Get the database fields that precede total_entries and the records"""
+    header = {
         "title": "Complete Taiwan Motorcycle Database",
         "description": "Comprehensive database of motorcycles available in Taiwan with complete specifications",
-        "last_updated": datetime.now().strftime("%Y-%m-%d"),
-        "total_entries": len(motorcycles),
-        "motorcycles": motorcycles
+        "last_updated": datetime.now().strftime("%Y-%m-%d")
     }
+    if schema >= 2:
+        header["schema_version"] = schema
+    return header
+
+def generate_database(batch=False, workers=1, seed=None, schema=1, brands=None):
+    """Generate the complete motorcycle database"""
+    motorcycles = list(iter_motorcycles(batch, workers, seed, schema, brands))
+    
+    # Create the complete database structure
+    database = database_header(schema)
+    database["total_entries"] = len(motorcycles)
+    database["motorcycles"] = motorcycles
     
     return database
 
 def save_database(database, filename):
-    """Save database to JSON file"""
+    """Save database to JSON file (NDJSON for .ndjson/.jsonl filenames)
+    
+    The statistics cube is written next to it (see stats_cube) and returned.
+    """
     print(f"Saving database to {filename}...")
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(database, f, ensure_ascii=False, indent=2)
+    if is_ndjson(filename):
+        write_ndjson(filename, database['motorcycles'])
+    else:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(database, f, ensure_ascii=False, indent=2)
+    cube = stats_cube.StatsCube().update(database['motorcycles'])
+    cube.save(filename)
     print(f"Successfully saved {len(database['motorcycles'])} motorcycle entries!")
+    return cube
+
+def stream_database(filename, batch=False, workers=1, seed=None, schema=1, brands=None):
+    """Generate the database straight into a JSON file
+    
+    Records are written as they are generated, so memory stays flat
+    regardless of the brand quotas. The statistics cube is collected on the
+    way and written next to the file; returns the cube.
+    """
+    print(f"Streaming database to {filename}...")
+    cube = stats_cube.StatsCube()
+    motorcycles = cube.counted(iter_motorcycles(batch, workers, seed, schema, brands))
+    if is_ndjson(filename):
+        total = write_ndjson(filename, motorcycles)
+    else:
+        total = write_json_stream(filename, database_header(schema), motorcycles)
+    cube.save(filename)
+    print(f"Successfully saved {total} motorcycle entries!")
+    return cube
+
+def update_database(filename, batch=False, workers=1, seed=None, schema=1, brands=None):
+    """Bring an existing database file up to date, regenerating only the changed brands
+    
+    Brands whose quota, seed and settings match the file's manifest are copied
+    from it unchanged (see incremental_generation). Without a seed the
+    manifest's seed is kept. The statistics cube is updated the same way.
+    Returns the update summary and the cube.
+    """
+    if brands is None:
+        brands = BRANDS
+    seed = incremental_generation.resolve_seed(filename, seed, new_seed)
+    previous = stats_cube.load_cube(filename)
+    generated = stats_cube.StatsCube()
+    
+    print(f"Updating {filename} (seed {seed})...")
+    summary = incremental_generation.update_database(
+        filename, database_header(schema), brands, {'seed': seed, 'schema': schema, 'batch': batch},
+        lambda changed: generated.counted(iter_motorcycles(batch, workers, seed, schema, changed)))
+    cube = stats_cube.save_incremental_cube(filename, previous, generated, brands, summary['reused'])
+    print(f"Regenerated {len(summary['generated'])} brand(s), reused {len(summary['reused'])}, "
+          f"removed {len(summary['removed'])} ({summary['mode']})")
+    print(f"Successfully saved {summary['total']} motorcycle entries!")
+    return summary, cube
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Generate the Taiwan motorcycle database")
+    parser.add_argument('--batch', action='store_true',
+                        help="generate each brand with the vectorized NumPy batch engine")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="run seed; the output is identical for any worker count")
+    parser.add_argument('--stream', action='store_true',
+                        help="write records as they are generated instead of building the database in memory")
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                        help="output format: one JSON document or one record per line (default: json)")
+    parser.add_argument('--schema', type=int, choices=SCHEMA_VERSIONS, default=1,
+                        help="record schema; 2 adds raw numeric fields next to the display strings (default: 1)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="update the existing output, regenerating only brands whose quota, seed or schema changed")
+    return parser.parse_args()
 
 def main():
     """Main function"""
+    args = parse_args()
+    output_file = with_format(OUTPUT_FILE, args.format)
+    
     print("Taiwan Motorcycle Database Generator")
     print("=" * 40)
     
-    # Generate the database
-    database = generate_database()
-    
-    # Save to file
-    save_database(database, OUTPUT_FILE)
+    if args.incremental:
+        # Only regenerate the brands whose configuration changed
+        _, cube = update_database(output_file, batch=args.batch, workers=args.workers, seed=args.seed,
+                                  schema=args.schema)
+    elif args.stream:
+        incremental_generation.remove_manifest(output_file)
+        # Generate and save record by record
+        cube = stream_database(output_file, batch=args.batch, workers=args.workers, seed=args.seed,
+                               schema=args.schema)
+    else:
+        incremental_generation.remove_manifest(output_file)
+        # Generate the database
+        database = generate_database(batch=args.batch, workers=args.workers, seed=args.seed, schema=args.schema)
+        
+        # Save to file
+        cube = save_database(database, output_file)
     
     # Print summary
     print("\nDatabase Generation Complete!")
-    print(f"Total entries generated: {database['total_entries']}")
-    print(f"Output file: {OUTPUT_FILE}")
+    print(f"Total entries generated: {cube.total}")
+    print(f"Output file: {output_file}")
     
     # Print brand distribution
     print("\nBrand Distribution:")
-    brand_counts = {}
-    for bike in database['motorcycles']:
-        brand = bike['brand']
-        brand_counts[brand] = brand_counts.get(brand, 0) + 1
-    
-    for brand, count in sorted(brand_counts.items()):
+    for brand, count in sorted(cube.counts('brand').items()):
         print(f"  {brand}: {count}")
 
 if __name__ == "__main__":
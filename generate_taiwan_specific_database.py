@@ -6,14 +6,23 @@ This script generates a comprehensive database of motorcycles specifically for T
 with complete specifications, pricing, and features according to Taiwan requirements.
 """
 
+import argparse
 import json
 import random
 from datetime import datetime
 
+import incremental_generation
+import stats_cube
+from generation_shards import new_seed, run_shards, split_quotas
+from motorcycle_io import is_ndjson, with_format, write_json_stream, write_ndjson
+
 # Configuration
 TARGET_ENTRIES = 2000
 OUTPUT_FILE = 'taiwan_specific_motorcycles.json'
 
+# Record schemas: 1 = display strings only, 2 = display strings plus raw numbers
+SCHEMA_VERSIONS = (1, 2)
+
 # Taiwan motorcycle brands and their market distribution (as per requirements)
 TAIWAN_BRANDS = {
     # Taiwan Local Brands (150-200 entries each)
@@ -147,6 +156,56 @@ FEATURES_BY_TYPE = {
     ]
 }
 
+# Brand premium multipliers for Taiwan market (looked up by the brand name before any "_")
+BRAND_PRICE_MULTIPLIERS = {
+    'SYM': 0.85, 'Kymco': 0.90, 'PGO': 0.88, 'Aeon': 0.82,
+    'Yamaha': 1.15, 'Honda': 1.20, 'Suzuki': 1.05, 'Kawasaki': 1.25,
+    'GOGORO': 1.30, 'PGO_Electric': 0.95, 'Aeon_Electric': 0.90
+}
+
+# Vehicle type price multipliers
+TYPE_PRICE_MULTIPLIERS = {
+    'Urban Scooter': 1.0, 'Sport Scooter': 1.2, 'Maxi Scooter': 1.5,
+    'Classic Scooter': 1.1, 'Naked': 1.3, 'Sport': 1.6, 'Classic': 1.2,
+    'Adventure': 1.4, 'Electric Scooter': 1.3, 'Electric Sport': 1.8,
+    'Electric Commercial': 1.0
+}
+
+# Brand-specific features added to the vehicle type's feature set
+BRAND_FEATURES = {
+    'GOGORO': ['Smart connectivity', 'Battery swapping system', 'Mobile app integration'],
+    'Yamaha': ['VVA technology', 'Blue Core engine', 'Smart key system'],
+    'Honda': ['PGM-FI fuel injection', 'Idling stop system', 'Smart key'],
+    'SYM': ['CBS system', 'LED lighting', 'Anti-theft system'],
+    'Kymco': ['Noodoe connectivity', 'ABS system', 'Sport suspension']
+}
+
+# Seat height ranges in mm by vehicle type
+SEAT_HEIGHT_RANGES = {
+    'Urban Scooter': (760, 780),
+    'Sport Scooter': (770, 790),
+    'Maxi Scooter': (790, 820),
+    'Classic Scooter': (750, 770),
+    'Naked': (800, 830),
+    'Sport': (810, 840),
+    'Classic': (780, 810),
+    'Adventure': (850, 890),
+    'Electric Scooter': (760, 780),
+    'Electric Sport': (770, 800),
+    'Electric Commercial': (760, 780)
+}
+
+# Motor types for electric vehicles
+ELECTRIC_MOTOR_TYPES = [
+    'Permanent magnet synchronous motor',
+    'Brushless DC motor',
+    'AC synchronous motor',
+    'Hub motor'
+]
+
+# Engine type for displacements outside every ENGINE_TYPES range
+DEFAULT_ENGINE_TYPE = '4-stroke, liquid-cooled, single-cylinder'
+
 # Taiwan market pricing structure (NT$)
 PRICE_STRUCTURE = {
     'entry_level': (50000, 100000),     # 入門級 50-100k
@@ -167,139 +226,113 @@ MARKET_CATEGORIES = [
     '復古經典', '豪華舒適', '越野冒險', '長途旅行', '商務用途'
 ]
 
-def calculate_power(displacement, vehicle_type):
-    """Calculate realistic power output for Taiwan motorcycles"""
+def calculate_power(displacement, vehicle_type, rng=random):
+    """Calculate realistic power output for Taiwan motorcycles as (hp, kW)
+    
+    kW is only set for electric motors, which are rated in kW.
+    """
     if vehicle_type.startswith('Electric'):
         # Electric motor power (kW to hp conversion)
-        base_power = random.uniform(3.0, 15.0)  # 3-15 kW range
-        return f"{base_power:.1f} kW ({base_power * 1.34:.1f} hp)"
+        base_power = rng.uniform(3.0, 15.0)  # 3-15 kW range
+        return round(base_power * 1.34, 1), round(base_power, 1)
     
     multiplier = VEHICLE_TYPES[vehicle_type]['power_multiplier']
     base_power = displacement * multiplier
-    variation = random.uniform(0.85, 1.15)
+    variation = rng.uniform(0.85, 1.15)
     power = round(base_power * variation, 1)
-    return f"{power} hp"
+    return power, None
 
-def calculate_torque(displacement, vehicle_type):
-    """Calculate realistic torque output"""
+def calculate_torque(power_hp, vehicle_type, rng=random):
+    """Calculate realistic torque output in Nm from the motorcycle's power"""
     if vehicle_type.startswith('Electric'):
-        base_torque = random.uniform(15.0, 50.0)  # Electric motors have high torque
-        return f"{base_torque:.1f} Nm"
+        base_torque = rng.uniform(15.0, 50.0)  # Electric motors have high torque
+        return round(base_torque, 1)
     
     # Rough torque calculation for gas engines (typically 70-80% of hp in Nm)
-    power_str = calculate_power(displacement, vehicle_type)
-    power_hp = float(power_str.split(' ')[0])
-    torque = round(power_hp * random.uniform(0.7, 0.8) * 1.36, 1)  # Convert to Nm
-    return f"{torque} Nm"
+    torque = round(power_hp * rng.uniform(0.7, 0.8) * 1.36, 1)  # Convert to Nm
+    return torque
 
-def get_engine_type(displacement, vehicle_type):
+def get_engine_type(displacement, vehicle_type, rng=random):
     """Get appropriate engine type"""
     if vehicle_type.startswith('Electric'):
-        return random.choice([
-            'Permanent magnet synchronous motor',
-            'Brushless DC motor', 
-            'AC synchronous motor',
-            'Hub motor'
-        ])
-    
-    for (min_cc, max_cc), engine_types in ENGINE_TYPES.items():
-        if min_cc <= displacement <= max_cc:
-            return random.choice(engine_types)
-    return '4-stroke, liquid-cooled, single-cylinder'
-
-def calculate_taiwan_price(brand, displacement, vehicle_type):
-    """Calculate Taiwan market pricing in NT$"""
+        return rng.choice(ELECTRIC_MOTOR_TYPES)
+    
+    engine_types = GENERATION_PLAN['engine_types']
+    choices = engine_types[displacement] if 0 <= displacement < len(engine_types) else None
+    if choices is None:
+        return DEFAULT_ENGINE_TYPE
+    return rng.choice(choices)
+
+def calculate_taiwan_price(brand, displacement, vehicle_type, rng=random):
+    """Calculate Taiwan market pricing in NT$ as (lower, upper)"""
     if vehicle_type.startswith('Electric'):
         # Electric vehicle pricing
-        base_price = random.uniform(70000, 150000)
+        base_price = rng.uniform(70000, 150000)
         if 'Sport' in vehicle_type:
             base_price *= 1.5
         elif 'Commercial' in vehicle_type:
             base_price *= 0.8
     else:
         # Gas engine pricing
-        base_price = displacement * random.uniform(0.5, 1.2) * 1000
-    
-    # Brand premium multipliers for Taiwan market
-    brand_multipliers = {
-        'SYM': 0.85, 'Kymco': 0.90, 'PGO': 0.88, 'Aeon': 0.82,
-        'Yamaha': 1.15, 'Honda': 1.20, 'Suzuki': 1.05, 'Kawasaki': 1.25,
-        'GOGORO': 1.30, 'PGO_Electric': 0.95, 'Aeon_Electric': 0.90
-    }
-    
-    # Vehicle type multipliers
-    type_multipliers = {
-        'Urban Scooter': 1.0, 'Sport Scooter': 1.2, 'Maxi Scooter': 1.5,
-        'Classic Scooter': 1.1, 'Naked': 1.3, 'Sport': 1.6, 'Classic': 1.2,
-        'Adventure': 1.4, 'Electric Scooter': 1.3, 'Electric Sport': 1.8,
-        'Electric Commercial': 1.0
-    }
+        base_price = displacement * rng.uniform(0.5, 1.2) * 1000
     
-    brand_key = brand.split('_')[0] if '_' in brand else brand
-    brand_mult = brand_multipliers.get(brand_key, 1.0)
-    type_mult = type_multipliers.get(vehicle_type, 1.0)
-    
-    final_price = base_price * brand_mult * type_mult * random.uniform(0.9, 1.1)
+    final_price = base_price * price_multiplier(brand, vehicle_type) * rng.uniform(0.9, 1.1)
     final_price = max(final_price, 45000)  # Minimum price
     
     lower_price = int(final_price * 0.95)
     upper_price = int(final_price * 1.05)
     
-    return f"NT$ {lower_price:,} - {upper_price:,}"
+    return lower_price, upper_price
 
-def get_fuel_efficiency(displacement, vehicle_type):
-    """Calculate fuel efficiency for Taiwan conditions"""
+def get_fuel_efficiency(displacement, vehicle_type, rng=random):
+    """Calculate fuel efficiency for Taiwan conditions as (value, unit)"""
     if vehicle_type.startswith('Electric'):
         # Electric range in km per charge
-        return f"{random.randint(80, 120)} km/charge"
+        return rng.randint(80, 120), 'km/charge'
     
     # Gas motorcycle fuel efficiency (km/L)
     if displacement <= 125:
-        efficiency = random.uniform(45, 60)
+        efficiency = rng.uniform(45, 60)
     elif displacement <= 200:
-        efficiency = random.uniform(35, 50)
+        efficiency = rng.uniform(35, 50)
     elif displacement <= 400:
-        efficiency = random.uniform(25, 40)
+        efficiency = rng.uniform(25, 40)
     else:
-        efficiency = random.uniform(15, 30)
+        efficiency = rng.uniform(15, 30)
     
-    return f"{efficiency:.1f} km/L"
+    return round(efficiency, 1), 'km/L'
 
-def get_weight(displacement, vehicle_type):
-    """Calculate motorcycle weight"""
+def get_weight(displacement, vehicle_type, rng=random):
+    """Calculate motorcycle weight in kg"""
     if vehicle_type.startswith('Electric'):
-        base_weight = random.uniform(80, 120)
+        base_weight = rng.uniform(80, 120)
     else:
-        base_weight = 70 + (displacement * 0.3) + random.uniform(-10, 15)
-        
+        base_weight = 70 + (displacement * 0.3) + rng.uniform(-10, 15)
+    
     if 'Maxi' in vehicle_type or 'Adventure' in vehicle_type:
-        base_weight += random.uniform(20, 40)
+        base_weight += rng.uniform(20, 40)
     elif 'Sport' in vehicle_type:
-        base_weight += random.uniform(10, 25)
-        
-    return f"{int(base_weight)} kg"
-
-def get_seat_height(vehicle_type):
-    """Get seat height based on vehicle type"""
-    height_ranges = {
-        'Urban Scooter': (760, 780),
-        'Sport Scooter': (770, 790), 
-        'Maxi Scooter': (790, 820),
-        'Classic Scooter': (750, 770),
-        'Naked': (800, 830),
-        'Sport': (810, 840),
-        'Classic': (780, 810),
-        'Adventure': (850, 890),
-        'Electric Scooter': (760, 780),
-        'Electric Sport': (770, 800),
-        'Electric Commercial': (760, 780)
-    }
+        base_weight += rng.uniform(10, 25)
     
-    min_height, max_height = height_ranges.get(vehicle_type, (770, 800))
-    height = random.randint(min_height, max_height)
-    return f"{height} mm"
+    return int(base_weight)
+
+def get_seat_height(vehicle_type, rng=random):
+    """Get seat height in mm based on vehicle type"""
+    min_height, max_height = SEAT_HEIGHT_RANGES.get(vehicle_type, (770, 800))
+    height = rng.randint(min_height, max_height)
+    return height
+
+def format_power(power_hp, power_kw=None):
+    """Format power as "9.6 hp", or "5.0 kW (6.7 hp)" for electric motors"""
+    if power_kw is not None:
+        return f"{power_kw:.1f} kW ({power_hp:.1f} hp)"
+    return f"{power_hp} hp"
+
+def format_price_range(lower_price, upper_price):
+    """Format a price range as "NT$ 65,000 - 72,000" """
+    return f"NT$ {lower_price:,} - {upper_price:,}"
 
-def get_availability_status(model_year):
+def get_availability_status(model_year, rng=random):
     """Determine availability status based on model year"""
     current_year = 2024
     year_diff = current_year - model_year
@@ -307,215 +340,407 @@ def get_availability_status(model_year):
     if year_diff <= 1:
         return "Available"
     elif year_diff <= 2:
-        return random.choice(["Available", "Limited Availability"])
+        return rng.choice(["Available", "Limited Availability"])
     elif year_diff <= 4:
-        return random.choice(["Limited Availability", "Discontinued"])
+        return rng.choice(["Limited Availability", "Discontinued"])
     else:
-        return random.choice(["Discontinued", "Used Market Only"])
+        return rng.choice(["Discontinued", "Used Market Only"])
 
-def generate_model_name(brand, vehicle_type):
+def brand_key(brand):
+    """Get the base brand of a quota name ("PGO_Electric" -> "PGO")"""
+    return brand.split('_')[0] if '_' in brand else brand
+
+def record_brand(brand):
+    """Get the brand name records carry for a quota name ("PGO_Electric" -> "PGO Electric")"""
+    return brand.replace('_', ' ')
+
+def feature_pool(brand, vehicle_type):
+    """Get the features to choose from: the type's set plus the brand's extras"""
+    base_features = FEATURES_BY_TYPE.get(vehicle_type, FEATURES_BY_TYPE['Urban Scooter'])
+    extra_features = BRAND_FEATURES.get(brand_key(brand), [])
+    # dict.fromkeys drops duplicates but keeps a stable order, unlike set
+    return list(dict.fromkeys(base_features + extra_features))
+
+def compile_generation_plan():
+    """Precompute the static lookups used for every generated row
+    
+    - engine_types: list indexed by cc with the engine type choices of the
+      first matching ENGINE_TYPES range (None where no range matches)
+    - price_multipliers: (brand, vehicle type) -> brand x type price multiplier
+    - feature_pools: (brand, vehicle type) -> features to choose from
+    """
+    max_cc = max(max_cc for _, max_cc in ENGINE_TYPES)
+    engine_types = [None] * (max_cc + 1)
+    for (min_cc, range_max), choices in reversed(list(ENGINE_TYPES.items())):
+        # Filled in reverse so the first matching range wins, as in a linear scan
+        engine_types[min_cc:range_max + 1] = [tuple(choices)] * (range_max + 1 - min_cc)
+    
+    blocks = [(brand, vehicle_type) for brand in TAIWAN_BRANDS for vehicle_type in VEHICLE_TYPES]
+    return {
+        'engine_types': engine_types,
+        'price_multipliers': {
+            (brand, vehicle_type): BRAND_PRICE_MULTIPLIERS.get(brand_key(brand), 1.0)
+                                   * TYPE_PRICE_MULTIPLIERS.get(vehicle_type, 1.0)
+            for brand, vehicle_type in blocks
+        },
+        'feature_pools': {(brand, vehicle_type): feature_pool(brand, vehicle_type) for brand, vehicle_type in blocks},
+    }
+
+def price_multiplier(brand, vehicle_type):
+    """Get the combined brand and vehicle type price multiplier"""
+    multiplier = GENERATION_PLAN['price_multipliers'].get((brand, vehicle_type))
+    if multiplier is None:
+        multiplier = BRAND_PRICE_MULTIPLIERS.get(brand_key(brand), 1.0) * TYPE_PRICE_MULTIPLIERS.get(vehicle_type, 1.0)
+    return multiplier
+
+def generate_model_name(brand, vehicle_type, rng=random):
     """Generate realistic Taiwan motorcycle model name"""
-    brand_key = brand.split('_')[0] if '_' in brand else brand
+    series_brand = brand_key(brand)
     
-    if brand_key not in TAIWAN_MODEL_SERIES:
-        brand_key = 'SYM'  # Default fallback
-        
-    series_data = TAIWAN_MODEL_SERIES[brand_key]
+    if series_brand not in TAIWAN_MODEL_SERIES:
+        series_brand = 'SYM'  # Default fallback
+    
+    series_data = TAIWAN_MODEL_SERIES[series_brand]
     
     # Choose between Chinese and English names
-    use_chinese = random.choice([True, False])
+    use_chinese = rng.choice([True, False])
     
     if use_chinese:
-        chinese_name = random.choice(series_data['chinese'])
-        english_name = random.choice(series_data['english'])
+        chinese_name = rng.choice(series_data['chinese'])
+        english_name = rng.choice(series_data['english'])
         model_name = chinese_name
         model_english = english_name
     else:
-        model_name = random.choice(series_data['series'])
+        model_name = rng.choice(series_data['series'])
         model_english = model_name
     
     # Add displacement or series number
     if vehicle_type.startswith('Electric'):
-        model_name += f" {random.choice(['E', 'Electric', 'EV', 'Plus', 'Pro'])}"
+        model_name += f" {rng.choice(['E', 'Electric', 'EV', 'Plus', 'Pro'])}"
     else:
-        displacement = random.randint(50, 650)
-        if random.choice([True, False]):
+        displacement = rng.randint(50, 650)
+        if rng.choice([True, False]):
             model_name += f" {displacement}"
     
     return model_name, model_english
 
-def generate_features(vehicle_type, brand):
+def generate_features(vehicle_type, brand, rng=random):
     """Generate appropriate features for the motorcycle"""
-    base_features = FEATURES_BY_TYPE.get(vehicle_type, FEATURES_BY_TYPE['Urban Scooter'])
-    
-    # Add brand-specific features
-    brand_features = {
-        'GOGORO': ['Smart connectivity', 'Battery swapping system', 'Mobile app integration'],
-        'Yamaha': ['VVA technology', 'Blue Core engine', 'Smart key system'],
-        'Honda': ['PGM-FI fuel injection', 'Idling stop system', 'Smart key'],
-        'SYM': ['CBS system', 'LED lighting', 'Anti-theft system'],
-        'Kymco': ['Noodoe connectivity', 'ABS system', 'Sport suspension']
-    }
-    
-    brand_key = brand.split('_')[0] if '_' in brand else brand
-    extra_features = brand_features.get(brand_key, [])
-    
-    # Combine and randomize features
-    all_features = list(set(base_features + extra_features))
-    num_features = random.randint(4, 7)
-    selected_features = random.sample(all_features, min(num_features, len(all_features)))
+    all_features = GENERATION_PLAN['feature_pools'].get((brand, vehicle_type))
+    if all_features is None:
+        all_features = feature_pool(brand, vehicle_type)
+    num_features = rng.randint(4, 7)
+    selected_features = rng.sample(all_features, min(num_features, len(all_features)))
     
     return selected_features
 
-def generate_motorcycle(brand, vehicle_type):
-    """Generate a single Taiwan motorcycle entry"""
-    # Generate displacement
+# Built once per process; the per-row helpers above only index into it
+GENERATION_PLAN = compile_generation_plan()
+
+def derive_specs(brand, vehicle_type, rng=random):
+    """Draw the numeric specifications of one motorcycle
+    
+    Each value is computed once and later values build on earlier ones
+    (torque on the stored power), so the record's specs are consistent.
+    displacement_cc is None for electric motors.
+    """
     if vehicle_type.startswith('Electric'):
-        displacement_cc = "Electric Motor"
-        displacement_num = 0
+        displacement = None
     else:
         min_disp, max_disp = VEHICLE_TYPES[vehicle_type]['displacement_range']
-        displacement_num = random.randint(min_disp, max_disp)
-        displacement_cc = f"{displacement_num}cc"
+        displacement = rng.randint(min_disp, max_disp)
+    
+    engine_type = get_engine_type(displacement, vehicle_type, rng)
+    power_hp, power_kw = calculate_power(displacement, vehicle_type, rng)
+    torque_nm = calculate_torque(power_hp, vehicle_type, rng)
+    price_min, price_max = calculate_taiwan_price(brand, displacement, vehicle_type, rng)
+    efficiency, efficiency_unit = get_fuel_efficiency(displacement, vehicle_type, rng)
+    
+    return {
+        'displacement_cc': displacement,
+        'engine_type': engine_type,
+        'power_hp': power_hp,
+        'power_kw': power_kw,
+        'torque_nm': torque_nm,
+        'price_min': price_min,
+        'price_max': price_max,
+        'fuel_efficiency_km_l': efficiency if efficiency_unit == 'km/L' else None,
+        'range_km': efficiency if efficiency_unit == 'km/charge' else None,
+        'efficiency': f"{efficiency} {efficiency_unit}",
+        'weight_kg': get_weight(displacement, vehicle_type, rng),
+        'seat_height_mm': get_seat_height(vehicle_type, rng),
+    }
+
+def generate_motorcycle(brand, vehicle_type, rng=random, schema=1):
+    """Generate a single Taiwan motorcycle entry
+    
+    The numeric specs come from derive_specs() and the display strings are
+    formatted from them. Schema 2 also stores those numbers (displacement_cc,
+    power_hp, price_min, weight_kg, ...) and an int model_year.
+    """
+    specs = derive_specs(brand, vehicle_type, rng)
+    displacement = specs['displacement_cc']
     
     # Generate model information
-    model_name, model_english = generate_model_name(brand, vehicle_type)
-    model_year = random.randint(2020, 2025)
-    
-    # Generate engine specifications
-    engine_type = get_engine_type(displacement_num, vehicle_type)
-    power = calculate_power(displacement_num, vehicle_type)
-    torque = calculate_torque(displacement_num, vehicle_type)
-    
-    # Generate features and pricing
-    features = generate_features(vehicle_type, brand)
-    price_range = calculate_taiwan_price(brand, displacement_num, vehicle_type)
-    fuel_efficiency = get_fuel_efficiency(displacement_num, vehicle_type)
-    weight = get_weight(displacement_num, vehicle_type)
-    seat_height = get_seat_height(vehicle_type)
-    availability = get_availability_status(model_year)
+    model_name, model_english = generate_model_name(brand, vehicle_type, rng)
+    model_year = rng.randint(2020, 2025)
+    features = generate_features(vehicle_type, brand, rng)
+    availability = get_availability_status(model_year, rng)
     
     # Assign category and target audience
-    category = random.choice(MARKET_CATEGORIES)
-    target_audience = random.choice(TARGET_AUDIENCES)
+    category = rng.choice(MARKET_CATEGORIES)
+    target_audience = rng.choice(TARGET_AUDIENCES)
     
     # Build the motorcycle entry with all required fields
     motorcycle = {
-        "brand": brand.replace('_', ' '),
+        "brand": record_brand(brand),
         "model": model_name,
         "model_english": model_english,
-        "model_year": str(model_year),
+        "model_year": str(model_year) if schema < 2 else model_year,
         "type": vehicle_type,
         "engine": {
-            "displacement": displacement_cc,
-            "type": engine_type,
-            "power": power,
-            "torque": torque
+            "displacement": "Electric Motor" if displacement is None else f"{displacement}cc",
+            "type": specs['engine_type'],
+            "power": format_power(specs['power_hp'], specs['power_kw']),
+            "torque": f"{specs['torque_nm']} Nm"
         },
         "features": features,
-        "price_range": price_range,
-        "fuel_efficiency": fuel_efficiency,
-        "weight": weight,
-        "seat_height": seat_height,
+        "price_range": format_price_range(specs['price_min'], specs['price_max']),
+        "fuel_efficiency": specs['efficiency'],
+        "weight": f"{specs['weight_kg']} kg",
+        "seat_height": f"{specs['seat_height_mm']} mm",
         "availability": availability,
         "category": category,
         "target_audience": target_audience
     }
     
+    if schema >= 2:
+        motorcycle["engine"].update({
+            "displacement_cc": displacement,
+            "power_hp": specs['power_hp'],
+            "power_kw": specs['power_kw'],
+            "torque_nm": specs['torque_nm']
+        })
+        motorcycle.update({
+            "price_min": specs['price_min'],
+            "price_max": specs['price_max'],
+            "fuel_efficiency_km_l": specs['fuel_efficiency_km_l'],
+            "range_km": specs['range_km'],
+            "weight_kg": specs['weight_kg'],
+            "seat_height_mm": specs['seat_height_mm']
+        })
+    
     return motorcycle
 
-def generate_taiwan_database():
-    """Generate the complete Taiwan motorcycle database"""
+def get_vehicle_type_choices(brand):
+    """Get the vehicle types a brand builds"""
+    if brand in ['SYM', 'Kymco', 'PGO']:
+        # Taiwan brands focus on scooters
+        return [
+            'Urban Scooter', 'Sport Scooter', 'Maxi Scooter', 'Classic Scooter'
+        ]
+    elif brand in ['Yamaha', 'Honda']:
+        # Japanese brands have diverse portfolios
+        return [
+            'Urban Scooter', 'Sport Scooter', 'Maxi Scooter', 'Naked', 'Sport', 'Classic'
+        ]
+    elif brand in ['GOGORO', 'PGO_Electric', 'Aeon_Electric']:
+        # Electric brands
+        return [
+            'Electric Scooter', 'Electric Sport', 'Electric Commercial'
+        ]
+    else:
+        # Other brands
+        return [
+            'Urban Scooter', 'Sport Scooter', 'Naked', 'Sport', 'Classic'
+        ]
+
+def generate_brand(brand, count, rng=random, schema=1):
+    """Generate count entries for a brand"""
+    vehicle_types = get_vehicle_type_choices(brand)
     motorcycles = []
+    for i in range(count):
+        # Choose vehicle type based on brand characteristics
+        vehicle_type = rng.choice(vehicle_types)
+        motorcycles.append(generate_motorcycle(brand, vehicle_type, rng, schema))
+    
+    return motorcycles
+
+def generate_shard(shard):
+    """Generate one (brand, count, seed, schema) shard with its own RNG"""
+    brand, count, seed, schema = shard
+    return generate_brand(brand, count, random.Random(seed), schema)
+
+def iter_motorcycles(workers=1, seed=None, schema=1, brands=None):
+    """Yield every Taiwan motorcycle entry, one shard at a time
+    
+    The brand quotas (TAIWAN_BRANDS unless given) are split into shards (see generation_shards) that
+    each get an independent RNG derived from seed, so the same seed gives the
+    same records for any number of workers.
+    """
+    if seed is None:
+        seed = new_seed()
+    if brands is None:
+        brands = TAIWAN_BRANDS
     
     print("Generating Taiwan Specific Motorcycle Database...")
-    print(f"Target entries: {TARGET_ENTRIES}")
+    print(f"Target entries: {sum(brands.values())} (seed {seed}, {workers} worker(s))")
     
-    for brand, target_count in TAIWAN_BRANDS.items():
+    for brand, target_count in brands.items():
         print(f"Generating {target_count} entries for {brand}...")
-        
-        for i in range(target_count):
-            # Choose vehicle type based on brand characteristics
-            if brand in ['SYM', 'Kymco', 'PGO']:
-                # Taiwan brands focus on scooters
-                vehicle_type = random.choice([
-                    'Urban Scooter', 'Sport Scooter', 'Maxi Scooter', 'Classic Scooter'
-                ])
-            elif brand in ['Yamaha', 'Honda']:
-                # Japanese brands have diverse portfolios
-                vehicle_type = random.choice([
-                    'Urban Scooter', 'Sport Scooter', 'Maxi Scooter', 'Naked', 'Sport', 'Classic'
-                ])
-            elif brand in ['GOGORO', 'PGO_Electric', 'Aeon_Electric']:
-                # Electric brands
-                vehicle_type = random.choice([
-                    'Electric Scooter', 'Electric Sport', 'Electric Commercial'
-                ])
-            else:
-                # Other brands
-                vehicle_type = random.choice([
-                    'Urban Scooter', 'Sport Scooter', 'Naked', 'Sport', 'Classic'
-                ])
-            
-            motorcycle = generate_motorcycle(brand, vehicle_type)
-            motorcycles.append(motorcycle)
     
-    # Create the complete database structure
-    database = {
+    shards = [shard + (schema,) for shard in split_quotas(brands, seed)]
+    for records in run_shards(generate_shard, shards, workers):
+        yield from records
+
+def database_header(schema=1):
+    """Get the database fields that precede total_entries and the records"""
+    header = {
         "title": "Taiwan Specific Motorcycle Database",
         "description": "Comprehensive database of motorcycles specifically for Taiwan market with complete specifications",
-        "last_updated": datetime.now().strftime("%Y-%m-%d"),
-        "total_entries": len(motorcycles),
-        "motorcycles": motorcycles
+        "last_updated": datetime.now().strftime("%Y-%m-%d")
     }
+    if schema >= 2:
+        header["schema_version"] = schema
+    return header
+
+def generate_taiwan_database(workers=1, seed=None, schema=1, brands=None):
+    """Generate the complete Taiwan motorcycle database"""
+    motorcycles = list(iter_motorcycles(workers, seed, schema, brands))
+    
+    # Create the complete database structure
+    database = database_header(schema)
+    database["total_entries"] = len(motorcycles)
+    database["motorcycles"] = motorcycles
     
     return database
 
 def save_database(database, filename):
-    """Save database to JSON file with proper formatting"""
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(database, f, ensure_ascii=False, indent=2)
+    """Save database to JSON file with proper formatting (NDJSON for .ndjson/.jsonl filenames)
+    
+    The statistics cube is written next to it (see stats_cube) and returned.
+    """
+    if is_ndjson(filename):
+        write_ndjson(filename, database['motorcycles'])
+    else:
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(database, f, ensure_ascii=False, indent=2)
+    cube = stats_cube.StatsCube().update(database['motorcycles'])
+    cube.save(filename)
     
     print(f"\nDatabase saved to {filename}")
     print(f"Total entries: {database['total_entries']}")
+    return cube
+
+def stream_database(filename, workers=1, seed=None, schema=1, brands=None):
+    """Generate the database straight into a JSON file
+    
+    Records are written as they are generated, so memory stays flat
+    regardless of the brand quotas. The statistics cube is collected on the
+    way and written next to the file; returns the cube.
+    """
+    cube = stats_cube.StatsCube()
+    motorcycles = cube.counted(iter_motorcycles(workers, seed, schema, brands))
+    if is_ndjson(filename):
+        total = write_ndjson(filename, motorcycles)
+    else:
+        total = write_json_stream(filename, database_header(schema), motorcycles)
+    cube.save(filename)
+    
+    print(f"\nDatabase saved to {filename}")
+    print(f"Total entries: {total}")
+    return cube
+
+def update_database(filename, workers=1, seed=None, schema=1, brands=None):
+    """Bring an existing database file up to date, regenerating only the changed brands
+    
+    Brands whose quota, seed and settings match the file's manifest are copied
+    from it unchanged (see incremental_generation). Without a seed the
+    manifest's seed is kept. The statistics cube is updated the same way.
+    Returns the update summary and the cube.
+    """
+    if brands is None:
+        brands = TAIWAN_BRANDS
+    seed = incremental_generation.resolve_seed(filename, seed, new_seed)
+    previous = stats_cube.load_cube(filename)
+    generated = stats_cube.StatsCube()
+    
+    print(f"Updating {filename} (seed {seed})...")
+    summary = incremental_generation.update_database(
+        filename, database_header(schema), brands, {'seed': seed, 'schema': schema},
+        lambda changed: generated.counted(iter_motorcycles(workers, seed, schema, changed)))
+    cube = stats_cube.save_incremental_cube(filename, previous, generated, brands, summary['reused'],
+                                            record_brand)
+    print(f"Regenerated {len(summary['generated'])} brand(s), reused {len(summary['reused'])}, "
+          f"removed {len(summary['removed'])} ({summary['mode']})")
+    
+    print(f"\nDatabase saved to {filename}")
+    print(f"Total entries: {summary['total']}")
+    return summary, cube
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Generate the Taiwan specific motorcycle database")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="run seed; the output is identical for any worker count")
+    parser.add_argument('--stream', action='store_true',
+                        help="write records as they are generated instead of building the database in memory")
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                        help="output format: one JSON document or one record per line (default: json)")
+    parser.add_argument('--schema', type=int, choices=SCHEMA_VERSIONS, default=1,
+                        help="record schema; 2 adds raw numeric fields next to the display strings (default: 1)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="update the existing output, regenerating only brands whose quota, seed or schema changed")
+    return parser.parse_args()
 
 def main():
     """Main function"""
-    print("Taiwan Motorcycle Database Generator Starting...")
+    args = parse_args()
+    output_file = with_format(OUTPUT_FILE, args.format)
     
-    # Generate the database
-    database = generate_taiwan_database()
+    print("Taiwan Motorcycle Database Generator Starting...")
     
-    # Save to file
-    save_database(database, OUTPUT_FILE)
+    if args.incremental:
+        # Only regenerate the brands whose configuration changed
+        _, cube = update_database(output_file, workers=args.workers, seed=args.seed, schema=args.schema)
+    elif args.stream:
+        incremental_generation.remove_manifest(output_file)
+        # Generate and save record by record
+        cube = stream_database(output_file, workers=args.workers, seed=args.seed, schema=args.schema)
+    else:
+        incremental_generation.remove_manifest(output_file)
+        # Generate the database
+        database = generate_taiwan_database(workers=args.workers, seed=args.seed, schema=args.schema)
+        
+        # Save to file
+        cube = save_database(database, output_file)
     
     # Print summary statistics
-    motorcycles = database['motorcycles']
-    
     print(f"\n=== Generation Summary ===")
-    print(f"Total motorcycles generated: {len(motorcycles)}")
+    print(f"Total motorcycles generated: {cube.total}")
     
     # Brand distribution
-    from collections import Counter
-    brands = Counter(m['brand'] for m in motorcycles)
+    brands = cube.counts('brand')
     print(f"\nBrand Distribution:")
     for brand, count in brands.most_common():
         print(f"  {brand}: {count} models")
     
     # Vehicle type distribution
-    types = Counter(m['type'] for m in motorcycles)
+    types = cube.counts('type')
     print(f"\nVehicle Type Distribution:")
     for vtype, count in types.most_common():
         print(f"  {vtype}: {count} models")
     
     # Year distribution
-    years = Counter(m['model_year'] for m in motorcycles)
+    years = cube.counts('model_year')
     print(f"\nModel Year Distribution:")
     for year, count in sorted(years.items()):
         print(f"  {year}: {count} models")
     
     print(f"\n✅ Taiwan motorcycle database successfully generated!")
-    print(f"📄 Saved to: {OUTPUT_FILE}")
+    print(f"📄 Saved to: {output_file}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Sharded Generation Helpers
+
+Shared by generate_motorcycle_database.py and generate_taiwan_specific_database.py
+to split brand quotas into fixed-size shards, give every shard its own seed and
+run the shards across a process pool while keeping the output order stable.
+"""
+
+import hashlib
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Entries per shard. Shards never depend on the worker count, so a given seed
+# produces the same records whether they are generated on one core or many.
+SHARD_SIZE = 5000
+
+def new_seed():
+    """Pick a fresh run seed when none was given"""
+    return random.SystemRandom().randrange(2 ** 32)
+
+def shard_seed(seed, brand, index):
+    """Derive the independent seed of one shard from the run seed"""
+    digest = hashlib.sha256(f"{seed}:{brand}:{index}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+def split_quotas(brands, seed, shard_size=SHARD_SIZE):
+    """Split {brand: count} quotas into (brand, count, shard_seed) shards"""
+    shards = []
+    for brand, target_count in brands.items():
+        for index, start in enumerate(range(0, target_count, shard_size)):
+            count = min(shard_size, target_count - start)
+            shards.append((brand, count, shard_seed(seed, brand, index)))
+    return shards
+
+def scale_quotas(brands, total):
+    """Scale {brand: count} quotas to add up to total, keeping their proportions
+    
+    Uses the largest remainder method, so scaling to the current sum returns
+    the quotas unchanged.
+    """
+    quota_sum = sum(brands.values())
+    exact = {brand: count * total / quota_sum for brand, count in brands.items()}
+    scaled = {brand: int(value) for brand, value in exact.items()}
+    remaining = total - sum(scaled.values())
+    by_remainder = sorted(brands, key=lambda brand: exact[brand] - scaled[brand], reverse=True)
+    for brand in by_remainder[:remaining]:
+        scaled[brand] += 1
+    return scaled
+
+def run_shards(generate_shard, shards, workers=1):
+    """Yield the result of generate_shard for every shard, in shard order
+    
+    With workers > 1 the shards run in a process pool; only a bounded window
+    of shards is in flight so finished results do not pile up in memory.
+    """
+    if workers <= 1:
+        for shard in shards:
+            yield generate_shard(shard)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for shard in shards:
+            pending.append(executor.submit(generate_shard, shard))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
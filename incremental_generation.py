@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Incremental Database Regeneration
+
+Shared by generate_motorcycle_database.py and generate_taiwan_specific_database.py
+to rebuild only the parts of an existing database whose configuration changed.
+
+The output is made of one block per brand quota. Every shard seed is derived
+from (run seed, brand, shard index) (see generation_shards), so a brand's
+records only depend on its own quota, the run seed and the generator settings
+(schema version, batch engine). A manifest next to the output
+(<output>.manifest.json) records that configuration and the byte range of
+every block. On rerun:
+
+- unchanged blocks are copied byte for byte from the old file
+- blocks whose quota, seed or settings changed are regenerated
+- blocks of brands no longer in the quotas are dropped
+- new brands at the end of the quotas are appended in place when every
+  earlier block is unchanged, without rewriting the rest of the file
+
+The result is identical to a full --stream run with the same quotas and seed.
+"""
+
+import json
+import os
+from itertools import islice
+
+from motorcycle_io import (TOTAL_ENTRIES_WIDTH, is_ndjson, json_header_text, json_record_text,
+                           ndjson_record_text)
+
+MANIFEST_SUFFIX = '.manifest.json'
+MANIFEST_VERSION = 1
+
+# Bytes copied per read when splicing unchanged blocks
+COPY_SIZE = 1 << 20
+
+def manifest_path(filename):
+    """Get the manifest filename of a database file"""
+    return filename + MANIFEST_SUFFIX
+
+def load_manifest(filename):
+    """Load the manifest of a database file
+    
+    Returns None when there is no manifest, or when it does not describe the
+    file as it is on disk (missing, other format or edited since).
+    """
+    try:
+        with open(manifest_path(filename), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    
+    if manifest.get('version') != MANIFEST_VERSION or manifest.get('ndjson') != is_ndjson(filename):
+        return None
+    if not os.path.exists(filename) or os.path.getsize(filename) != manifest.get('size'):
+        return None
+    return manifest
+
+def save_manifest(filename, manifest):
+    """Write the manifest of a database file"""
+    manifest['size'] = os.path.getsize(filename)
+    with open(manifest_path(filename), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+def remove_manifest(filename):
+    """Drop the manifest of a database file that is about to be rewritten in full"""
+    if os.path.exists(manifest_path(filename)):
+        os.remove(manifest_path(filename))
+
+def resolve_seed(filename, seed, new_seed):
+    """Get the run seed: the given one, else the existing manifest's, else new_seed()
+    
+    Keeping the manifest's seed is what lets a rerun without --seed reuse blocks.
+    """
+    if seed is not None:
+        return seed
+    manifest = load_manifest(filename)
+    if manifest and manifest['blocks']:
+        return manifest['blocks'][0]['seed']
+    return new_seed()
+
+def block_config(block):
+    """Get the fields of a block that decide its records (everything but its location)"""
+    return {key: value for key, value in block.items() if key not in ('start', 'end')}
+
+class BlockWriter:
+    """Writes blocks of records to a binary database file, tracking their byte ranges
+    
+    The layout matches motorcycle_io.write_json_stream and write_ndjson, so a
+    block copied from an old file and a freshly generated one are joined
+    exactly as one write would have joined them.
+    """
+    
+    def __init__(self, f, ndjson, count=0):
+        self.f = f
+        self.ndjson = ndjson
+        self.count = count
+    
+    def start_json(self, header):
+        """Write the JSON header and open the motorcycles array; returns the layout offsets"""
+        self.f.write(json_header_text(header).encode('utf-8'))
+        total_entries_offset = self.f.tell()
+        self.f.write((' ' * TOTAL_ENTRIES_WIDTH + '\n  "motorcycles": [').encode('utf-8'))
+        return {'total_entries_offset': total_entries_offset, 'records_start': self.f.tell()}
+    
+    def separator(self):
+        """Write what precedes the next JSON record"""
+        if not self.ndjson:
+            self.f.write(b',\n    ' if self.count else b'\n    ')
+    
+    def write_records(self, motorcycles):
+        """Write generated records as one block; returns its (start, end) offsets"""
+        start = None
+        for motorcycle in motorcycles:
+            if self.ndjson:
+                text = ndjson_record_text(motorcycle) + '\n'
+            else:
+                self.separator()
+                text = json_record_text(motorcycle)
+            if start is None:
+                start = self.f.tell()
+            self.f.write(text.encode('utf-8'))
+            self.count += 1
+        if start is None:
+            start = self.f.tell()
+        return start, self.f.tell()
+    
+    def copy_block(self, source, block):
+        """Copy an unchanged block from the old file; returns its new (start, end) offsets"""
+        if block['quota']:
+            self.separator()
+        start = self.f.tell()
+        source.seek(block['start'])
+        remaining = block['end'] - block['start']
+        while remaining:
+            chunk = source.read(min(COPY_SIZE, remaining))
+            if not chunk:
+                raise ValueError("database file is shorter than its manifest")
+            self.f.write(chunk)
+            remaining -= len(chunk)
+        self.count += block['quota']
+        return start, self.f.tell()
+    
+    def finish_json(self, total_entries_offset):
+        """Close the motorcycles array and patch total_entries"""
+        self.f.write(b'\n  ]\n}' if self.count else b']\n}')
+        self.f.truncate()
+        self.f.seek(total_entries_offset)
+        self.f.write(f"{self.count},".ljust(TOTAL_ENTRIES_WIDTH).encode('utf-8'))
+
+def plan_blocks(manifest, brands, settings):
+    """Compare the requested blocks with the manifest
+    
+    Returns (blocks, reusable, append) where blocks are the requested block
+    configs in output order, reusable maps brands to their unchanged old
+    blocks and append is True when the old blocks are an unchanged prefix.
+    """
+    blocks = [{'brand': brand, 'quota': quota, **settings} for brand, quota in brands.items()]
+    old_blocks = manifest['blocks'] if manifest else []
+    old_by_brand = {block['brand']: block for block in old_blocks}
+    
+    reusable = {}
+    for block in blocks:
+        old = old_by_brand.get(block['brand'])
+        if old is not None and block_config(old) == block:
+            reusable[block['brand']] = old
+    
+    append = manifest is not None and len(old_blocks) <= len(blocks) and all(
+        old['brand'] == block['brand'] and old['brand'] in reusable
+        for old, block in zip(old_blocks, blocks))
+    return blocks, reusable, append
+
+def update_database(filename, header, brands, settings, generate):
+    """Bring a database file up to date with the brand quotas, regenerating only what changed
+    
+    settings holds the generator configuration shared by every block (at
+    least seed and schema). generate(brands) must yield the records of the
+    given {brand: count} quotas in order, the same way a full run would.
+    Returns a summary dict with the mode and the generated, reused and
+    removed brands.
+    """
+    ndjson = is_ndjson(filename)
+    manifest = load_manifest(filename)
+    blocks, reusable, append = plan_blocks(manifest, brands, settings)
+    
+    changed = {block['brand']: block['quota'] for block in blocks if block['brand'] not in reusable}
+    summary = {
+        'generated': list(changed),
+        'reused': list(reusable),
+        'removed': [old['brand'] for old in manifest['blocks'] if old['brand'] not in brands] if manifest else [],
+    }
+    
+    if append and not changed and len(manifest['blocks']) == len(blocks):
+        summary.update(mode='unchanged', total=manifest['total_entries'])
+        return summary
+    
+    records = iter(generate(changed)) if changed else iter(())
+    
+    if append:
+        # Only new brands at the end: extend the file in place
+        summary['mode'] = 'append'
+        old_blocks = manifest['blocks']
+        with open(filename, 'r+b') as f:
+            f.seek(old_blocks[-1]['end'] if old_blocks else manifest.get('records_start', 0))
+            if ndjson:
+                f.truncate()
+            writer = BlockWriter(f, ndjson, count=manifest['total_entries'])
+            for block in blocks[len(old_blocks):]:
+                block['start'], block['end'] = writer.write_records(islice(records, block['quota']))
+            if not ndjson:
+                writer.finish_json(manifest['total_entries_offset'])
+        blocks[:len(old_blocks)] = old_blocks
+        layout = {key: manifest[key] for key in ('total_entries_offset', 'records_start') if key in manifest}
+    else:
+        # Write a new file from copied and regenerated blocks, then swap it in
+        summary['mode'] = 'splice' if reusable else 'full'
+        temporary = filename + '.tmp'
+        source = open(filename, 'rb') if reusable else None
+        try:
+            with open(temporary, 'w+b') as f:
+                writer = BlockWriter(f, ndjson)
+                layout = {} if ndjson else writer.start_json(header)
+                for block in blocks:
+                    if block['brand'] in reusable:
+                        block['start'], block['end'] = writer.copy_block(source, reusable[block['brand']])
+                    else:
+                        block['start'], block['end'] = writer.write_records(islice(records, block['quota']))
+                if not ndjson:
+                    writer.finish_json(layout['total_entries_offset'])
+        finally:
+            if source is not None:
+                source.close()
+        os.replace(temporary, filename)
+    
+    summary['total'] = writer.count
+    save_manifest(filename, {
+        'version': MANIFEST_VERSION,
+        'ndjson': ndjson,
+        'total_entries': writer.count,
+        **layout,
+        'blocks': blocks,
+    })
+    return summary
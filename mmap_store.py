@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Motorcycle Database
+
+Writes a motorcycle database (JSON or NDJSON) to a read-only directory layout
+that any number of processes can open with mmap:
+- meta.json: header fields, row count, category tables and feature vocabulary
+- <column>.npy: fixed-width numeric and categorical code columns (see columnar_store)
+- <table>.bin + <table>_offsets.npy: UTF-8 string tables addressed by row
+
+Opening the directory parses nothing and copies nothing; every process shares
+the same page-cache pages, so per-worker memory and startup time stay constant
+as the dataset grows.
+
+Usage:
+    python3 mmap_store.py taiwan_specific_motorcycles.json taiwan_mmap/
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from columnar_store import CATEGORICAL_COLUMNS, build_columns
+from motorcycle_io import iter_records, read_header
+
+META_FILE = 'meta.json'
+
+# Per-row string tables: "model" for display, "records" holds each full record as JSON
+STRING_TABLES = ['model', 'records']
+
+def string_values(m):
+    """Get the value of every string table for one record"""
+    return {
+        'model': m['model'],
+        'records': json.dumps(m, ensure_ascii=False, separators=(',', ':')),
+    }
+
+def export_mmap(source, directory):
+    """Export a database file to a memory-mappable directory
+    
+    Records are streamed from the file: each one is appended to the string
+    tables as it is read, and only its parsed column values are kept, so the
+    whole database is never held in memory. Returns the number of records
+    exported.
+    """
+    os.makedirs(directory, exist_ok=True)
+    header = read_header(source)
+    
+    # String tables: one UTF-8 blob per table, appended to, plus the int64 row offsets
+    blobs = {name: open(os.path.join(directory, f'{name}.bin'), 'wb') for name in STRING_TABLES}
+    offsets = {name: [0] for name in STRING_TABLES}
+    
+    def appended(motorcycles):
+        """Yield records unchanged after appending them to the string tables"""
+        for m in motorcycles:
+            for name, value in string_values(m).items():
+                data = value.encode('utf-8')
+                blobs[name].write(data)
+                offsets[name].append(offsets[name][-1] + len(data))
+            yield m
+    
+    try:
+        columns = build_columns(appended(iter_records(source)))
+    finally:
+        for blob in blobs.values():
+            blob.close()
+    for name in STRING_TABLES:
+        np.save(os.path.join(directory, f'{name}_offsets.npy'), np.array(offsets[name], dtype=np.int64))
+    count = len(offsets['model']) - 1
+    
+    meta = {
+        'header': header,
+        'count': count,
+        'categories': {name: columns.pop(f'{name}_categories').tolist() for name in CATEGORICAL_COLUMNS},
+        'feature_vocabulary': columns.pop('feature_vocabulary').tolist(),
+        'columns': sorted(columns),
+    }
+    for name, values in columns.items():
+        np.save(os.path.join(directory, f'{name}.npy'), values)
+    
+    with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    
+    return count
+
+class MmapDatabase:
+    """Read-only motorcycle database backed by memory-mapped files
+    
+    Filter methods mirror filter_by_brand/type/displacement/price_range from
+    example_usage.py and taiwan_specific_usage.py but return arrays of row
+    numbers. Pass rows= to chain filters, and use records() to materialize
+    the matching motorcycles.
+    """
+    
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.header = meta['header']
+        self.count = meta['count']
+        self.categories = meta['categories']
+        self.feature_vocabulary = meta['feature_vocabulary']
+        self.columns = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+            for name in meta['columns']
+        }
+        self.strings = {}
+        for name in STRING_TABLES:
+            path = os.path.join(directory, f'{name}.bin')
+            blob = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else np.zeros(0, np.uint8)
+            offsets = np.load(os.path.join(directory, f'{name}_offsets.npy'), mmap_mode='r')
+            self.strings[name] = (blob, offsets)
+    
+    def __len__(self):
+        return self.count
+    
+    def _rows(self, rows):
+        """Get the candidate row numbers (all rows when rows is None)"""
+        return np.arange(self.count) if rows is None else np.asarray(rows)
+    
+    def string(self, table, row):
+        """Get one value from a string table"""
+        blob, offsets = self.strings[table]
+        return bytes(blob[offsets[row]:offsets[row + 1]]).decode('utf-8')
+    
+    def record(self, row):
+        """Get one motorcycle record as a dict"""
+        return json.loads(self.string('records', row))
+    
+    def records(self, rows):
+        """Yield the motorcycle records for the given row numbers"""
+        for row in rows:
+            yield self.record(int(row))
+    
+    def filter_by_brand(self, brand, rows=None):
+        """Filter rows by brand (case-insensitive)"""
+        rows = self._rows(rows)
+        codes = [i for i, name in enumerate(self.categories['brand']) if name.lower() == brand.lower()]
+        return rows[np.isin(self.columns['brand'][rows], codes)]
+    
+    def filter_by_type(self, vehicle_type, rows=None):
+        """Filter rows by vehicle type (case-insensitive substring match)"""
+        rows = self._rows(rows)
+        codes = [i for i, name in enumerate(self.categories['type']) if vehicle_type.lower() in name.lower()]
+        return rows[np.isin(self.columns['type'][rows], codes)]
+    
+    def filter_by_displacement(self, min_cc=None, max_cc=None, rows=None):
+        """Filter rows by displacement; electric motors only match without max_cc"""
+        rows = self._rows(rows)
+        cc = self.columns['displacement_cc'][rows]
+        electric = cc < 0
+        keep = ~electric
+        if min_cc is not None:
+            keep &= cc >= min_cc
+        if max_cc is not None:
+            keep &= cc <= max_cc
+        if max_cc is None:
+            keep |= electric
+        return rows[keep]
+    
+    def filter_by_price_range(self, max_price, rows=None):
+        """Filter rows by maximum (lower bound) price"""
+        rows = self._rows(rows)
+        return rows[self.columns['price_min'][rows] <= max_price]
+
+def main():
+    """Export a database to the memory-mapped layout and run a sample query"""
+    parser = argparse.ArgumentParser(description="Export a motorcycle database to a memory-mapped directory")
+    parser.add_argument('source', help="database file (.json or .ndjson)")
+    parser.add_argument('directory', help="output directory")
+    args = parser.parse_args()
+    
+    count = export_mmap(args.source, args.directory)
+    print(f"Exported {count} motorcycles to {args.directory}")
+    
+    db = MmapDatabase(args.directory)
+    rows = db.filter_by_price_range(100000, db.filter_by_displacement(max_cc=150))
+    print(f"Motorcycles 150cc and under below NT$ 100,000: {len(rows)}")
+    for bike in db.records(rows[:5]):
+        print(f"  {bike['brand']} {bike['model']} - {bike['price_range']}")
+
+if __name__ == "__main__":
+    main()
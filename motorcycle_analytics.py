@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Single-Pass Motorcycle Analytics
+
+DatabaseAnalytics accumulates every distribution and min/max/mean statistic
+used by the analysis reports in one pass over a record stream. It accepts any
+iterable of records, so lists, NDJSON files and the streaming reader
+(motorcycle_io.iter_records) are analyzed the same way without holding the
+whole database in memory. Each record's fields are parsed exactly once.
+
+When a database file has an up-to-date statistics cube (see stats_cube),
+DatabaseAnalytics.from_cube() answers from the pre-aggregated cells instead
+and analyze_file() only scans files without one.
+
+The report functions in example_usage.py, taiwan_specific_usage.py and
+enhanced_database_demo.py only format its results.
+
+Usage:
+    python3 motorcycle_analytics.py complete_motorcycle_database.ndjson
+"""
+
+import argparse
+import json
+import random
+from collections import Counter
+
+from motorcycle_fields import displacement_cc, model_year, price_min
+from motorcycle_io import iter_records
+from stats_cube import load_cube
+
+# Model year ranges sampled by the enhanced database demo
+ERAS = {
+    "Early 2000s (2000-2005)": (2000, 2005),
+    "Mid 2000s (2006-2010)": (2006, 2010),
+    "Early 2010s (2011-2015)": (2011, 2015),
+    "Late 2010s (2016-2020)": (2016, 2020),
+    "Current Era (2021-2025)": (2021, 2025)
+}
+
+class NumericStats:
+    """Running count, minimum, maximum and mean of a numeric field"""
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+    
+    def add(self, value):
+        """Add one value"""
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+    
+    def merge(self, count, minimum, maximum, total):
+        """Add pre-aggregated values: their count, minimum, maximum and sum"""
+        if not count:
+            return
+        self.count += count
+        self.total += total
+        if self.minimum is None or minimum < self.minimum:
+            self.minimum = minimum
+        if self.maximum is None or maximum > self.maximum:
+            self.maximum = maximum
+    
+    @property
+    def mean(self):
+        """Get the mean, or None before the first value"""
+        return self.total / self.count if self.count else None
+    
+    def to_dict(self):
+        """Get the statistics as a dict"""
+        return {'count': self.count, 'min': self.minimum, 'max': self.maximum, 'mean': self.mean}
+
+class DatabaseAnalytics:
+    """Accumulates the analysis statistics of a motorcycle record stream
+    
+    Call add() per record or update() with any iterable of records. Eras are
+    sampled with reservoir sampling, so every model of an era is equally
+    likely to appear without collecting the era's models first.
+    """
+    
+    def __init__(self, eras=ERAS, samples_per_era=2, rng=random):
+        self.rng = rng
+        self.samples_per_era = samples_per_era
+        self.total = 0
+        self.brands = Counter()
+        self.types = Counter()
+        self.availability = Counter()
+        self.decades = Counter()
+        self.displacement = NumericStats()
+        self.electric = 0
+        self.price = NumericStats()
+        self.years = NumericStats()
+        
+        # Year -> era name lookup, built once instead of scanning the eras per record
+        self.era_by_year = {}
+        for name, (start_year, end_year) in eras.items():
+            for year in range(start_year, end_year + 1):
+                self.era_by_year.setdefault(year, name)
+        self.era_counts = Counter()
+        self.era_samples = {name: [] for name in eras}
+    
+    def add(self, m):
+        """Add one motorcycle record"""
+        self.total += 1
+        self.brands[m['brand']] += 1
+        self.types[m['type']] += 1
+        if 'availability' in m:
+            self.availability[m['availability']] += 1
+        
+        cc = displacement_cc(m)
+        if cc is None:
+            self.electric += 1
+        else:
+            self.displacement.add(cc)
+        self.price.add(price_min(m))
+        
+        year = model_year(m)
+        if year:
+            self.years.add(year)
+            self.decades[(year // 10) * 10] += 1
+            era = self.era_by_year.get(year)
+            if era is not None:
+                self.sample_era(era, m)
+    
+    def sample_era(self, era, m):
+        """Keep a uniform random sample of each era's models (reservoir sampling)"""
+        self.era_counts[era] += 1
+        samples = self.era_samples[era]
+        if len(samples) < self.samples_per_era:
+            samples.append(m)
+        else:
+            index = self.rng.randrange(self.era_counts[era])
+            if index < self.samples_per_era:
+                samples[index] = m
+    
+    def update(self, motorcycles):
+        """Add every record of an iterable and return self"""
+        for m in motorcycles:
+            self.add(m)
+        return self
+    
+    @classmethod
+    def from_cube(cls, cube, **options):
+        """Get the statistics from a stats_cube.StatsCube without scanning records
+        
+        Counts, min/max and means match a scan of the same records. Era
+        samples are drawn from the cube's per-year samples.
+        """
+        analytics = cls(**options)
+        for (brand, vehicle_type, year, availability), cell in cube.cells.items():
+            count = cell[0]
+            cc = cube.cell_measure(cell, 'displacement_cc')
+            price = cube.cell_measure(cell, 'price_min')
+            analytics.total += count
+            analytics.brands[brand] += count
+            analytics.types[vehicle_type] += count
+            if availability is not None:
+                analytics.availability[availability] += count
+            analytics.displacement.merge(*cc)
+            analytics.electric += count - cc[0]
+            analytics.price.merge(*price)
+            if year:
+                analytics.years.merge(count, year, year, year * count)
+                analytics.decades[(year // 10) * 10] += count
+                era = analytics.era_by_year.get(year)
+                if era is not None:
+                    analytics.era_counts[era] += count
+        
+        pools = {name: [] for name in analytics.era_samples}
+        for year, samples in sorted(cube.samples.items()):
+            era = analytics.era_by_year.get(year)
+            if era is not None:
+                pools[era].extend(samples)
+        for era, pool in pools.items():
+            analytics.era_samples[era] = analytics.rng.sample(pool, min(analytics.samples_per_era, len(pool)))
+        return analytics
+    
+    def to_dict(self):
+        """Get the statistics as plain JSON-serializable values"""
+        return {
+            'total': self.total,
+            'brands': dict(self.brands.most_common()),
+            'types': dict(self.types.most_common()),
+            'availability': dict(self.availability.most_common()),
+            'decades': {str(decade): count for decade, count in sorted(self.decades.items())},
+            'displacement_cc': self.displacement.to_dict(),
+            'electric': self.electric,
+            'price_min': self.price.to_dict(),
+            'model_year': self.years.to_dict(),
+            'eras': dict(self.era_counts),
+        }
+
+def analyze_records(motorcycles, **options):
+    """Compute the analytics of an iterable of records in one pass"""
+    return DatabaseAnalytics(**options).update(motorcycles)
+
+def analyze_database(motorcycles, filename=None, **options):
+    """Compute the analytics of loaded records, from the file's cube when it is up to date"""
+    cube = load_cube(filename) if filename is not None else None
+    if cube is not None:
+        return DatabaseAnalytics.from_cube(cube, **options)
+    return analyze_records(motorcycles, **options)
+
+def analyze_file(filename, use_cube=True, **options):
+    """Compute the analytics of a database file (JSON or NDJSON)
+    
+    Answers from the file's statistics cube when it is up to date and scans
+    the records in one pass otherwise; use_cube=False always scans.
+    """
+    cube = load_cube(filename) if use_cube else None
+    if cube is not None:
+        return DatabaseAnalytics.from_cube(cube, **options)
+    return analyze_records(iter_records(filename), **options)
+
+def main():
+    """Print the analytics of a database file as JSON"""
+    parser = argparse.ArgumentParser(description="Compute motorcycle database statistics in one pass")
+    parser.add_argument('filename', nargs='?', default='complete_motorcycle_database.json',
+                        help="database file, .json or .ndjson (default: complete_motorcycle_database.json)")
+    args = parser.parse_args()
+    
+    analytics = analyze_file(args.filename)
+    print(json.dumps(analytics.to_dict(), ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Indexed Motorcycle Database
+
+MotorcycleDB builds its indexes once at load time so queries do not have to
+scan every record:
+- hash indexes on brand, type, availability and category
+- sorted arrays searched with bisect for displacement, price and model year
+- a full-text search index (see motorcycle_search), built by the first search()
+- sorted arrays for power, torque, fuel efficiency and weight, built by the
+  first top() ranking on them
+- feature bitmasks (see feature_index), built by the first feature query
+
+filter() runs Q expressions (see motorcycle_query) against the same indexes,
+and top() / top_by_group() answer ranked queries by walking the sorted arrays
+until k matches are found instead of sorting every match.
+
+A combined query starts from the smallest candidate set and checks the other
+conditions per candidate, so "Yamaha 250-600cc under NT$ 200,000" costs
+O(log n + k) instead of several full passes.
+"""
+
+import argparse
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from itertools import islice
+
+from motorcycle_fields import displacement_cc, model_year, price_min
+from motorcycle_io import load_database_file
+from motorcycle_ranking import TopK, predicate, rank_parser
+from motorcycle_search import SearchIndex
+
+# Fields with a hash index; brand is indexed case-insensitively
+HASH_FIELDS = ['brand', 'type', 'availability', 'category']
+
+# Fields with a sorted range index and the parser that extracts them
+RANGE_FIELDS = {
+    'displacement': displacement_cc,
+    'price': price_min,
+    'year': model_year,
+}
+
+def sorted_index(values):
+    """Get parallel sorted values / row numbers, rows without a value left out"""
+    pairs = sorted((value, row) for row, value in enumerate(values) if value is not None)
+    return [value for value, _ in pairs], [row for _, row in pairs]
+
+class MotorcycleDB:
+    """In-memory motorcycle catalogue with hash and range indexes"""
+    
+    def __init__(self, motorcycles, header=None):
+        self.motorcycles = list(motorcycles)
+        self.header = header or {}
+        
+        # Hash indexes: value -> row numbers in ascending order
+        self.hash_indexes = {field: defaultdict(list) for field in HASH_FIELDS}
+        # Parsed numeric values per row, used to check conditions on candidates
+        self.values = {field: [] for field in RANGE_FIELDS}
+        
+        for row, m in enumerate(self.motorcycles):
+            for field in HASH_FIELDS:
+                if field in m:
+                    key = m[field].lower() if field == 'brand' else m[field]
+                    self.hash_indexes[field][key].append(row)
+            for field, parser in RANGE_FIELDS.items():
+                self.values[field].append(parser(m))
+        
+        # Range indexes: parallel sorted keys / row numbers, rows without a value left out;
+        # the other RANK_FIELDS are added by range_index() when first ranked
+        self.range_indexes = {field: sorted_index(values) for field, values in self.values.items()}
+        self.electric_rows = [row for row, cc in enumerate(self.values['displacement']) if cc is None]
+        # Full-text index over the model names, brand and features, built by the first search
+        self.search_index = None
+        # Feature bitmasks, built by the first feature query
+        self.feature_index = None
+    
+    @classmethod
+    def load(cls, filename):
+        """Load a database file (JSON or NDJSON) and index it"""
+        data = load_database_file(filename)
+        motorcycles = data.pop('motorcycles')
+        return cls(motorcycles, header=data)
+    
+    def __len__(self):
+        return len(self.motorcycles)
+    
+    def type_keys(self, vehicle_type):
+        """Get the indexed types that contain vehicle_type (case-insensitive)"""
+        return [key for key in self.hash_indexes['type'] if vehicle_type.lower() in key.lower()]
+    
+    def range_index(self, field):
+        """Get the (sorted values, row numbers) index of a field, building a ranking index on first use"""
+        index = self.range_indexes.get(field)
+        if index is None:
+            parser = rank_parser(field)
+            self.values[field] = [parser(m) for m in self.motorcycles]
+            index = self.range_indexes[field] = sorted_index(self.values[field])
+        return index
+    
+    def range_bounds(self, field, low=None, high=None):
+        """Get the [start, end) positions of low <= value <= high in a range index"""
+        keys, _ = self.range_index(field)
+        start = 0 if low is None else bisect_left(keys, low)
+        end = len(keys) if high is None else bisect_right(keys, high)
+        return start, max(start, end)
+    
+    def query(self, brand=None, vehicle_type=None, availability=None, category=None,
+              min_cc=None, max_cc=None, min_price=None, max_price=None,
+              min_year=None, max_year=None):
+        """Get the motorcycles matching every given condition, in database order
+        
+        Conditions follow the filter_by_* helpers of the usage scripts: brand
+        is case-insensitive, vehicle_type is a case-insensitive substring,
+        prices apply to the lower end of the price range, and electric
+        motorcycles (no displacement) only match when max_cc is not given.
+        """
+        return [self.motorcycles[row] for row in self.query_rows(
+            brand, vehicle_type, availability, category,
+            min_cc, max_cc, min_price, max_price, min_year, max_year)]
+    
+    def query_rows(self, brand=None, vehicle_type=None, availability=None, category=None,
+                   min_cc=None, max_cc=None, min_price=None, max_price=None,
+                   min_year=None, max_year=None):
+        """Get the row numbers matching every given condition (see query)"""
+        # (size, rows getter, row check) for each condition; sizes are O(1) or O(log n)
+        conditions = []
+        if brand is not None:
+            rows = self.hash_indexes['brand'].get(brand.lower(), [])
+            key = brand.lower()
+            conditions.append((len(rows), lambda rows=rows: rows,
+                               lambda row: self.motorcycles[row]['brand'].lower() == key))
+        if vehicle_type is not None:
+            keys = self.type_keys(vehicle_type)
+            size = sum(len(self.hash_indexes['type'][k]) for k in keys)
+            conditions.append((size, lambda keys=keys: self.hash_rows('type', keys),
+                               lambda row, keys=set(keys): self.motorcycles[row]['type'] in keys))
+        for field, value in (('availability', availability), ('category', category)):
+            if value is not None:
+                rows = self.hash_indexes[field].get(value, [])
+                conditions.append((len(rows), lambda rows=rows: rows,
+                                   lambda row, field=field, value=value: self.motorcycles[row].get(field) == value))
+        
+        for field, low, high, include_missing in (
+            ('displacement', min_cc, max_cc, max_cc is None),
+            ('price', min_price, max_price, False),
+            ('year', min_year, max_year, False),
+        ):
+            if low is None and high is None:
+                continue
+            start, end = self.range_bounds(field, low, high)
+            missing = self.electric_rows if include_missing else []
+            conditions.append((end - start + len(missing),
+                               lambda field=field, start=start, end=end, missing=missing:
+                                   self.range_indexes[field][1][start:end] + missing,
+                               lambda row, field=field, low=low, high=high, include_missing=include_missing:
+                                   self.in_range(field, row, low, high, include_missing)))
+        
+        if not conditions:
+            return list(range(len(self.motorcycles)))
+        
+        # Start from the most selective condition and check the rest per candidate
+        conditions.sort(key=lambda condition: condition[0])
+        _, candidates, _ = conditions[0]
+        checks = [check for _, _, check in conditions[1:]]
+        return sorted(row for row in candidates() if all(check(row) for check in checks))
+    
+    def filter(self, expression):
+        """Get the motorcycles matching a query expression (see motorcycle_query), in database order"""
+        return expression.query(self)
+    
+    def filter_rows(self, expression):
+        """Get the row numbers matching a query expression, using the indexes it can"""
+        return expression.rows(self)
+    
+    def ranked_rows(self, field, largest=False):
+        """Yield the row numbers that have a value for field, best first (ties in row order)"""
+        keys, rows = self.range_index(field)
+        if not largest:
+            yield from rows
+            return
+        # Walk the sorted array backwards one run of equal values at a time
+        end = len(keys)
+        while end > 0:
+            start = bisect_left(keys, keys[end - 1], 0, end)
+            yield from rows[start:end]
+            end = start
+    
+    def top_rows(self, field, k=10, largest=False, where=None):
+        """Get the row numbers of the k matching records ranked best by field (see top)"""
+        if k <= 0:
+            return []
+        if where is None:
+            return list(islice(self.ranked_rows(field, largest), k))
+        
+        # Walking the sorted array visits about k / selectivity rows; ranking
+        # the index candidates of the condition costs their count
+        plan = where.plan(self) if hasattr(where, 'plan') else None
+        if plan is not None and plan[0] < k * len(self) / max(plan[0], 1):
+            self.range_index(field)
+            values = self.values[field]
+            best = TopK(k, largest)
+            for row in sorted(plan[1]()):
+                if values[row] is not None:
+                    best.push(values[row], row)
+            return best.records()
+        
+        check = predicate(where)
+        motorcycles = self.motorcycles
+        return list(islice((row for row in self.ranked_rows(field, largest) if check(motorcycles[row])), k))
+    
+    def top(self, field, k=10, largest=False, where=None):
+        """Get the k matching records with the lowest (or largest) value of field, best first
+        
+        field is one of price, power, torque, fuel_efficiency, weight,
+        displacement or year; where is an optional Q expression or predicate.
+        """
+        return [self.motorcycles[row] for row in self.top_rows(field, k, largest, where)]
+    
+    def top_by_group(self, field, k=10, group_by='brand', largest=False, where=None):
+        """Get the k best matching records of every group, best first
+        
+        Returns {group value: records}. Brands are grouped case-insensitively,
+        like the brand index. The walk over the sorted array stops once every
+        indexed group has k records.
+        """
+        groups = {}
+        if k <= 0:
+            return groups
+        check = predicate(where)
+        index = self.hash_indexes.get(group_by)
+        remaining = len(index) if index is not None else None
+        motorcycles = self.motorcycles
+        labels = {}
+        for row in self.ranked_rows(field, largest):
+            m = motorcycles[row]
+            if check is not None and not check(m):
+                continue
+            label = m.get(group_by)
+            key = label.lower() if group_by == 'brand' and label is not None else label
+            records = groups.get(key)
+            if records is None:
+                records = groups[key] = []
+                labels[key] = label
+            if len(records) < k:
+                records.append(m)
+                if len(records) == k and remaining is not None:
+                    remaining -= 1
+                    if remaining == 0:
+                        break
+        return {labels[key]: records for key, records in groups.items()}
+    
+    def hash_rows(self, field, keys):
+        """Get the row numbers of several hash index keys"""
+        rows = []
+        for key in keys:
+            rows.extend(self.hash_indexes[field][key])
+        return rows
+    
+    def in_range(self, field, row, low, high, include_missing=False):
+        """Check whether a row's value for a range field lies within [low, high]"""
+        value = self.values[field][row]
+        if value is None:
+            return include_missing
+        return (low is None or value >= low) and (high is None or value <= high)
+    
+    def search(self, text, limit=10):
+        """Get the motorcycles best matching a free-text query (see motorcycle_search)"""
+        if self.search_index is None:
+            self.search_index = SearchIndex(self.motorcycles)
+        return self.search_index.search(text, limit)
+    
+    def feature_rows(self, all_of=(), any_of=(), none_of=()):
+        """Get the row numbers of the records with every feature of all_of, one of any_of
+        (when given) and none of none_of, in database order"""
+        if self.feature_index is None:
+            # numpy is only needed once features are queried
+            from feature_index import FeatureIndex
+            self.feature_index = FeatureIndex(self.motorcycles)
+        return self.feature_index.rows(all_of, any_of, none_of).tolist()
+    
+    def with_features(self, all_of=(), any_of=(), none_of=()):
+        """Get the motorcycles matching a feature query (see feature_rows), in database order"""
+        return [self.motorcycles[row] for row in self.feature_rows(all_of, any_of, none_of)]
+    
+    def filter_by_brand(self, brand):
+        """Filter motorcycles by brand"""
+        return self.query(brand=brand)
+    
+    def filter_by_type(self, vehicle_type):
+        """Filter motorcycles by vehicle type"""
+        return self.query(vehicle_type=vehicle_type)
+    
+    def filter_by_displacement(self, min_cc=None, max_cc=None):
+        """Filter motorcycles by engine displacement"""
+        return self.query(min_cc=min_cc, max_cc=max_cc)
+    
+    def filter_by_price_range(self, max_price):
+        """Filter motorcycles by maximum price"""
+        return self.query(max_price=max_price)
+
+def main():
+    """Show a few indexed queries"""
+    parser = argparse.ArgumentParser(description="Run indexed queries against a motorcycle database")
+    parser.add_argument('filename', nargs='?', default='complete_motorcycle_database.json',
+                        help="database file, .json or .ndjson (default: complete_motorcycle_database.json)")
+    args = parser.parse_args()
+    
+    db = MotorcycleDB.load(args.filename)
+    print(f"Indexed {len(db)} motorcycles from {args.filename}")
+    
+    yamaha_mid = db.query(brand='Yamaha', min_cc=250, max_cc=600, max_price=200000)
+    print(f"Yamaha 250-600cc under NT$ 200,000: {len(yamaha_mid)} models")
+    for bike in yamaha_mid[:5]:
+        print(f"  {bike['model']} - {bike['engine']['displacement']} ({bike['price_range']})")
+    
+    scooters = db.query(vehicle_type='scooter', availability='Available')
+    print(f"Available scooters: {len(scooters)} models")
+    
+    abs_keyless = db.with_features(all_of=['ABS system', 'Smart key'], none_of=['Battery swapping'])
+    print(f"ABS system and Smart key, no Battery swapping: {len(abs_keyless)} models")
+    
+    print("Most powerful model per brand:")
+    for brand, (bike,) in sorted(db.top_by_group('power', 1, largest=True).items()):
+        print(f"  {brand}: {bike['model']} - {bike['engine']['power']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Motorcycle Field Parsers
+
+Turn the display strings stored in motorcycle records ("150cc", "13.2 hp",
+"NT$ 110,000 - 120,000", ...) into numbers. Shared by the usage scripts and
+the storage/query modules so every consumer parses fields the same way.
+Records generated with schema 2 already carry the raw numbers
+(displacement_cc, power_hp, price_min, ...), which are used when present.
+Missing or non-numeric values (e.g. "Electric Motor") come back as None.
+"""
+
+import re
+
+YEAR_PATTERN = re.compile(r'\((\d{4})\)')
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+HP_PATTERN = re.compile(r'(\d+(?:\.\d+)?) hp')
+
+def first_number(text):
+    """Get the first number in a string, or None"""
+    if text is None:
+        return None
+    match = NUMBER_PATTERN.search(text.replace(',', ''))
+    return float(match.group(0)) if match else None
+
+def displacement_cc(m):
+    """Get engine displacement in cc (None for electric motors)"""
+    if 'displacement_cc' in m['engine']:
+        return m['engine']['displacement_cc']
+    displacement = m['engine'].get('displacement', '')
+    if not displacement.endswith('cc'):
+        return None
+    return int(displacement[:-2])
+
+def power_hp(m):
+    """Get power in hp ("9.6 hp" or "5.0 kW (6.7 hp)")"""
+    if 'power_hp' in m['engine']:
+        return m['engine']['power_hp']
+    match = HP_PATTERN.search(m['engine'].get('power', ''))
+    return float(match.group(1)) if match else None
+
+def torque_nm(m):
+    """Get torque in Nm"""
+    if 'torque_nm' in m['engine']:
+        return m['engine']['torque_nm']
+    return first_number(m['engine'].get('torque'))
+
+def price_bounds(m):
+    """Get the (lower, upper) price in NT$ from "NT$ 65,000 - 72,000" """
+    if 'price_min' in m:
+        return m['price_min'], m['price_max']
+    lower, _, upper = m['price_range'].replace('NT$', '').replace(',', '').partition(' - ')
+    lower = int(lower.strip())
+    return lower, int(upper.strip()) if upper else lower
+
+def price_min(m):
+    """Get the lower price in NT$"""
+    if 'price_min' in m:
+        return m['price_min']
+    return price_bounds(m)[0]
+
+def model_year(m):
+    """Get the model year from the model_year field or the "(2023)" model suffix"""
+    if 'model_year' in m:
+        return int(m['model_year'])
+    match = YEAR_PATTERN.search(m['model'])
+    return int(match.group(1)) if match else None
+
+def weight_kg(m):
+    """Get weight in kg"""
+    if 'weight_kg' in m:
+        return m['weight_kg']
+    weight = first_number(m.get('weight'))
+    return int(weight) if weight is not None else None
+
+def seat_height_mm(m):
+    """Get seat height in mm"""
+    if 'seat_height_mm' in m:
+        return m['seat_height_mm']
+    height = first_number(m.get('seat_height'))
+    return int(height) if height is not None else None
+
+def fuel_efficiency_km_l(m):
+    """Get fuel efficiency in km/L (None for electric range figures)"""
+    if 'fuel_efficiency_km_l' in m:
+        return m['fuel_efficiency_km_l']
+    efficiency = m.get('fuel_efficiency') or ''
+    return first_number(efficiency) if efficiency.endswith('km/L') else None
+
+def range_km(m):
+    """Get electric range in km per charge"""
+    if 'range_km' in m:
+        return m['range_km']
+    efficiency = m.get('fuel_efficiency') or ''
+    return first_number(efficiency) if efficiency.endswith('km/charge') else None
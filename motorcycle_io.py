@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Motorcycle Database I/O
+
+Streaming readers and writers shared by the generators and the usage scripts,
+so large databases can be written and read without holding every record in memory.
+"""
+
+import json
+import re
+
+# Characters reserved for the total_entries value, which is only known at the end
+TOTAL_ENTRIES_WIDTH = 20
+
+def json_header_text(header):
+    """Get the start of a JSON database file, up to the total_entries value"""
+    lines = ['{\n']
+    for key, value in header.items():
+        lines.append(f'  {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)},\n')
+    lines.append('  "total_entries": ')
+    return ''.join(lines)
+
+def json_record_text(motorcycle):
+    """Format a record the way it is indented inside the motorcycles array"""
+    return json.dumps(motorcycle, ensure_ascii=False, indent=2).replace('\n', '\n    ')
+
+def ndjson_record_text(motorcycle):
+    """Format a record as one compact NDJSON line, without the newline"""
+    return json.dumps(motorcycle, ensure_ascii=False, separators=(',', ':'))
+
+def write_json_stream(filename, header, motorcycles):
+    """Write a database to JSON one record at a time
+    
+    The file has the same layout as json.dump(database, f, indent=2) with the
+    header fields first, then total_entries and the motorcycles array.
+    total_entries is written as a blank placeholder and patched in place once
+    the records are exhausted, so only one record is held at a time.
+    Returns the number of records written.
+    """
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(json_header_text(header))
+        total_entries_offset = f.tell()
+        f.write(' ' * TOTAL_ENTRIES_WIDTH + '\n')
+        f.write('  "motorcycles": [')
+        
+        count = 0
+        for motorcycle in motorcycles:
+            f.write(',\n    ' if count else '\n    ')
+            f.write(json_record_text(motorcycle))
+            count += 1
+        f.write('\n  ]\n}' if count else ']\n}')
+        
+        # Patch the count into the reserved placeholder
+        f.seek(total_entries_offset)
+        f.write(f"{count},".ljust(TOTAL_ENTRIES_WIDTH))
+    
+    return count
+
+# File extensions that select the line-delimited (one record per line) format
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+def is_ndjson(filename):
+    """Check whether a database file uses the line-delimited format"""
+    return str(filename).lower().endswith(NDJSON_EXTENSIONS)
+
+def write_ndjson(filename, motorcycles, append=False):
+    """Write records as NDJSON, one compact JSON object per line
+    
+    Returns the number of records written.
+    """
+    count = 0
+    with open(filename, 'a' if append else 'w', encoding='utf-8') as f:
+        for motorcycle in motorcycles:
+            f.write(ndjson_record_text(motorcycle))
+            f.write('\n')
+            count += 1
+    return count
+
+def iter_ndjson(filename):
+    """Yield the records of an NDJSON file one line at a time"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+# Characters read per refill by the incremental JSON reader
+READ_SIZE = 1 << 16
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+NUMBER_START = '-0123456789'
+NUMBER_CHARACTERS = re.compile(r'[-+0-9.eE]*')
+
+class JsonTokenizer:
+    """Incremental reader for the top-level structure of a JSON file
+    
+    Values are decoded one at a time with json.JSONDecoder.raw_decode from a
+    buffer that is refilled in READ_SIZE chunks, so only the value being
+    decoded (plus one chunk) is held in memory.
+    """
+    
+    decoder = json.JSONDecoder()
+    
+    def __init__(self, f, read_size=READ_SIZE):
+        self.f = f
+        self.read_size = read_size
+        self.buffer = ''
+        self.pos = 0
+    
+    def fill(self):
+        """Drop the consumed text and read another chunk; False at end of file"""
+        chunk = self.f.read(self.read_size)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def peek(self):
+        """Skip whitespace and get the next character ('' at end of file)"""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+    
+    def expect(self, characters):
+        """Consume the next character, which must be one of characters"""
+        character = self.peek()
+        if not character or character not in characters:
+            raise json.JSONDecodeError(f"Expecting one of {characters!r}", self.buffer, self.pos)
+        self.pos += 1
+        return character
+    
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Incomplete value: read more and retry from its start
+                if not self.fill():
+                    raise
+                continue
+            # A number that runs up to the end of the buffer may continue in the next chunk
+            if (self.buffer[self.pos] in NUMBER_START
+                    and NUMBER_CHARACTERS.match(self.buffer, self.pos).end() == len(self.buffer)
+                    and self.fill()):
+                continue
+            self.pos = end
+            return value
+    
+    def read_fields(self, stop_key='motorcycles'):
+        """Read top-level object fields up to stop_key
+        
+        Returns (fields, found); when found is True the tokenizer is positioned
+        at the value of stop_key.
+        """
+        fields = {}
+        self.expect('{')
+        if self.peek() == '}':
+            return fields, False
+        while True:
+            key = self.value()
+            self.expect(':')
+            if key == stop_key:
+                return fields, True
+            fields[key] = self.value()
+            if self.expect(',}') == '}':
+                return fields, False
+    
+    def iter_array(self):
+        """Yield the items of the array at the current position one at a time"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+def read_header(filename):
+    """Get the header fields of a database file without parsing its records
+    
+    Reads title, last_updated, total_entries, ... up to the motorcycles array.
+    NDJSON files only hold records, so their header is empty.
+    """
+    if is_ndjson(filename):
+        return {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        return JsonTokenizer(f).read_fields()[0]
+
+def iter_json_records(filename):
+    """Yield the records of a JSON database file one at a time"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        tokens = JsonTokenizer(f)
+        _, found = tokens.read_fields()
+        if found:
+            yield from tokens.iter_array()
+
+def iter_records(filename):
+    """Yield the motorcycle records of a database file in either format"""
+    if is_ndjson(filename):
+        yield from iter_ndjson(filename)
+    else:
+        yield from iter_json_records(filename)
+
+def open_database_file(filename):
+    """Open a database file lazily as {..., "motorcycles": <record iterator>}
+    
+    Only the header fields are parsed up front; records are parsed as the
+    iterator is consumed, so it can be passed through once to the filters
+    and analysis functions.
+    """
+    database = read_header(filename)
+    database["motorcycles"] = iter_records(filename)
+    return database
+
+def load_database_file(filename, lazy=False, compact=False, workers=1):
+    """Load a database file in either format as {..., "motorcycles": [...]}
+    
+    NDJSON files only hold records, so the returned dict has no title or
+    last_updated fields.
+    
+    With lazy=True only the header is parsed and "motorcycles" is an
+    iterator that parses records as it is consumed (see open_database_file).
+    With compact=True the records are Motorcycle objects (see
+    motorcycle_records), which take several times less memory and are read
+    the same way as the dicts. With workers > 1 the records are parsed by a
+    process pool (see parallel_filter).
+    """
+    # motorcycle_records and parallel_filter build on this module: import them on use
+    if workers > 1 and not lazy:
+        from parallel_filter import load_database_parallel
+        data = load_database_parallel(filename, workers)
+        if compact:
+            from motorcycle_records import from_dicts
+            data["motorcycles"] = list(from_dicts(data["motorcycles"]))
+        return data
+    if lazy:
+        data = open_database_file(filename)
+        if compact:
+            from motorcycle_records import from_dicts
+            data["motorcycles"] = from_dicts(data["motorcycles"])
+        return data
+    if compact:
+        from motorcycle_records import load_records
+        return load_records(filename)
+    
+    if is_ndjson(filename):
+        motorcycles = list(iter_ndjson(filename))
+        return {"total_entries": len(motorcycles), "motorcycles": motorcycles}
+    
+    with open(filename, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def with_format(filename, file_format):
+    """Swap the extension of a database filename for the given format"""
+    base = str(filename).rsplit('.', 1)[0]
+    return f"{base}.{file_format}"
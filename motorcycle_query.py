@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Motorcycle Query Expressions
+
+Q objects describe filter conditions that combine with & (and), | (or) and
+~ (not) instead of nesting filter_by_* calls:
+
+    (Q(brand='Yamaha') & Q(cc__between=(250, 600)) & Q(price__lte=200000)).filter(motorcycles)
+
+An expression compiles to one fused predicate and runs in a single pass
+without intermediate lists:
+- conditions on the same field inside an "and" share one parse of the field
+- the parts of an "and" run cheapest and most selective first, the parts of
+  an "or" cheapest and most likely to match first
+- against a MotorcycleDB the hash and range indexes are used: an "and"
+  starts from its smallest index candidate set, an "or" unions its parts'
+  candidates, and exact index counts replace the estimated selectivities
+- exact feature lookups (features__contains='ABS system') and their
+  negations inside an "and" run as one bitmask query (see feature_index)
+
+Lookups are written field__lookup=value (exact when omitted). A missing value
+(such as the displacement of an electric motor) never matches a comparison;
+combine with Q(cc__isnull=True) to keep such records.
+
+Usage:
+    python3 motorcycle_query.py complete_motorcycle_database.json
+"""
+
+import argparse
+import time
+
+from motorcycle_fields import (displacement_cc, fuel_efficiency_km_l, model_year, power_hp,
+                               price_min, torque_nm, weight_kg)
+from motorcycle_io import load_database_file
+
+# Queryable fields: name -> (how the generated code reads it, kind, relative cost)
+# The reader is a Python expression over the record m, or a parser function
+FIELDS = {
+    'brand': ("m['brand']", 'text', 1),
+    'model': ("m['model']", 'text', 1),
+    'type': ("m['type']", 'text', 1),
+    'availability': ("m.get('availability')", 'text', 1),
+    'category': ("m.get('category')", 'text', 1),
+    'features': ("m.get('features', ())", 'list', 1),
+    'cc': (displacement_cc, 'number', 3),
+    'power': (power_hp, 'number', 4),
+    'torque': (torque_nm, 'number', 4),
+    'price': (price_min, 'number', 4),
+    'year': (model_year, 'number', 3),
+    'weight': (weight_kg, 'number', 4),
+    'fuel_efficiency': (fuel_efficiency_km_l, 'number', 4),
+}
+
+# Generated code of each lookup: {v} is the field value, {c} and {d} constants.
+# Every template starts with {v}, where the value is read the first time.
+LOOKUPS = {
+    'exact': '{v} == {c}',
+    'iexact': '{v} is not None and {v}.lower() == {c}',
+    'contains': '{v} is not None and {c} in {v}',
+    'icontains': '{v} is not None and {c} in {v}.lower()',
+    'in': '{v} in {c}',
+    'gt': '{v} is not None and {v} > {c}',
+    'gte': '{v} is not None and {v} >= {c}',
+    'lt': '{v} is not None and {v} < {c}',
+    'lte': '{v} is not None and {v} <= {c}',
+    'between': '{v} is not None and {c} <= {v} <= {d}',
+    'isnull': '{v} is None',
+}
+LIST_ICONTAINS = '{v} is not None and any({c} in item.lower() for item in {v})'
+NOT_NULL = '{v} is not None'
+
+# Share of records a lookup is assumed to match when no index can count them
+DEFAULT_SELECTIVITY = {
+    'exact': 0.1,
+    'iexact': 0.1,
+    'contains': 0.3,
+    'icontains': 0.3,
+    'in': 0.2,
+    'gt': 0.5,
+    'gte': 0.5,
+    'lt': 0.5,
+    'lte': 0.5,
+    'between': 0.3,
+    'isnull': 0.1,
+}
+
+# MotorcycleDB hash index and range index behind each field
+HASH_INDEXED = {'brand': 'brand', 'type': 'type', 'availability': 'availability', 'category': 'category'}
+RANGE_INDEXED = {'cc': 'displacement', 'price': 'price', 'year': 'year', 'power': 'power', 'torque': 'torque',
+                 'fuel_efficiency': 'fuel_efficiency', 'weight': 'weight'}
+
+def feature_lookup(part):
+    """Get (feature, negated) of a features__contains condition or its negation, or None"""
+    negated = isinstance(part, Not)
+    if negated:
+        part = part.part
+    if isinstance(part, Condition) and part.field == 'features' and part.lookup == 'contains' \
+            and isinstance(part.value, str):
+        return part.value, negated
+    return None
+
+def rank_and(cost, selectivity):
+    """Order key for the parts of an "and": cheap parts that reject most go first"""
+    return cost / (1 - selectivity) if selectivity < 1 else float('inf')
+
+def rank_or(cost, selectivity):
+    """Order key for the parts of an "or": cheap parts that accept most go first"""
+    return cost / selectivity if selectivity > 0 else float('inf')
+
+class Compiler:
+    """Collects the constants and variables of one generated predicate"""
+    
+    def __init__(self):
+        self.namespace = {}
+        self.variables = 0
+    
+    def constant(self, value):
+        """Get the name the generated code uses for a value"""
+        name = f'c{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+    
+    def variable(self):
+        """Get a fresh local variable name"""
+        self.variables += 1
+        return f'v{self.variables}'
+    
+    def reader(self, field):
+        """Get the code reading a field from the record m"""
+        reader = FIELDS[field][0]
+        return reader if isinstance(reader, str) else f'{self.constant(reader)}(m)'
+    
+    def function(self, source, argument='m'):
+        """Turn a generated expression into a function of one argument"""
+        exec(f'def predicate({argument}):\n    return {source}\n', self.namespace)
+        return self.namespace.pop('predicate')
+    
+    def scanner(self, source):
+        """Turn a generated expression into a generator over the records it accepts
+        
+        The test is inlined in the loop, so no function is called per record.
+        """
+        exec(f'def scan(motorcycles):\n    for m in motorcycles:\n        if {source}:\n            yield m\n',
+             self.namespace)
+        return self.namespace.pop('scan')
+
+class Expression:
+    """Base of the query expression nodes"""
+    
+    def __and__(self, other):
+        return And([self, other])
+    
+    def __or__(self, other):
+        return Or([self, other])
+    
+    def __invert__(self):
+        return Not(self)
+    
+    def compile(self, db=None):
+        """Get a predicate m -> bool (selectivities counted with db's indexes when given)
+        
+        The whole expression becomes the body of one generated function.
+        """
+        compiler = Compiler()
+        source, _, _ = self.source(compiler, db)
+        return compiler.function(source)
+    
+    def filter(self, motorcycles):
+        """Yield the records matching the expression, in one pass"""
+        compiler = Compiler()
+        source, _, _ = self.source(compiler, None)
+        return compiler.scanner(source)(motorcycles)
+    
+    def rows(self, db):
+        """Get the row numbers of a MotorcycleDB matching the expression, in database order"""
+        plan = self.plan(db)
+        if plan is not None:
+            return sorted(plan[1]())
+        predicate = self.compile(db)
+        return [row for row, m in enumerate(db.motorcycles) if predicate(m)]
+    
+    def query(self, db):
+        """Get the records of a MotorcycleDB matching the expression, in database order"""
+        return [db.motorcycles[row] for row in self.rows(db)]
+    
+    def source(self, compiler, db):
+        """Get (generated code, cost, selectivity) of the expression"""
+        raise NotImplementedError
+    
+    def plan(self, db):
+        """Get (candidate count, rows getter) from db's indexes, or None when they do not apply
+        
+        The rows getter returns exactly the matching rows, in any order.
+        """
+        return None
+
+class Condition(Expression):
+    """One field lookup, such as cc__gte=250"""
+    
+    def __init__(self, field, lookup, value):
+        if field not in FIELDS:
+            raise TypeError(f"unknown field: {field}")
+        if lookup not in LOOKUPS:
+            raise TypeError(f"unknown lookup: {lookup}")
+        if lookup == 'in' and (isinstance(value, (str, bytes)) or not hasattr(value, '__iter__')):
+            # A string would be tested as a substring container, not as one value
+            raise ValueError(f"{field}__in needs a list, tuple or set of values, got {value!r}")
+        self.field = field
+        self.lookup = lookup
+        self.value = value
+        self.cost = FIELDS[field][2]
+        compiler = Compiler()
+        self.test = compiler.function(self.test_source(compiler, 'v'), 'v')
+        self.predicate = None
+    
+    def __repr__(self):
+        return f"Q({self.field}__{self.lookup}={self.value!r})"
+    
+    def test_source(self, compiler, variable, reader=None):
+        """Get the code testing the field value in variable
+        
+        With a reader, the value is read into the variable where the test
+        first uses it.
+        """
+        template = LOOKUPS[self.lookup]
+        value = self.value
+        if self.lookup in ('iexact', 'icontains'):
+            value = value.lower()
+            if FIELDS[self.field][1] == 'list' and self.lookup == 'icontains':
+                template = LIST_ICONTAINS
+        elif self.lookup == 'in':
+            value = frozenset(value)
+        elif self.lookup == 'isnull' and not value:
+            template = NOT_NULL
+        
+        constants = {'c': None, 'd': None}
+        if self.lookup == 'between':
+            constants['c'], constants['d'] = compiler.constant(value[0]), compiler.constant(value[1])
+        elif '{c}' in template:
+            constants['c'] = compiler.constant(value)
+        first = f'({variable} := {reader})' if reader is not None else variable
+        template = template.replace('{v}', first, 1)
+        return '(' + template.format(v=variable, **constants) + ')'
+    
+    def matches(self, m):
+        """Check one record"""
+        if self.predicate is None:
+            self.predicate = self.compile()
+        return self.predicate(m)
+    
+    def selectivity(self, db):
+        """Get the share of records expected to match"""
+        plan = self.plan(db) if db is not None else None
+        if plan is not None:
+            return plan[0] / len(db) if len(db) else 0
+        return DEFAULT_SELECTIVITY[self.lookup]
+    
+    def source(self, compiler, db):
+        code = self.test_source(compiler, compiler.variable(), compiler.reader(self.field))
+        return code, self.cost, self.selectivity(db)
+    
+    def index_keys(self, db):
+        """Get the hash index keys that can hold matches, or None"""
+        field = HASH_INDEXED.get(self.field)
+        if field is None or self.value is None or self.lookup == 'in' and None in self.value:
+            # Records without the field are not in the hash index
+            return None
+        index = db.hash_indexes[field]
+        if field == 'brand':
+            # The brand index is keyed case-insensitively
+            if self.lookup in ('exact', 'iexact'):
+                return [self.value.lower()]
+            if self.lookup == 'in':
+                return sorted({value.lower() for value in self.value})
+            return None
+        if self.lookup == 'exact':
+            return [self.value]
+        if self.lookup == 'in':
+            return list(set(self.value))
+        if self.lookup in ('iexact', 'contains', 'icontains'):
+            return [key for key in index if self.test(key)]
+        return None
+    
+    def range_bounds(self):
+        """Get the inclusive (low, high) bounds covering the lookup, or None"""
+        if self.lookup in ('gt', 'gte'):
+            return self.value, None
+        if self.lookup in ('lt', 'lte'):
+            return None, self.value
+        if self.lookup == 'between':
+            return self.value
+        if self.lookup == 'exact' and self.value is not None:
+            return self.value, self.value
+        return None
+    
+    def plan(self, db):
+        if feature_lookup(self) is not None:
+            rows = db.feature_rows(all_of=[self.value])
+            return len(rows), lambda: rows
+        
+        keys = self.index_keys(db)
+        if keys is not None:
+            field = HASH_INDEXED[self.field]
+            index = db.hash_indexes[field]
+            keys = [key for key in keys if key in index]
+            size = sum(len(index[key]) for key in keys)
+            if field == 'brand' and self.lookup != 'iexact':
+                # The brand index ignores case: recheck the candidates
+                return size, lambda: [row for row in db.hash_rows(field, keys) if self.matches(db.motorcycles[row])]
+            return size, lambda: db.hash_rows(field, keys)
+        
+        field = RANGE_INDEXED.get(self.field)
+        bounds = self.range_bounds()
+        if field is None or bounds is None:
+            return None
+        start, end = db.range_bounds(field, *bounds)
+        if self.lookup in ('gt', 'lt'):
+            # The index bounds are inclusive: drop the rows equal to the bound
+            return end - start, lambda: [row for row in db.range_index(field)[1][start:end]
+                                         if self.matches(db.motorcycles[row])]
+        return end - start, lambda: db.range_index(field)[1][start:end]
+
+class And(Expression):
+    """Every part must match"""
+    
+    def __init__(self, parts):
+        self.parts = []
+        for part in parts:
+            self.parts.extend(part.parts if isinstance(part, And) else [part])
+    
+    def __repr__(self):
+        return '(' + ' & '.join(map(repr, self.parts)) + ')'
+    
+    def source(self, compiler, db):
+        units = []
+        
+        # Conditions on the same field read the field once
+        by_field = {}
+        for part in self.parts:
+            if isinstance(part, Condition):
+                by_field.setdefault(part.field, []).append(part)
+            else:
+                units.append(part.source(compiler, db))
+        for conditions in by_field.values():
+            if len(conditions) == 1:
+                units.append(conditions[0].source(compiler, db))
+                continue
+            conditions.sort(key=lambda condition: condition.selectivity(db))
+            variable = compiler.variable()
+            tests = [conditions[0].test_source(compiler, variable, compiler.reader(conditions[0].field))]
+            tests += [condition.test_source(compiler, variable) for condition in conditions[1:]]
+            selectivity = 1
+            for condition in conditions:
+                selectivity *= condition.selectivity(db)
+            units.append(('(' + ' and '.join(tests) + ')', conditions[0].cost, selectivity))
+        
+        units.sort(key=lambda unit: rank_and(unit[1], unit[2]))
+        selectivity = 1
+        for _, _, part_selectivity in units:
+            selectivity *= part_selectivity
+        return '(' + ' and '.join(code for code, _, _ in units) + ')', sum(cost for _, cost, _ in units), selectivity
+    
+    def plan(self, db):
+        # (parts, plan) units; the feature lookups together are one bitmask query
+        units = []
+        features, all_of, none_of = [], [], []
+        for part in self.parts:
+            lookup = feature_lookup(part)
+            if lookup is None:
+                units.append(([part], part.plan(db)))
+                continue
+            features.append(part)
+            (none_of if lookup[1] else all_of).append(lookup[0])
+        if features:
+            feature_rows = db.feature_rows(all_of, none_of=none_of)
+            units.append((features, (len(feature_rows), lambda: feature_rows)))
+        indexed = [unit for unit in units if unit[1] is not None]
+        if not indexed:
+            return None
+        
+        # Start from the smallest candidate set and check the other parts per candidate
+        drivers, (size, rows) = min(indexed, key=lambda unit: unit[1][0])
+        rest = [part for part in self.parts if not any(part is driver for driver in drivers)]
+        if not rest:
+            return size, rows
+        check = And(rest).compile(db)
+        motorcycles = db.motorcycles
+        return size, lambda: [row for row in rows() if check(motorcycles[row])]
+
+class Or(Expression):
+    """At least one part must match"""
+    
+    def __init__(self, parts):
+        self.parts = []
+        for part in parts:
+            self.parts.extend(part.parts if isinstance(part, Or) else [part])
+    
+    def __repr__(self):
+        return '(' + ' | '.join(map(repr, self.parts)) + ')'
+    
+    def source(self, compiler, db):
+        units = sorted((part.source(compiler, db) for part in self.parts), key=lambda unit: rank_or(unit[1], unit[2]))
+        rejected = 1
+        for _, _, selectivity in units:
+            rejected *= 1 - selectivity
+        return '(' + ' or '.join(code for code, _, _ in units) + ')', sum(cost for _, cost, _ in units), 1 - rejected
+    
+    def plan(self, db):
+        plans = [part.plan(db) for part in self.parts]
+        if any(plan is None for plan in plans):
+            return None
+        
+        def rows():
+            matched = set()
+            for _, part_rows in plans:
+                matched.update(part_rows())
+            return matched
+        return sum(size for size, _ in plans), rows
+
+class Not(Expression):
+    """The part must not match"""
+    
+    def __init__(self, part):
+        self.part = part
+    
+    def __repr__(self):
+        return f"~{self.part!r}"
+    
+    def source(self, compiler, db):
+        code, cost, selectivity = self.part.source(compiler, db)
+        return f'(not {code})', cost, 1 - selectivity
+    
+    def plan(self, db):
+        lookup = feature_lookup(self)
+        if lookup is None:
+            return None
+        rows = db.feature_rows(none_of=[lookup[0]])
+        return len(rows), lambda: rows
+
+def Q(**lookups):
+    """Get the expression matching every field__lookup=value given (exact when no lookup)"""
+    if not lookups:
+        raise TypeError("Q() needs at least one condition")
+    conditions = []
+    for name, value in lookups.items():
+        field, _, lookup = name.partition('__')
+        conditions.append(Condition(field, lookup or 'exact', value))
+    return conditions[0] if len(conditions) == 1 else And(conditions)
+
+def main():
+    """Compare a nested filter chain with a compiled query and an indexed one"""
+    from example_usage import filter_by_brand, filter_by_displacement, filter_by_price_range
+    from motorcycle_db import MotorcycleDB
+    
+    parser = argparse.ArgumentParser(description="Run a compiled query expression against a motorcycle database")
+    parser.add_argument('filename', nargs='?', default='complete_motorcycle_database.json',
+                        help="database file, .json or .ndjson (default: complete_motorcycle_database.json)")
+    args = parser.parse_args()
+    
+    motorcycles = load_database_file(args.filename)['motorcycles']
+    query = Q(brand__iexact='Yamaha') & Q(cc__between=(250, 600)) & Q(price__lte=200000)
+    print(f"Query: {query!r}")
+    
+    start = time.perf_counter()
+    nested = filter_by_price_range(filter_by_displacement(filter_by_brand(motorcycles, 'Yamaha'), 250, 600), 200000)
+    print(f"Nested filters: {len(nested)} models in {(time.perf_counter() - start) * 1000:.1f} ms")
+    
+    start = time.perf_counter()
+    fused = list(query.filter(motorcycles))
+    print(f"Compiled query: {len(fused)} models in {(time.perf_counter() - start) * 1000:.1f} ms")
+    
+    db = MotorcycleDB(motorcycles)
+    start = time.perf_counter()
+    indexed = db.filter(query)
+    print(f"Indexed query:  {len(indexed)} models in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Top-K Motorcycle Rankings
+
+Ranked questions such as "cheapest 20 Sport bikes", "most powerful scooter of
+each brand" or "best km/L under 125cc" need only the best k records, not a
+sorted copy of every match. The functions here select them in one pass over
+any record iterable (lists, NDJSON files, the streaming reader) with bounded
+heaps, so a pass over n records costs O(n log k) time and O(k) memory per
+group.
+
+On a MotorcycleDB, top() and top_by_group() walk presorted index arrays
+instead and stop as soon as k matches are found (see motorcycle_db).
+
+Records without a value for the ranked field (electric motors have no
+displacement, some records no fuel figure) are left out. Ties keep the
+record that comes first.
+
+Usage:
+    python3 motorcycle_ranking.py complete_motorcycle_database.ndjson
+"""
+
+import argparse
+import heapq
+from itertools import count
+
+from motorcycle_fields import (displacement_cc, fuel_efficiency_km_l, model_year, power_hp, price_min,
+                               torque_nm, weight_kg)
+from motorcycle_io import iter_records
+
+# Fields that can be ranked and the parser that extracts them
+RANK_FIELDS = {
+    'price': price_min,
+    'power': power_hp,
+    'torque': torque_nm,
+    'fuel_efficiency': fuel_efficiency_km_l,
+    'weight': weight_kg,
+    'displacement': displacement_cc,
+    'year': model_year,
+}
+
+def rank_parser(field):
+    """Get the parser of a ranked field"""
+    try:
+        return RANK_FIELDS[field]
+    except KeyError:
+        raise ValueError(f"cannot rank by {field}; choose from {', '.join(RANK_FIELDS)}")
+
+def predicate(where):
+    """Get a record predicate from a Q expression (see motorcycle_query), a function or None"""
+    if where is None or callable(where) and not hasattr(where, 'compile'):
+        return where
+    return where.compile()
+
+def matching(motorcycles, where):
+    """Yield the records matching a Q expression, a predicate or None (everything)"""
+    if where is None:
+        return iter(motorcycles)
+    if hasattr(where, 'filter'):
+        # Generated scan loop: no function call per record
+        return where.filter(motorcycles)
+    return (m for m in motorcycles if where(m))
+
+class TopK:
+    """Bounded heap keeping the k best (value, record) pairs pushed into it"""
+    
+    def __init__(self, k, largest=False):
+        self.k = k
+        self.sign = 1 if largest else -1
+        # Min-heap of (signed value, -arrival, record): the root is the worst kept entry
+        self.heap = []
+        self.arrivals = count()
+    
+    def push(self, value, record):
+        """Offer one record"""
+        key = self.sign * value
+        heap = self.heap
+        if len(heap) < self.k:
+            heapq.heappush(heap, (key, -next(self.arrivals), record))
+        elif key > heap[0][0]:
+            # Equal values do not replace: the record that came first is kept
+            heapq.heapreplace(heap, (key, -next(self.arrivals), record))
+    
+    def records(self):
+        """Get the kept records, best first"""
+        return [record for _, _, record in sorted(self.heap, key=lambda entry: entry[:2], reverse=True)]
+
+def top_k(motorcycles, field, k=10, largest=False, where=None):
+    """Get the k records with the lowest (or largest) value of field, best first
+    
+    where is an optional Q expression or predicate the records must match.
+    """
+    parse = rank_parser(field)
+    if k <= 0:
+        return []
+    
+    # TopK.push inlined: this loop runs once per record
+    sign = 1 if largest else -1
+    heap = []
+    for arrival, m in enumerate(matching(motorcycles, where)):
+        value = parse(m)
+        if value is None:
+            continue
+        key = sign * value
+        if len(heap) < k:
+            heapq.heappush(heap, (key, -arrival, m))
+        elif key > heap[0][0]:
+            heapq.heapreplace(heap, (key, -arrival, m))
+    return [m for _, _, m in sorted(heap, key=lambda entry: entry[:2], reverse=True)]
+
+def top_k_by_group(motorcycles, field, k=10, group_by='brand', largest=False, where=None):
+    """Get the k best records of every group (brand, type, ...), best first
+    
+    Returns {group value: records}, with the groups in order of first appearance.
+    """
+    parse = rank_parser(field)
+    groups = {}
+    if k <= 0:
+        return groups
+    for m in matching(motorcycles, where):
+        value = parse(m)
+        if value is None:
+            continue
+        best = groups.get(m.get(group_by))
+        if best is None:
+            best = groups[m.get(group_by)] = TopK(k, largest)
+        best.push(value, m)
+    return {group: best.records() for group, best in groups.items()}
+
+def main():
+    """Answer a few ranked questions in one streaming pass each"""
+    from motorcycle_query import Q
+    
+    parser = argparse.ArgumentParser(description="Rank motorcycles without sorting the whole database")
+    parser.add_argument('filename', nargs='?', default='complete_motorcycle_database.json',
+                        help="database file, .json or .ndjson (default: complete_motorcycle_database.json)")
+    parser.add_argument('-k', type=int, default=5, help="records per ranking (default: 5)")
+    args = parser.parse_args()
+    
+    print(f"Cheapest {args.k} sport bikes:")
+    for m in top_k(iter_records(args.filename), 'price', args.k, where=Q(type__icontains='sport')):
+        print(f"  {m['brand']} {m['model']} - {m['price_range']}")
+    
+    print(f"\nBest fuel efficiency under 125cc:")
+    for m in top_k(iter_records(args.filename), 'fuel_efficiency', args.k, largest=True, where=Q(cc__lt=125)):
+        print(f"  {m['brand']} {m['model']} - {m.get('fuel_efficiency', 'n/a')}")
+    
+    print(f"\nMost powerful scooter per brand:")
+    groups = top_k_by_group(iter_records(args.filename), 'power', 1, largest=True, where=Q(type__icontains='scooter'))
+    for brand, (m,) in sorted(groups.items()):
+        print(f"  {brand}: {m['model']} - {m['engine']['power']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Similar Motorcycle Recommendations
+
+SimilarityIndex turns every record into one row of a float32 matrix, built
+once at load time:
+- displacement, power, torque, price, weight, seat height and fuel
+  efficiency as z-scores (missing values, such as the displacement of an
+  electric motor, sit at the mean so they neither attract nor repel)
+- one column per feature of the feature bitmask index (see feature_index),
+  scaled by FEATURE_WEIGHT
+
+k-nearest-neighbour lookups are then answered for a whole batch of queries
+at once: squared Euclidean distances come from one matrix product per block
+of queries and np.argpartition picks the k nearest without sorting every
+distance. For large catalogues an optional coarse index (k-means partitions)
+limits each query to the records of its nearest partitions.
+
+Usage:
+    python3 motorcycle_recommend.py taiwan_specific_motorcycles.json 勁戰 -k 5
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from feature_index import WORD_BITS, FeatureIndex
+from motorcycle_fields import (displacement_cc, fuel_efficiency_km_l, power_hp, price_min,
+                               seat_height_mm, torque_nm, weight_kg)
+from motorcycle_io import load_database_file
+
+# Numeric specs compared and the parser that extracts them
+SPEC_FIELDS = {
+    'displacement_cc': displacement_cc,
+    'power_hp': power_hp,
+    'torque_nm': torque_nm,
+    'price_min': price_min,
+    'weight_kg': weight_kg,
+    'seat_height_mm': seat_height_mm,
+    'fuel_efficiency_km_l': fuel_efficiency_km_l,
+}
+
+# Distance one differing feature adds, relative to one standard deviation of a spec
+FEATURE_WEIGHT = 0.5
+
+# Queries whose distances are computed together; bounds the block to BATCH_SIZE x records
+BATCH_SIZE = 256
+
+# Partitions searched per query when the coarse index is used
+DEFAULT_PROBES = 3
+
+# k-means rounds when building the coarse index
+KMEANS_ITERATIONS = 10
+
+def parse_specs(motorcycles):
+    """Get the (records x SPEC_FIELDS) array of specs, NaN where a record has none"""
+    specs = [[np.nan if value is None else value for value in (parse(m) for parse in SPEC_FIELDS.values())]
+             for m in motorcycles]
+    return np.array(specs, dtype=np.float64).reshape(len(specs), len(SPEC_FIELDS))
+
+def squared_distances(queries, vectors, norms):
+    """Get the (queries x vectors) squared Euclidean distances, |q|^2 + |v|^2 - 2 q.v"""
+    distances = norms[np.newaxis, :] - 2 * queries @ vectors.T
+    distances += np.einsum('ij,ij->i', queries, queries)[:, np.newaxis]
+    # Rounding can leave tiny negatives where the distance is zero
+    return np.maximum(distances, 0, out=distances)
+
+def nearest(distances, k):
+    """Get the column numbers of the k smallest distances of every row, nearest first"""
+    k = min(k, distances.shape[1])
+    if k <= 0:
+        return np.empty((len(distances), 0), dtype=np.intp)
+    if k < distances.shape[1]:
+        candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(k), (len(distances), k))
+    order = np.argsort(np.take_along_axis(distances, candidates, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
+
+def kmeans(vectors, clusters, iterations=KMEANS_ITERATIONS, seed=0):
+    """Get (centroids, cluster of every vector) of a k-means clustering"""
+    rng = np.random.default_rng(seed)
+    clusters = max(1, min(clusters, len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    norms = np.einsum('ij,ij->i', vectors, vectors)
+    for _ in range(iterations):
+        assignment = np.argmin(squared_distances(centroids, vectors, norms), axis=0)
+        counts = np.bincount(assignment, minlength=clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        filled = counts > 0
+        # Empty clusters keep their centroid
+        centroids[filled] = sums[filled] / counts[filled, np.newaxis]
+    assignment = np.argmin(squared_distances(centroids, vectors, norms), axis=0)
+    return centroids, assignment
+
+class SimilarityIndex:
+    """Spec and feature vectors of a motorcycle catalogue, for nearest-neighbour lookups"""
+    
+    def __init__(self, motorcycles, feature_weight=FEATURE_WEIGHT):
+        self.motorcycles = list(motorcycles)
+        self.feature_weight = feature_weight
+        
+        # Specs: z-scores with the catalogue's mean and standard deviation
+        specs = parse_specs(self.motorcycles)
+        self.means = np.zeros(len(SPEC_FIELDS))
+        self.scales = np.ones(len(SPEC_FIELDS))
+        present = ~np.isnan(specs)
+        for column in range(len(SPEC_FIELDS)):
+            values = specs[present[:, column], column]
+            if len(values):
+                self.means[column] = values.mean()
+                self.scales[column] = values.std() or 1.0
+        
+        # Features: the bits of the feature index, one column per feature that occurs
+        self.feature_index = FeatureIndex(self.motorcycles)
+        bits = self.feature_bits(self.feature_index.masks)
+        self.feature_columns = np.flatnonzero(bits.any(axis=0))
+        
+        self.vectors = np.hstack([self.spec_vectors(specs),
+                                  bits[:, self.feature_columns] * np.float32(feature_weight)]).astype(np.float32)
+        self.norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+        
+        # Lowercase model name -> first row with it
+        self.model_rows = {}
+        for row, m in enumerate(self.motorcycles):
+            self.model_rows.setdefault(m['model'].lower(), row)
+        
+        # Coarse index, built by partition()
+        self.centroids = None
+        self.partitions = None
+        self.partition_vectors = None
+        self.partition_norms = None
+        self.probes = DEFAULT_PROBES
+    
+    def __len__(self):
+        return len(self.motorcycles)
+    
+    def find(self, model):
+        """Get the row of the model named model (case-insensitive), else of the first containing it, or None"""
+        model = model.lower()
+        row = self.model_rows.get(model)
+        if row is None:
+            row = next((row for name, row in self.model_rows.items() if model in name), None)
+        return row
+    
+    def spec_vectors(self, specs):
+        """Get the z-scores of a (records x SPEC_FIELDS) array, missing values at 0"""
+        scores = (specs - self.means) / self.scales
+        return np.nan_to_num(scores, nan=0.0).astype(np.float32)
+    
+    @staticmethod
+    def feature_bits(masks):
+        """Unpack (words x records) feature masks into a (records x bits) 0/1 array"""
+        shifts = np.arange(WORD_BITS, dtype=np.uint64)
+        bits = [(masks[word][:, np.newaxis] >> shifts) & np.uint64(1) for word in range(len(masks))]
+        return np.hstack(bits).astype(np.float32)
+    
+    def encode(self, motorcycles):
+        """Get the vectors of records that need not be in the catalogue
+        
+        Features the catalogue never has are left out: they cannot bring a
+        record closer to any catalogue entry.
+        """
+        motorcycles = list(motorcycles)
+        specs = parse_specs(motorcycles)
+        vocabulary = self.feature_index.vocabulary
+        bits = np.zeros((len(motorcycles), len(self.feature_columns)), dtype=np.float32)
+        positions = {int(bit): column for column, bit in enumerate(self.feature_columns)}
+        for row, m in enumerate(motorcycles):
+            for feature in m.get('features', ()):
+                column = positions.get(vocabulary.bits.get(feature))
+                if column is not None:
+                    bits[row, column] = 1
+        return np.hstack([self.spec_vectors(specs), bits * np.float32(self.feature_weight)]).astype(np.float32)
+    
+    def partition(self, partitions, probes=DEFAULT_PROBES, k=10, iterations=KMEANS_ITERATIONS, seed=0):
+        """Build the coarse index: k-means partitions, of which queries search the probes nearest
+        
+        Lookups become approximate: a neighbour in a partition that is not
+        probed is missed. k is the number of results lookups will ask for:
+        partitions are capped at len(self) // k, so that a partition holds k
+        records on average and the probes can fill k results. Returns self.
+        """
+        partitions = max(1, min(partitions, len(self) // max(k, 1)))
+        self.centroids, assignment = kmeans(self.vectors, partitions, iterations, seed)
+        order = np.argsort(assignment, kind='stable')
+        bounds = np.searchsorted(assignment[order], np.arange(len(self.centroids) + 1))
+        self.partitions = [order[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        # Each partition's vectors copied together, so its distance block reads contiguous memory
+        self.partition_vectors = [self.vectors[members] for members in self.partitions]
+        self.partition_norms = [self.norms[members] for members in self.partitions]
+        self.probes = probes
+        return self
+    
+    def search(self, queries, k=10, exclude=None):
+        """Get the (row numbers, squared distances) of the k nearest records of every query vector
+        
+        exclude optionally gives one row per query that must not be returned
+        (the query's own record); -1 excludes nothing. Both results are
+        (queries x k) arrays, nearest first.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        exclude = np.full(len(queries), -1) if exclude is None else np.asarray(exclude)
+        k = max(0, min(k, len(self) - int((exclude >= 0).any())))
+        if self.partitions is None:
+            return self.search_all(queries, k, exclude)
+        return self.search_partitions(queries, k, exclude)
+    
+    def search_all(self, queries, k, exclude):
+        """Exact search: distances to every record, BATCH_SIZE queries at a time"""
+        rows = np.empty((len(queries), k), dtype=np.intp)
+        distances = np.empty((len(queries), k), dtype=np.float32)
+        for start in range(0, len(queries), BATCH_SIZE):
+            block = slice(start, start + BATCH_SIZE)
+            block_distances = squared_distances(queries[block], self.vectors, self.norms)
+            excluded = np.flatnonzero(exclude[block] >= 0)
+            block_distances[excluded, exclude[block][excluded]] = np.inf
+            found = nearest(block_distances, k)
+            rows[block] = found
+            distances[block] = np.take_along_axis(block_distances, found, axis=1)
+        return rows, distances
+    
+    def search_partitions(self, queries, k, exclude):
+        """Approximate search: distances to the records of each query's nearest partitions
+        
+        Every partition computes one distance block for all the queries that
+        probe it and keeps their k nearest; the best k of those per query are
+        the result. Slots a query finds no candidate for hold -1 and an
+        infinite distance.
+        """
+        centroid_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        probed = nearest(squared_distances(queries, self.centroids, centroid_norms), self.probes)
+        # k candidates per probe of every query
+        rows = np.full((len(queries), probed.shape[1] * k), -1, dtype=np.intp)
+        distances = np.full((len(queries), probed.shape[1] * k), np.inf, dtype=np.float32)
+        
+        for partition, members in enumerate(self.partitions):
+            # Queries probing this partition and which of their probes it is
+            group, probe = np.nonzero(probed == partition)
+            if not len(group) or not len(members):
+                continue
+            block = squared_distances(queries[group], self.partition_vectors[partition],
+                                      self.partition_norms[partition])
+            # Members are in row order: find each query's excluded row among them
+            positions = np.minimum(np.searchsorted(members, exclude[group]), len(members) - 1)
+            hit = np.flatnonzero((exclude[group] >= 0) & (members[positions] == exclude[group]))
+            block[hit, positions[hit]] = np.inf
+            found = nearest(block, k)
+            columns = probe[:, np.newaxis] * k + np.arange(found.shape[1])
+            rows[group[:, np.newaxis], columns] = members[found]
+            distances[group[:, np.newaxis], columns] = np.take_along_axis(block, found, axis=1)
+        
+        best = nearest(distances, k)
+        rows = np.take_along_axis(rows, best, axis=1)
+        distances = np.take_along_axis(distances, best, axis=1)
+        rows[~np.isfinite(distances)] = -1
+        return rows, distances
+    
+    def similar_rows(self, rows, k=10):
+        """Get the row numbers of the k records most similar to each given row, nearest first"""
+        rows = np.asarray(rows, dtype=np.intp)
+        found, _ = self.search(self.vectors[rows], k, exclude=rows)
+        return found
+    
+    def similar(self, rows, k=10):
+        """Get the k records most similar to each given row (a list of lists, nearest first)"""
+        return [[self.motorcycles[row] for row in found if row >= 0]
+                for found in self.similar_rows(rows, k).tolist()]
+    
+    def similar_to(self, motorcycles, k=10):
+        """Get the k catalogue records most similar to each given record"""
+        found, _ = self.search(self.encode(motorcycles), k)
+        return [[self.motorcycles[row] for row in rows if row >= 0] for rows in found.tolist()]
+
+def main():
+    """Recommend similar motorcycles and time batched lookups"""
+    parser = argparse.ArgumentParser(description="Find motorcycles similar to a given model")
+    parser.add_argument('filename', nargs='?', default='taiwan_specific_motorcycles.json',
+                        help="database file, .json or .ndjson (default: taiwan_specific_motorcycles.json)")
+    parser.add_argument('model', nargs='?', help="model name (default: the first record)")
+    parser.add_argument('-k', type=int, default=5, help="recommendations per model (default: 5)")
+    parser.add_argument('--partitions', type=int, default=0,
+                        help="build a coarse index with this many k-means partitions (default: exact search)")
+    parser.add_argument('--probes', type=int, default=DEFAULT_PROBES,
+                        help=f"partitions searched per query (default: {DEFAULT_PROBES})")
+    parser.add_argument('--batch', type=int, default=50, help="lookups in the timed batch (default: 50)")
+    args = parser.parse_args()
+    
+    motorcycles = load_database_file(args.filename)['motorcycles']
+    start = time.perf_counter()
+    index = SimilarityIndex(motorcycles)
+    print(f"Indexed {len(index)} motorcycles as {index.vectors.shape[1]}-dimensional vectors "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+    
+    row = index.find(args.model) if args.model else 0
+    if row is None:
+        print(f"No model named {args.model}")
+        return
+    bike = motorcycles[row]
+    print(f"\nSimilar to {bike['brand']} {bike['model']} ({bike['type']}, {bike['engine']['displacement']}, "
+          f"{bike['price_range']}):")
+    for m in index.similar([row], args.k)[0]:
+        print(f"  {m['brand']} {m['model']} - {m['type']}, {m['engine']['displacement']}, {m['price_range']}")
+    
+    batch = np.random.default_rng(0).choice(len(index), min(args.batch, len(index)), replace=False)
+    start = time.perf_counter()
+    exact = index.similar_rows(batch, args.k)
+    print(f"\n{len(batch)} exact lookups in {(time.perf_counter() - start) * 1000:.1f} ms")
+    
+    if args.partitions:
+        start = time.perf_counter()
+        index.partition(args.partitions, args.probes, args.k)
+        print(f"Partitioned into {len(index.partitions)} clusters in {(time.perf_counter() - start) * 1000:.0f} ms")
+        start = time.perf_counter()
+        approximate = index.similar_rows(batch, args.k)
+        elapsed = time.perf_counter() - start
+        recall = np.mean([len(set(a) & set(e)) / max(len(e), 1)
+                          for a, e in zip(approximate.tolist(), exact.tolist())])
+        print(f"{len(batch)} partitioned lookups ({args.probes} probes) in {elapsed * 1000:.1f} ms, "
+              f"recall {recall:.0%}")
+
+if __name__ == "__main__":
+    main()
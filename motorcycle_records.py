@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Compact Motorcycle Records
+
+Motorcycle and Engine hold a record in __slots__ attributes instead of nested
+dicts, which cuts the memory of a loaded catalogue several-fold:
+- brand, type, availability, feature and other repeated strings are interned,
+  so every record shares one copy of each
+- display strings ("150cc", "9.6 hp", "NT$ 65,000 - 72,000", "104 kg", ...)
+  are stored as the numbers behind them and formatted again on access
+- features are a tuple, and the key order of each record shape is one shared
+  tuple
+
+Conversion is lossless: Motorcycle.from_dict(m).to_dict() == m for both
+databases and both schema versions. A display string that does not come back
+exactly from its numbers is kept as text.
+
+Records also support read-only mapping access (m['brand'], m.get('weight'),
+'availability' in m, m['engine']['power']), so the filter and analysis helpers
+of the usage scripts accept them unchanged. Lookups see the numeric schema 2
+fields (displacement_cc, price_min, weight_kg, ...) even for schema 1 records,
+so the motorcycle_fields parsers read the stored numbers without parsing text.
+
+Usage:
+    python3 motorcycle_records.py taiwan_specific_motorcycles.json
+"""
+
+import argparse
+import re
+import sys
+import tracemalloc
+
+from motorcycle_fields import YEAR_PATTERN
+from motorcycle_io import iter_records, read_header
+
+# Plain text fields, interned
+TEXT_FIELDS = ('brand', 'model', 'model_english', 'type', 'availability', 'category', 'target_audience')
+
+NUMBER = r'(\d+(?:\.\d+)?)'
+PRICE_PATTERN = re.compile(r'NT\$ ([\d,]+) - ([\d,]+)')
+FUEL_EFFICIENCY_PATTERN = re.compile(NUMBER + r' km/L')
+RANGE_PATTERN = re.compile(NUMBER + r' km/charge')
+WEIGHT_PATTERN = re.compile(NUMBER + r' kg')
+SEAT_HEIGHT_PATTERN = re.compile(NUMBER + r' mm')
+DISPLACEMENT_PATTERN = re.compile(r'(\d+)cc')
+POWER_PATTERN = re.compile(NUMBER + r' hp')
+ELECTRIC_POWER_PATTERN = re.compile(NUMBER + r' kW \(' + NUMBER + r' hp\)')
+TORQUE_PATTERN = re.compile(NUMBER + r' Nm')
+
+ELECTRIC_DISPLACEMENT = 'Electric Motor'
+
+def parse_number(text):
+    """Parse "93" as an int and "37.6" as a float, keeping how the text wrote it"""
+    return float(text) if '.' in text else int(text)
+
+def match_numbers(pattern, text):
+    """Get the numbers of a display string that fully matches pattern, or None"""
+    match = pattern.fullmatch(text)
+    return tuple(parse_number(group) for group in match.groups()) if match else None
+
+def parse_price_range(text):
+    """Parse "NT$ 65,000 - 72,000" as (price_min, price_max)"""
+    match = PRICE_PATTERN.fullmatch(text)
+    return (int(match.group(1).replace(',', '')), int(match.group(2).replace(',', ''))) if match else None
+
+def format_price_range(price_min, price_max):
+    """Format a price range the way the generators do"""
+    return f"NT$ {price_min:,} - {price_max:,}"
+
+def parse_fuel_efficiency(text):
+    """Parse "37.6 km/L" or "93 km/charge" as (fuel_efficiency_km_l, range_km)"""
+    efficiency = match_numbers(FUEL_EFFICIENCY_PATTERN, text)
+    if efficiency:
+        return efficiency[0], None
+    electric_range = match_numbers(RANGE_PATTERN, text)
+    return (None, electric_range[0]) if electric_range else None
+
+def format_fuel_efficiency(fuel_efficiency_km_l, range_km):
+    """Format fuel efficiency, or the range of an electric motorcycle"""
+    if fuel_efficiency_km_l is not None:
+        return f"{fuel_efficiency_km_l} km/L"
+    return f"{range_km} km/charge"
+
+def parse_displacement(text):
+    """Parse "150cc" as (150,) and "Electric Motor" as (None,)"""
+    if text == ELECTRIC_DISPLACEMENT:
+        return (None,)
+    return match_numbers(DISPLACEMENT_PATTERN, text)
+
+def format_displacement(displacement_cc):
+    """Format a displacement ("Electric Motor" for None)"""
+    return ELECTRIC_DISPLACEMENT if displacement_cc is None else f"{displacement_cc}cc"
+
+def parse_power(text):
+    """Parse "9.6 hp" or "5.0 kW (6.7 hp)" as (power_hp, power_kw)"""
+    power = match_numbers(POWER_PATTERN, text)
+    if power:
+        return power[0], None
+    electric_power = match_numbers(ELECTRIC_POWER_PATTERN, text)
+    return (electric_power[1], electric_power[0]) if electric_power else None
+
+def format_power(power_hp, power_kw):
+    """Format power in hp, with kW first for electric motors"""
+    if power_kw is not None:
+        return f"{power_kw:.1f} kW ({power_hp:.1f} hp)"
+    return f"{power_hp} hp"
+
+# Display field -> (numeric fields it is stored as, parser, formatter)
+MOTORCYCLE_DISPLAY_FIELDS = {
+    'price_range': (('price_min', 'price_max'), parse_price_range, format_price_range),
+    'fuel_efficiency': (('fuel_efficiency_km_l', 'range_km'), parse_fuel_efficiency, format_fuel_efficiency),
+    'weight': (('weight_kg',), lambda text: match_numbers(WEIGHT_PATTERN, text), lambda kg: f"{kg} kg"),
+    'seat_height': (('seat_height_mm',), lambda text: match_numbers(SEAT_HEIGHT_PATTERN, text), lambda mm: f"{mm} mm"),
+}
+
+ENGINE_DISPLAY_FIELDS = {
+    'displacement': (('displacement_cc',), parse_displacement, format_displacement),
+    'power': (('power_hp', 'power_kw'), parse_power, format_power),
+    'torque': (('torque_nm',), lambda text: match_numbers(TORQUE_PATTERN, text), lambda nm: f"{nm} Nm"),
+}
+
+# Key order tuples shared by every record of the same shape
+LAYOUTS = {}
+
+def shared_layout(keys):
+    """Get the shared copy of a key order tuple"""
+    keys = tuple(keys)
+    return LAYOUTS.setdefault(keys, keys)
+
+# Ints below this (years, cc, kg, mm, km) are shared like the interned strings;
+# larger ones such as prices are too varied to be worth it
+SHARED_INT_LIMIT = 10000
+SHARED_INTS = {}
+
+def shared_number(value):
+    """Get the shared copy of a small int (other values are kept as they are)"""
+    if type(value) is int and 0 <= value < SHARED_INT_LIMIT:
+        return SHARED_INTS.setdefault(value, value)
+    return value
+
+def intern_text(value):
+    """Intern a string field value (other values are kept as they are)"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+def load_display_fields(record, data, display_fields):
+    """Store the display fields of data as numbers on record; returns the values kept as text"""
+    text = {}
+    for field, (numeric_fields, parse, format_text) in display_fields.items():
+        numbers = None
+        if field in data:
+            numbers = parse(data[field]) if isinstance(data[field], str) else None
+        numbers = list(numbers or (None,) * len(numeric_fields))
+        # Stored schema 2 numbers win over the parsed ones
+        for index, numeric_field in enumerate(numeric_fields):
+            if numeric_field in data:
+                numbers[index] = data[numeric_field]
+        for numeric_field, number in zip(numeric_fields, numbers):
+            setattr(record, numeric_field, shared_number(number))
+        
+        if field in data:
+            try:
+                exact = format_text(*numbers) == data[field]
+            except (TypeError, ValueError):
+                exact = False
+            if not exact:
+                text[field] = data[field]
+    return text
+
+class RecordMapping:
+    """Read-only mapping access shared by Motorcycle and Engine"""
+    
+    __slots__ = ()
+    
+    def __getitem__(self, key):
+        """Get a field the way the record dict has it"""
+        value = self.lookup(key)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+    
+    def get(self, key, default=None):
+        """Get a field, or default when the record does not have it"""
+        value = self.lookup(key)
+        return default if value is MISSING else value
+    
+    def __contains__(self, key):
+        """Check whether the record has a field"""
+        return self.lookup(key) is not MISSING
+    
+    def keys(self):
+        """Get the keys of the record dict, in order"""
+        return self.layout
+    
+    def __iter__(self):
+        return iter(self.layout)
+    
+    def items(self):
+        """Get the (key, value) pairs of the record dict"""
+        return [(key, self[key]) for key in self.layout]
+    
+    def __eq__(self, other):
+        if isinstance(other, RecordMapping):
+            other = other.to_dict()
+        return self.to_dict() == other
+    
+    __hash__ = None
+    
+    def display_value(self, key, display_fields):
+        """Get a display field, from the kept text or formatted from its numbers"""
+        if self.text and key in self.text:
+            return self.text[key]
+        numeric_fields, _, format_text = display_fields[key]
+        return format_text(*(getattr(self, field) for field in numeric_fields))
+    
+    def numeric_value(self, key):
+        """Get a numeric field; absent from the layout it only exists when known"""
+        value = getattr(self, key)
+        if value is None and key not in self.layout:
+            return MISSING
+        return value
+
+MISSING = object()
+
+class Engine(RecordMapping):
+    """Engine specification of a motorcycle record"""
+    
+    __slots__ = ('type', 'displacement_cc', 'power_hp', 'power_kw', 'torque_nm', 'layout', 'text')
+    
+    NUMERIC_FIELDS = frozenset(field for numeric_fields, _, _ in ENGINE_DISPLAY_FIELDS.values()
+                               for field in numeric_fields)
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Build an Engine from the "engine" dict of a record"""
+        engine = cls.__new__(cls)
+        engine.layout = shared_layout(data)
+        engine.type = intern_text(data.get('type'))
+        text = load_display_fields(engine, data, ENGINE_DISPLAY_FIELDS)
+        for key in data:
+            if key != 'type' and key not in ENGINE_DISPLAY_FIELDS and key not in cls.NUMERIC_FIELDS:
+                text[key] = data[key]
+        engine.text = text or None
+        return engine
+    
+    def lookup(self, key):
+        """Get a field, or MISSING"""
+        if key in ENGINE_DISPLAY_FIELDS:
+            return self.display_value(key, ENGINE_DISPLAY_FIELDS) if key in self.layout else MISSING
+        if key in self.NUMERIC_FIELDS:
+            return self.numeric_value(key)
+        if key not in self.layout:
+            return MISSING
+        if key == 'type':
+            return self.type
+        return self.text[key]
+    
+    def to_dict(self):
+        """Get the engine as the dict it was built from"""
+        return {key: self.lookup(key) for key in self.layout}
+
+class Motorcycle(RecordMapping):
+    """One motorcycle record"""
+    
+    __slots__ = TEXT_FIELDS + ('model_year', 'year_as_text', 'engine', 'features',
+                               'price_min', 'price_max', 'fuel_efficiency_km_l', 'range_km',
+                               'weight_kg', 'seat_height_mm', 'layout', 'text')
+    
+    NUMERIC_FIELDS = frozenset(field for numeric_fields, _, _ in MOTORCYCLE_DISPLAY_FIELDS.values()
+                               for field in numeric_fields) | {'model_year'}
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Build a Motorcycle from a record dict"""
+        m = cls.__new__(cls)
+        m.layout = shared_layout(data)
+        for field in TEXT_FIELDS:
+            setattr(m, field, intern_text(data.get(field)))
+        m.engine = Engine.from_dict(data['engine']) if 'engine' in data else None
+        m.features = tuple(sys.intern(feature) for feature in data['features']) if 'features' in data else ()
+        text = load_display_fields(m, data, MOTORCYCLE_DISPLAY_FIELDS)
+        
+        # Model year: the field (a number, or text in schema 1) or the "(2023)" model suffix
+        year = data.get('model_year')
+        m.year_as_text = isinstance(year, str)
+        if m.year_as_text and year.isdigit() and str(int(year)) == year:
+            year = int(year)
+        elif m.year_as_text:
+            text['model_year'] = year
+            year = None
+        elif year is None and isinstance(m.model, str):
+            match = YEAR_PATTERN.search(m.model)
+            year = int(match.group(1)) if match else None
+        m.model_year = shared_number(year)
+        
+        known = set(TEXT_FIELDS) | {'engine', 'features'}
+        for key in data:
+            if key not in known and key not in MOTORCYCLE_DISPLAY_FIELDS and key not in cls.NUMERIC_FIELDS:
+                text[key] = data[key]
+        m.text = text or None
+        return m
+    
+    def lookup(self, key):
+        """Get a field, or MISSING"""
+        if key in MOTORCYCLE_DISPLAY_FIELDS:
+            return self.display_value(key, MOTORCYCLE_DISPLAY_FIELDS) if key in self.layout else MISSING
+        if key == 'model_year':
+            if self.text and key in self.text:
+                return self.text[key]
+            if self.year_as_text and self.model_year is not None:
+                return str(self.model_year)
+        if key in self.NUMERIC_FIELDS:
+            return self.numeric_value(key)
+        if key not in self.layout:
+            return MISSING
+        if key == 'engine':
+            return self.engine
+        if key == 'features':
+            return self.features
+        if key in TEXT_FIELDS:
+            return getattr(self, key)
+        return self.text[key]
+    
+    def to_dict(self):
+        """Get the record as the dict it was built from"""
+        record = {}
+        for key in self.layout:
+            if key == 'engine':
+                record[key] = self.engine.to_dict()
+            elif key == 'features':
+                record[key] = list(self.features)
+            else:
+                record[key] = self.lookup(key)
+        return record
+    
+    def __repr__(self):
+        return f"Motorcycle({self.brand!r}, {self.model!r})"
+
+def from_dicts(motorcycles):
+    """Convert record dicts to Motorcycle objects, one at a time"""
+    for m in motorcycles:
+        yield Motorcycle.from_dict(m)
+
+def to_dicts(motorcycles):
+    """Convert Motorcycle objects back to record dicts, one at a time"""
+    for m in motorcycles:
+        yield m.to_dict()
+
+def load_records(filename):
+    """Load a database file (JSON or NDJSON) as its header plus a list of Motorcycle objects
+    
+    Records are converted as they are read, so the record dicts are never all
+    in memory at once.
+    """
+    data = read_header(filename)
+    data['motorcycles'] = list(from_dicts(iter_records(filename)))
+    return data
+
+def traced_size(load):
+    """Get the memory held by the result of load() in bytes, and the result"""
+    tracemalloc.start()
+    try:
+        result = load()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return size, result
+
+def main():
+    """Compare the memory of a catalogue loaded as dicts and as Motorcycle objects"""
+    parser = argparse.ArgumentParser(description="Measure the memory of a catalogue loaded as compact records")
+    parser.add_argument('filename', nargs='?', default='taiwan_specific_motorcycles.json',
+                        help="database file, .json or .ndjson (default: taiwan_specific_motorcycles.json)")
+    args = parser.parse_args()
+    
+    dict_size, dicts = traced_size(lambda: list(iter_records(args.filename)))
+    record_size, records = traced_size(lambda: load_records(args.filename)['motorcycles'])
+    
+    lossless = all(record.to_dict() == m for record, m in zip(records, dicts))
+    print(f"Records: {len(records)}")
+    print(f"As dicts: {dict_size / 1e6:.1f} MB ({dict_size / max(len(dicts), 1):.0f} bytes/record)")
+    print(f"As Motorcycle objects: {record_size / 1e6:.1f} MB ({record_size / max(len(records), 1):.0f} bytes/record)")
+    print(f"Reduction: {dict_size / max(record_size, 1):.1f}x, lossless: {lossless}")
+
+if __name__ == "__main__":
+    main()
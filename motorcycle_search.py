@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Motorcycle Model Search
+
+SearchIndex answers free-text lookups such as "勁戰", "jet sl" or "ninja 4"
+without scanning the records. It is built once at load time:
+- a token index: term -> the distinct field values (model, model_english,
+  brand, features) containing it, and value -> row numbers. Latin text is
+  split into lowercase words; Chinese, Japanese and Korean runs, which have
+  no spaces, are indexed as single characters and overlapping bigrams
+- a sorted vocabulary searched with bisect for prefix matches ("nin" -> ninja)
+- a character trigram index over the vocabulary for fuzzy matches, verified
+  with a bounded edit distance ("kawasky" -> kawasaki)
+
+Fuzzy matches are only looked up for terms that match nothing as typed.
+Every query term must match; results are ranked by the sum of each term's
+best match quality (exact > prefix > fuzzy) times the weight of the field it
+matched in, then by database order.
+
+Usage:
+    python3 motorcycle_search.py taiwan_specific_motorcycles.json 勁戰
+"""
+
+import argparse
+import heapq
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from itertools import chain
+
+from motorcycle_io import load_database_file
+
+# Searched fields and how much a match in each counts
+FIELD_WEIGHTS = {
+    'model': 3.0,
+    'model_english': 3.0,
+    'brand': 2.0,
+    'features': 1.0,
+}
+
+# Match quality of an exact term; prefix and fuzzy matches score below it
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.5
+FUZZY_SCORE = 0.4
+
+# Vocabulary terms a prefix may expand to, in alphabetical order
+MAX_PREFIX_TERMS = 256
+# Minimum trigram (Dice) similarity before the edit distance is checked
+FUZZY_SIMILARITY = 0.4
+# A term matching this many times more rows than the remaining candidates is
+# checked per candidate instead of walking its postings
+ROW_CHECK_RATIO = 8
+# Tied row lists merged lazily when ranking a single term; more are sorted
+MERGE_LISTS = 16
+
+# Han, kana and hangul runs; everything else is split into latin words
+CJK_RUN = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+')
+WORD = re.compile(r'[^\W_]+')
+
+def normalize(text):
+    """Fold width and case so "ＰＣＸ", "PCX" and "pcx" are the same text"""
+    return unicodedata.normalize('NFKC', text).casefold()
+
+def tokenize(text, query=False):
+    """Split text into index terms
+    
+    CJK runs are indexed as characters and bigrams. In a query a CJK run of
+    two or more characters only uses its bigrams, which keeps "大地" from
+    matching every name with 大 in it.
+    """
+    text = normalize(text)
+    terms = []
+    position = 0
+    for run in CJK_RUN.finditer(text):
+        terms.extend(WORD.findall(text[position:run.start()]))
+        chars = run.group()
+        bigrams = [chars[i:i + 2] for i in range(len(chars) - 1)]
+        terms.extend(bigrams if query and bigrams else list(chars) + bigrams)
+        position = run.end()
+    terms.extend(WORD.findall(text[position:]))
+    return terms
+
+def is_cjk(term):
+    """Check whether a term comes from a CJK run"""
+    return CJK_RUN.fullmatch(term) is not None
+
+def trigrams(term):
+    """Get the padded character trigrams of a term"""
+    padded = f' {term} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def max_edits(term):
+    """Get the edit distance tolerated for a query term of this length"""
+    return 1 if len(term) <= 5 else 2
+
+def edit_distance(a, b, limit):
+    """Get the Levenshtein distance of a and b, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+def field_values(m):
+    """Yield the (field, text) pairs of a record that are searched"""
+    for field in FIELD_WEIGHTS:
+        value = m.get(field)
+        if isinstance(value, (list, tuple)):
+            for item in value:
+                yield field, item
+        elif value:
+            yield field, value
+
+class SearchIndex:
+    """Token, prefix and trigram indexes over the searchable fields of a catalogue"""
+    
+    def __init__(self, motorcycles):
+        self.motorcycles = motorcycles if isinstance(motorcycles, list) else list(motorcycles)
+        
+        # Distinct (field, text) values: id -> rows, and (field, text) -> id
+        self.value_ids = {}
+        self.value_fields = []
+        self.value_rows = []
+        # Token index: term -> ids of the values containing it
+        self.postings = defaultdict(list)
+        
+        for row, m in enumerate(self.motorcycles):
+            for field, text in field_values(m):
+                value_id = self.value_ids.get((field, text))
+                if value_id is None:
+                    value_id = self.value_ids[field, text] = len(self.value_rows)
+                    self.value_fields.append(field)
+                    self.value_rows.append([])
+                    for term in dict.fromkeys(tokenize(text)):
+                        self.postings[term].append(value_id)
+                rows = self.value_rows[value_id]
+                if not rows or rows[-1] != row:
+                    rows.append(row)
+        
+        # Prefix index: sorted vocabulary; fuzzy index: trigram -> latin terms
+        self.vocabulary = sorted(self.postings)
+        self.trigram_index = defaultdict(list)
+        for term in self.vocabulary:
+            if not is_cjk(term):
+                for gram in trigrams(term):
+                    self.trigram_index[gram].append(term)
+    
+    @classmethod
+    def load(cls, filename):
+        """Load a database file (JSON or NDJSON) and index it"""
+        return cls(load_database_file(filename)['motorcycles'])
+    
+    def __len__(self):
+        return len(self.motorcycles)
+    
+    def prefix_terms(self, prefix):
+        """Get the vocabulary terms that start with prefix (at most MAX_PREFIX_TERMS)"""
+        terms = []
+        position = bisect_left(self.vocabulary, prefix)
+        while (position < len(self.vocabulary) and len(terms) < MAX_PREFIX_TERMS
+               and self.vocabulary[position].startswith(prefix)):
+            terms.append(self.vocabulary[position])
+            position += 1
+        return terms
+    
+    def fuzzy_terms(self, term):
+        """Get (vocabulary term, edit distance) pairs within max_edits of term"""
+        grams = trigrams(term)
+        shared = defaultdict(int)
+        for gram in grams:
+            for candidate in self.trigram_index.get(gram, ()):
+                shared[candidate] += 1
+        
+        limit = max_edits(term)
+        matches = []
+        for candidate, count in shared.items():
+            if 2 * count / (len(grams) + len(candidate) + 2) < FUZZY_SIMILARITY:
+                continue
+            distance = edit_distance(term, candidate, limit)
+            if distance <= limit:
+                matches.append((candidate, distance))
+        return matches
+    
+    def term_matches(self, term, prefix=True, fuzzy=True):
+        """Get {vocabulary term: match quality} for one query term"""
+        matches = {}
+        if term in self.postings:
+            matches[term] = EXACT_SCORE
+        if is_cjk(term):
+            return matches
+        if prefix:
+            for candidate in self.prefix_terms(term):
+                if candidate != term:
+                    matches[candidate] = PREFIX_SCORE * (1 + len(term) / len(candidate))
+        if fuzzy and not matches and len(term) >= 3:
+            # Typos are only considered when the term matches nothing as typed
+            for candidate, distance in self.fuzzy_terms(term):
+                score = FUZZY_SCORE * (1 - distance / max(len(term), len(candidate)))
+                matches[candidate] = max(matches.get(candidate, 0), score)
+        return matches
+    
+    def value_scores(self, term, prefix=True, fuzzy=True):
+        """Get {value id: score} for one query term, the best match per value"""
+        scores = {}
+        for candidate, quality in self.term_matches(term, prefix, fuzzy).items():
+            for value_id in self.postings[candidate]:
+                score = quality * FIELD_WEIGHTS[self.value_fields[value_id]]
+                if score > scores.get(value_id, 0):
+                    scores[value_id] = score
+        return scores
+    
+    def row_score(self, row, scores):
+        """Get a row's best score for one query term (0 if it does not match)"""
+        best = 0
+        for key in field_values(self.motorcycles[row]):
+            score = scores.get(self.value_ids[key], 0)
+            if score > best:
+                best = score
+        return best
+    
+    def search_rows(self, query, limit=10, prefix=True, fuzzy=True):
+        """Get the (row, score) pairs of the best matches, best first (see search)"""
+        terms = list(dict.fromkeys(tokenize(query, query=True)))
+        if not terms:
+            return []
+        term_scores = [self.value_scores(term, prefix, fuzzy) for term in terms]
+        if not all(term_scores):
+            return []
+        
+        # Intersect from the term matching the fewest rows up
+        sizes = [sum(len(self.value_rows[value_id]) for value_id in scores) for scores in term_scores]
+        order = sorted(range(len(terms)), key=sizes.__getitem__)
+        if len(order) == 1:
+            return self.top_rows(term_scores[0], limit)
+        
+        candidates = self.row_scores(term_scores[order[0]])
+        for index in order[1:]:
+            scores = term_scores[index]
+            if sizes[index] > ROW_CHECK_RATIO * len(candidates):
+                # Much larger than the candidates: check each candidate's own values instead
+                matched = {row: self.row_score(row, scores) for row in candidates}
+            else:
+                matched = self.row_scores(scores, candidates)
+            candidates = {row: candidates[row] + score for row, score in matched.items() if score}
+            if not candidates:
+                return []
+        
+        best = heapq.nsmallest(limit, candidates.items(), key=lambda item: (-item[1], item[0]))
+        return best
+    
+    def row_scores(self, scores, within=None):
+        """Get {row: best score} for one query term, optionally only for rows in within"""
+        rows = {}
+        for value_id, score in scores.items():
+            for row in self.value_rows[value_id]:
+                if within is not None and row not in within:
+                    continue
+                if score > rows.get(row, 0):
+                    rows[row] = score
+        return rows
+    
+    def top_rows(self, scores, limit):
+        """Get the best (row, score) pairs of a single term without scoring every row
+        
+        Values are visited from the best score down, and rows of tied values are
+        merged in database order, so only about limit rows are touched.
+        """
+        by_score = defaultdict(list)
+        for value_id, score in scores.items():
+            by_score[score].append(self.value_rows[value_id])
+        
+        results = []
+        seen = set()
+        for score in sorted(by_score, reverse=True):
+            lists = by_score[score]
+            # A lazy merge pays off for a few long lists; many short ones are sorted outright
+            rows = heapq.merge(*lists) if len(lists) <= MERGE_LISTS else sorted(chain.from_iterable(lists))
+            for row in rows:
+                if row not in seen:
+                    seen.add(row)
+                    results.append((row, score))
+                    if len(results) >= limit:
+                        return results
+        return results
+    
+    def search(self, query, limit=10, prefix=True, fuzzy=True):
+        """Get the motorcycles best matching a free-text query
+        
+        Every query term has to match model, model_english, brand or a
+        feature, exactly or (unless disabled) as a prefix, or with a typo or
+        two when it matches nothing as typed.
+        Returns at most limit records, best match first.
+        """
+        return [self.motorcycles[row] for row, _ in self.search_rows(query, limit, prefix, fuzzy)]
+
+def main():
+    """Search a database file from the command line"""
+    parser = argparse.ArgumentParser(description="Search motorcycle models by name, brand or feature")
+    parser.add_argument('filename', help="database file, .json or .ndjson")
+    parser.add_argument('query', nargs='+', help="search terms (Chinese or English)")
+    parser.add_argument('--limit', type=int, default=10, help="number of results (default: 10)")
+    parser.add_argument('--exact', action='store_true', help="disable prefix and fuzzy matching")
+    args = parser.parse_args()
+    
+    start = time.perf_counter()
+    index = SearchIndex.load(args.filename)
+    print(f"Indexed {len(index)} motorcycles in {time.perf_counter() - start:.2f}s")
+    
+    query = ' '.join(args.query)
+    start = time.perf_counter()
+    results = index.search_rows(query, args.limit, prefix=not args.exact, fuzzy=not args.exact)
+    elapsed = time.perf_counter() - start
+    
+    print(f"{len(results)} results for {query!r} in {elapsed * 1000:.2f} ms:")
+    for row, score in results:
+        m = index.motorcycles[row]
+        english = m.get('model_english')
+        name = f"{m['model']} ({english})" if english and english != m['model'] else m['model']
+        print(f"  {score:5.2f}  {m['brand']} {name} - {m.get('model_year', '')} {m['type']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Motorcycle Database HTTP Service
+
+A long-lived asyncio HTTP/1.1 server (standard library only) that loads a
+database once and answers queries as JSON, instead of every consumer running
+a usage script and parsing the whole file per request. Queries go through a
+QueryCache (see query_cache), so repeated filters are served from memory and
+the database is reloaded when the file changes. The reload (hashing and
+parsing the file) runs in a worker thread while the current database keeps
+answering, and the new one is swapped in when it is ready. The search and
+similarity indexes and the analysis summary are likewise built in a worker
+thread, once per database version.
+
+Endpoints (GET):
+    /motorcycles         filtered records, paginated with offset and limit
+    /motorcycles/stream  every filtered record as NDJSON, chunked
+    /count               number of filtered records
+    /search?q=...        ranked full-text search (see motorcycle_search)
+    /similar?model=...   most similar motorcycles of one or more comma-separated
+                         models, in one batched lookup (see motorcycle_recommend)
+    /stats               analysis summary (see motorcycle_analytics)
+    /health              database version and cache counters
+
+Filters: brand, type, availability, category, min_cc, max_cc, min_price,
+max_price, min_year and max_year, with the meaning of MotorcycleDB.query.
+
+Usage:
+    python3 motorcycle_server.py taiwan_specific_motorcycles.json --port 8080
+    curl 'http://127.0.0.1:8080/motorcycles?brand=SYM&max_price=80000&limit=5'
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs, urlsplit
+
+from motorcycle_analytics import analyze_records
+from motorcycle_search import SearchIndex
+from query_cache import QueryCache
+
+log = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+MAX_SEARCH_RESULTS = 100
+MAX_SIMILAR_MODELS = 100
+MAX_SIMILAR_RESULTS = 50
+
+# Records per chunk of a streamed response; the writer is drained between chunks
+STREAM_BATCH = 500
+
+# Limits on what a client may send
+MAX_REQUEST_LINE = 8192
+MAX_HEADERS = 100
+
+# Query string parameter -> (MotorcycleDB.query condition, parser)
+FILTERS = {
+    'brand': ('brand', str),
+    'type': ('vehicle_type', str),
+    'availability': ('availability', str),
+    'category': ('category', str),
+    'min_cc': ('min_cc', int),
+    'max_cc': ('max_cc', int),
+    'min_price': ('min_price', int),
+    'max_price': ('max_price', int),
+    'min_year': ('min_year', int),
+    'max_year': ('max_year', int),
+}
+
+STATUS_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error',
+}
+
+class RequestError(Exception):
+    """A request the server answers with an error status"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def record_dict(record):
+    """json.dumps default hook for compact Motorcycle records"""
+    return record.to_dict()
+
+def encode_json(value):
+    """Encode a response body"""
+    return json.dumps(value, ensure_ascii=False, default=record_dict).encode('utf-8')
+
+def parse_conditions(params):
+    """Get the query conditions from the query string parameters"""
+    conditions = {}
+    for name, (condition, parse) in FILTERS.items():
+        if name in params:
+            try:
+                conditions[condition] = parse(params[name])
+            except ValueError:
+                raise RequestError(400, f"{name} must be a number, got {params[name]!r}")
+    return conditions
+
+def parse_int(params, name, default, minimum=0, maximum=None):
+    """Get an integer query string parameter within bounds"""
+    if name not in params:
+        return default
+    try:
+        value = int(params[name])
+    except ValueError:
+        raise RequestError(400, f"{name} must be a number, got {params[name]!r}")
+    if maximum is None and value < minimum:
+        raise RequestError(400, f"{name} must be at least {minimum}")
+    if maximum is not None and not minimum <= value <= maximum:
+        raise RequestError(400, f"{name} must be between {minimum} and {maximum}")
+    return value
+
+def build_search_index(db):
+    """Build the full-text search index of a database"""
+    return SearchIndex(db.motorcycles)
+
+def build_similarity_index(db):
+    """Build the similarity index of a database"""
+    # numpy is only needed once recommendations are asked for
+    from motorcycle_recommend import SimilarityIndex
+    return SimilarityIndex(db.motorcycles)
+
+def build_summary(db):
+    """Build the analysis summary of a database"""
+    return analyze_records(db.motorcycles).to_dict()
+
+class MotorcycleService:
+    """Request handlers over one database file"""
+    
+    def __init__(self, filename, cache_size=1024, compact=False):
+        # The file is checked by refresh() before every request, not by the cache itself
+        self.cache = QueryCache(filename, maxsize=cache_size, compact=compact, auto_refresh=False)
+        self.reloading = False
+        # Values derived from the database: name -> (version, value), and the builds in progress
+        self.derived = {}
+        self.builds = {}
+        self.routes = {
+            '/motorcycles': self.motorcycles,
+            '/motorcycles/stream': self.stream_motorcycles,
+            '/count': self.count,
+            '/search': self.search,
+            '/similar': self.similar,
+            '/stats': self.stats,
+            '/health': self.health,
+        }
+    
+    async def refresh(self):
+        """Reload the database in a worker thread if the file changed
+        
+        The request that notices the change waits for the reload; requests
+        arriving meanwhile are answered from the current database until the
+        new one is installed.
+        """
+        if self.reloading:
+            return
+        signature = self.cache.changed()
+        if signature is None:
+            return
+        self.reloading = True
+        try:
+            loop = asyncio.get_running_loop()
+            self.cache.install(*await loop.run_in_executor(None, self.cache.load_version, signature))
+        finally:
+            self.reloading = False
+    
+    async def motorcycles(self, params, writer, keep_alive, version):
+        """Filtered records, one page at a time"""
+        conditions = parse_conditions(params)
+        offset = parse_int(params, 'offset', 0)
+        limit = parse_int(params, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        rows = self.cache.query_rows(**conditions)
+        records = self.cache.db.motorcycles
+        await send_json(writer, 200, {
+            'total': len(rows),
+            'offset': offset,
+            'limit': limit,
+            'motorcycles': [records[row] for row in rows[offset:offset + limit]],
+        }, keep_alive)
+    
+    async def stream_motorcycles(self, params, writer, keep_alive, version):
+        """Every filtered record as NDJSON, sent in chunks as the client reads them
+        
+        HTTP/1.0 clients cannot read chunked transfer encoding: they get the
+        body unframed and the connection is closed after it.
+        """
+        rows = self.cache.query_rows(**parse_conditions(params))
+        records = self.cache.db.motorcycles
+        chunked = version != 'HTTP/1.0'
+        write_head(writer, 200, 'application/x-ndjson', None, keep_alive and chunked, chunked)
+        for start in range(0, len(rows), STREAM_BATCH):
+            lines = [json.dumps(records[row], ensure_ascii=False, default=record_dict)
+                     for row in rows[start:start + STREAM_BATCH]]
+            chunk = ('\n'.join(lines) + '\n').encode('utf-8')
+            writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+            await writer.drain()
+        if not chunked:
+            # The end of the body is the end of the connection
+            writer.close()
+            return
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+    
+    async def count(self, params, writer, keep_alive, version):
+        """Number of filtered records"""
+        await send_json(writer, 200, {'count': self.cache.count(**parse_conditions(params))}, keep_alive)
+    
+    async def search(self, params, writer, keep_alive, version):
+        """Ranked full-text search over model names, brands and features"""
+        if not params.get('q'):
+            raise RequestError(400, "q is required")
+        limit = parse_int(params, 'limit', 10, 1, MAX_SEARCH_RESULTS)
+        index = await self.derived_value('search', build_search_index)
+        await send_json(writer, 200, {'motorcycles': index.search(params['q'], limit)}, keep_alive)
+    
+    async def similar(self, params, writer, keep_alive, version):
+        """Most similar motorcycles of each listed model, found in one batched lookup"""
+        models = [model.strip() for model in params.get('model', '').split(',') if model.strip()]
+        if not models:
+            raise RequestError(400, "model is required")
+        if len(models) > MAX_SIMILAR_MODELS:
+            raise RequestError(400, f"at most {MAX_SIMILAR_MODELS} models per request")
+        k = parse_int(params, 'k', 10, 1, MAX_SIMILAR_RESULTS)
+        index = await self.derived_value('similarity', build_similarity_index)
+        rows = [index.find(model) for model in models]
+        found = iter(index.similar([row for row in rows if row is not None], k))
+        records = index.motorcycles
+        await send_json(writer, 200, {'results': [{
+            'model': model,
+            'motorcycle': records[row] if row is not None else None,
+            'similar': next(found) if row is not None else [],
+        } for model, row in zip(models, rows)]}, keep_alive)
+    
+    async def derived_value(self, name, build):
+        """Get a value built from the current database by build(db), once per database version
+        
+        The build runs on a worker thread so other requests are served
+        meanwhile; requests arriving during the build wait for the same one.
+        """
+        version = self.cache.version
+        derived = self.derived.get(name)
+        if derived is not None and derived[0] == version:
+            return derived[1]
+        pending = self.builds.get(name)
+        if pending is None or pending[0] != version:
+            loop = asyncio.get_running_loop()
+            pending = self.builds[name] = (version, loop.run_in_executor(None, build, self.cache.db))
+        try:
+            value = await pending[1]
+        finally:
+            # A failed build is dropped so the next request tries again
+            if self.builds.get(name) is pending:
+                del self.builds[name]
+        if self.cache.version == version:
+            self.derived[name] = (version, value)
+        return value
+    
+    async def stats(self, params, writer, keep_alive, version):
+        """Analysis summary, computed once per database version"""
+        await send_json(writer, 200, await self.derived_value('stats', build_summary), keep_alive)
+    
+    async def health(self, params, writer, keep_alive, version):
+        """Database version and cache counters"""
+        await send_json(writer, 200, {
+            'filename': self.cache.filename,
+            'motorcycles': len(self.cache.db),
+            'cache': self.cache.stats(),
+        }, keep_alive)
+    
+    async def handle(self, reader, writer):
+        """Serve the requests of one connection (HTTP/1.1 keep-alive)"""
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers = request
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                await self.dispatch(method, target, version, writer, keep_alive)
+                if not keep_alive or writer.is_closing():
+                    break
+        except RequestError as e:
+            await send_json(writer, e.status, {'error': str(e)}, False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    async def dispatch(self, method, target, version, writer, keep_alive):
+        """Route one request and answer errors as JSON"""
+        url = urlsplit(target)
+        try:
+            handler = self.routes.get(url.path.rstrip('/') or '/')
+            if handler is None:
+                raise RequestError(404, f"no such endpoint: {url.path}")
+            if method != 'GET':
+                raise RequestError(405, f"{method} is not supported")
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            await self.refresh()
+            await handler(params, writer, keep_alive, version)
+        except RequestError as e:
+            await send_json(writer, e.status, {'error': str(e)}, keep_alive)
+        except (TypeError, ValueError, FileNotFoundError) as e:
+            await send_json(writer, 500, {'error': str(e)}, keep_alive)
+        except Exception:
+            log.exception("%s %s failed", method, target)
+            await send_json(writer, 500, {'error': "internal server error"}, keep_alive)
+
+async def read_request(reader):
+    """Read a request line and headers; None when the client closed the connection"""
+    line = await reader.readline()
+    if not line:
+        return None
+    if len(line) > MAX_REQUEST_LINE:
+        raise RequestError(400, "request line too long")
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise RequestError(400, "malformed request line")
+    
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        if len(headers) >= MAX_HEADERS or len(line) > MAX_REQUEST_LINE:
+            raise RequestError(400, "too many or too long headers")
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    
+    # GET requests have no body; skip one if a client sent it anyway
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise RequestError(400, "malformed Content-Length")
+    if length < 0:
+        raise RequestError(400, "malformed Content-Length")
+    if length:
+        await reader.readexactly(length)
+    return method, target, version, headers
+
+def write_head(writer, status, content_type, length, keep_alive, chunked=True):
+    """Write the status line and headers
+    
+    Without a length the body is chunked, or with chunked=False ends when
+    the connection closes.
+    """
+    lines = [
+        f"HTTP/1.1 {status} {STATUS_REASONS[status]}",
+        f"Content-Type: {content_type}; charset=utf-8",
+    ]
+    if length is not None:
+        lines.append(f"Content-Length: {length}")
+    elif chunked:
+        lines.append("Transfer-Encoding: chunked")
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+async def send_json(writer, status, value, keep_alive):
+    """Write a complete JSON response"""
+    body = encode_json(value)
+    write_head(writer, status, 'application/json', len(body), keep_alive)
+    writer.write(body)
+    await writer.drain()
+
+async def serve(filename, host=DEFAULT_HOST, port=DEFAULT_PORT, cache_size=1024, compact=False):
+    """Load the database and serve it until cancelled"""
+    service = MotorcycleService(filename, cache_size, compact)
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Serving {len(service.cache.db)} motorcycles from {filename} on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+def main():
+    """Start the HTTP service"""
+    parser = argparse.ArgumentParser(description="Serve motorcycle database queries over HTTP")
+    parser.add_argument('filename', nargs='?', default='taiwan_specific_motorcycles.json',
+                        help="database file, .json or .ndjson (default: taiwan_specific_motorcycles.json)")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--cache-size', type=int, default=1024, help="cached queries kept (default: 1024)")
+    parser.add_argument('--compact', action='store_true',
+                        help="hold the catalogue as compact records (see motorcycle_records)")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(serve(args.filename, args.host, args.port, args.cache_size, args.compact))
+    except FileNotFoundError:
+        print(f"Error: {args.filename} not found!")
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
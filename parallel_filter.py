@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Parallel Chunked Loader and Filter
+
+Splits a database file into byte ranges that start on record boundaries,
+parses and filters each range in a process pool and yields the matching
+records in file order, so full-table scans use every core instead of one.
+
+- NDJSON files are split at line breaks
+- JSON files written by the generators (json.dump indent=2 layout) are split
+  where a record of the motorcycles array starts; any other JSON layout is
+  read with the serial streaming reader
+- the predicates are given as a FilterSpec, a picklable namedtuple that
+  mirrors filter_by_brand, filter_by_type, filter_by_displacement and
+  filter_by_price_range of the usage scripts
+
+Usage:
+    python3 parallel_filter.py complete_motorcycle_database.ndjson --brand Yamaha --max-price 200000
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import namedtuple
+
+from generation_shards import run_shards
+from motorcycle_fields import displacement_cc, price_min
+from motorcycle_io import is_ndjson, iter_records, read_header
+
+# Target bytes per chunk; small enough to spread a file over every worker,
+# large enough that the per-task overhead stays negligible
+CHUNK_SIZE = 4 << 20
+
+# Bytes read at a time while looking for a record boundary
+SCAN_SIZE = 1 << 16
+
+# Where records start in the indent=2 JSON layout: "    {" on its own line
+JSON_RECORD_START = b'\n    {\n'
+JSON_ARRAY_START = b'"motorcycles": ['
+JSON_ARRAY_END = b'\n  ]'
+
+FilterSpec = namedtuple('FilterSpec', ['brand', 'vehicle_type', 'min_cc', 'max_cc', 'max_price', 'electric'],
+                        defaults=[None, None, None, None, None, False])
+FilterSpec.__doc__ = """Picklable filter conditions; unset (None) conditions match everything
+
+brand: brand name, case-insensitive (filter_by_brand)
+vehicle_type: substring of the type, case-insensitive (filter_by_type)
+min_cc, max_cc: displacement bounds (filter_by_displacement)
+max_price: upper bound on the lower price (filter_by_price_range)
+electric: whether electric models pass a displacement filter without
+    max_cc, as in taiwan_specific_usage (example_usage drops them)
+"""
+
+def matches(spec, m):
+    """Check whether a record satisfies every condition of a FilterSpec"""
+    if spec.brand is not None and m['brand'].lower() != spec.brand.lower():
+        return False
+    if spec.vehicle_type is not None and spec.vehicle_type.lower() not in m['type'].lower():
+        return False
+    if spec.min_cc is not None or spec.max_cc is not None:
+        cc = displacement_cc(m)
+        if cc is None:
+            if not spec.electric or spec.max_cc is not None:
+                return False
+        else:
+            if spec.min_cc is not None and cc < spec.min_cc:
+                return False
+            if spec.max_cc is not None and cc > spec.max_cc:
+                return False
+    if spec.max_price is not None and price_min(m) > spec.max_price:
+        return False
+    return True
+
+def json_body(filename):
+    """Get the (start, end) byte range of the records in a generator-written JSON file
+    
+    start is where the first record's line begins and end where the array
+    closes; returns None when the file has a different layout.
+    """
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        head = f.read(SCAN_SIZE)
+        f.seek(max(0, size - SCAN_SIZE))
+        tail_start = f.tell()
+        tail = f.read()
+    
+    marker = head.find(JSON_ARRAY_START)
+    if marker < 0:
+        return None
+    start = marker + len(JSON_ARRAY_START)
+    if head[start:start + 1] == b']':
+        return start, start
+    if not head.startswith(JSON_RECORD_START, start):
+        return None
+    
+    close = tail.rfind(JSON_ARRAY_END)
+    if close < 0 or tail[close + len(JSON_ARRAY_END):].strip() != b'}':
+        return None
+    return start, tail_start + close
+
+def next_boundary(f, offset, delimiter, end):
+    """Get the position of the first delimiter at or after offset, or end"""
+    f.seek(offset)
+    position = offset
+    carry = b''
+    while position < end:
+        block = f.read(min(SCAN_SIZE, end - position))
+        if not block:
+            break
+        found = (carry + block).find(delimiter)
+        if found >= 0:
+            return min(position - len(carry) + found, end)
+        position += len(block)
+        carry = block[len(block) - (len(delimiter) - 1):]
+    return end
+
+def chunk_ranges(filename, chunk_size=CHUNK_SIZE):
+    """Split a database file into (start, end, layout) chunks of whole records
+    
+    layout is 'ndjson' or 'json'. Returns None for JSON files that are not in
+    the generators' layout.
+    """
+    if is_ndjson(filename):
+        layout, delimiter = 'ndjson', b'\n'
+        start, end = 0, os.path.getsize(filename)
+    else:
+        body = json_body(filename)
+        if body is None:
+            return None
+        layout, delimiter = 'json', JSON_RECORD_START
+        start, end = body
+    
+    ranges = []
+    with open(filename, 'rb') as f:
+        while start < end:
+            boundary = next_boundary(f, min(start + chunk_size, end), delimiter, end)
+            if layout == 'ndjson' and boundary < end:
+                # Split after the line break so every chunk starts on a record
+                boundary += 1
+            ranges.append((start, boundary, layout))
+            start = boundary
+    return ranges
+
+def parse_chunk(data, layout):
+    """Yield the records in a chunk of a database file"""
+    if layout == 'ndjson':
+        for line in data.split(b'\n'):
+            if line.strip():
+                yield json.loads(line)
+        return
+    for piece in data.split(JSON_RECORD_START)[1:]:
+        yield json.loads(b'{\n' + piece.rstrip().rstrip(b','))
+
+def filter_chunk(task):
+    """Parse one chunk and get its records matching the spec (runs in the worker processes)"""
+    filename, start, end, layout, spec = task
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return [m for m in parse_chunk(data, layout) if matches(spec, m)]
+
+def default_workers():
+    """Get the worker count that uses every core"""
+    return os.cpu_count() or 1
+
+def iter_filtered(filename, spec=FilterSpec(), workers=None, chunk_size=CHUNK_SIZE):
+    """Yield the records of a database file that match spec, in file order
+    
+    Chunks are parsed and filtered by workers processes (every core by
+    default); only a bounded window of chunk results is held at a time.
+    """
+    if workers is None:
+        workers = default_workers()
+    ranges = chunk_ranges(filename, chunk_size)
+    if ranges is None:
+        # Not splittable: fall back to the serial streaming reader
+        for m in iter_records(filename):
+            if matches(spec, m):
+                yield m
+        return
+    
+    tasks = [(filename, start, end, layout, spec) for start, end, layout in ranges]
+    for records in run_shards(filter_chunk, tasks, workers):
+        yield from records
+
+def filter_file(filename, spec=FilterSpec(), workers=None, chunk_size=CHUNK_SIZE):
+    """Get the records of a database file that match spec, in file order"""
+    return list(iter_filtered(filename, spec, workers, chunk_size))
+
+def load_database_parallel(filename, workers=None, chunk_size=CHUNK_SIZE):
+    """Load a database file as {..., "motorcycles": [...]} with records parsed in parallel"""
+    database = read_header(filename)
+    database["motorcycles"] = filter_file(filename, FilterSpec(), workers, chunk_size)
+    if "total_entries" not in database:
+        database["total_entries"] = len(database["motorcycles"])
+    return database
+
+def main():
+    """Filter a database file in parallel and compare with a serial scan"""
+    parser = argparse.ArgumentParser(description="Filter a motorcycle database with a process pool")
+    parser.add_argument('filename', nargs='?', default='complete_motorcycle_database.json',
+                        help="database file, .json or .ndjson (default: complete_motorcycle_database.json)")
+    parser.add_argument('--brand', help="brand name (case-insensitive)")
+    parser.add_argument('--type', dest='vehicle_type', help="vehicle type substring")
+    parser.add_argument('--min-cc', type=int, help="minimum displacement")
+    parser.add_argument('--max-cc', type=int, help="maximum displacement")
+    parser.add_argument('--max-price', type=int, help="maximum lower price in NT$")
+    parser.add_argument('--electric', action='store_true',
+                        help="let electric models pass a displacement filter without --max-cc")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="number of worker processes (default: every core)")
+    parser.add_argument('--serial', action='store_true', help="also time a serial scan for comparison")
+    args = parser.parse_args()
+    
+    spec = FilterSpec(args.brand, args.vehicle_type, args.min_cc, args.max_cc, args.max_price, args.electric)
+    workers = args.workers or default_workers()
+    
+    start = time.perf_counter()
+    matched = filter_file(args.filename, spec, workers)
+    elapsed = time.perf_counter() - start
+    print(f"{len(matched)} matching motorcycles in {elapsed:.2f}s ({workers} workers)")
+    
+    if args.serial:
+        start = time.perf_counter()
+        serial = [m for m in iter_records(args.filename) if matches(spec, m)]
+        elapsed = time.perf_counter() - start
+        print(f"{len(serial)} matching motorcycles in {elapsed:.2f}s (serial)")
+    
+    for m in matched[:5]:
+        print(f"  {m['brand']} {m['model']} - {m['engine']['displacement']} ({m['price_range']})")
+
+if __name__ == "__main__":
+    main()
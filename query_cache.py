@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Cached Motorcycle Queries
+
+QueryCache answers MotorcycleDB queries over one database file and keeps the
+results of recent queries in a bounded LRU cache, so repeated filter
+combinations (brand + max price, type + cc range, ...) return without
+re-running the query.
+
+- keys are the normalized query conditions: unset (None) conditions are
+  dropped and brand and type are lowercased, the same way MotorcycleDB.query
+  treats them
+- each key includes the database version: last_updated plus a SHA-256 of the
+  file contents
+- the file is checked with os.stat before answering; when it changed, the
+  contents are hashed again and, if they differ, the database is reloaded
+  and every cached result dropped. A server can turn the check off
+  (auto_refresh=False) and run the reload itself: changed() and load_version()
+  do the slow part without touching the cache, install() swaps the result in
+- hits, misses and evictions are counted for monitoring
+
+Usage:
+    python3 query_cache.py taiwan_specific_motorcycles.json
+"""
+
+import argparse
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+from motorcycle_db import MotorcycleDB
+from motorcycle_records import load_records
+
+# Query conditions accepted by MotorcycleDB.query
+QUERY_CONDITIONS = ('brand', 'vehicle_type', 'availability', 'category',
+                    'min_cc', 'max_cc', 'min_price', 'max_price', 'min_year', 'max_year')
+
+DEFAULT_MAXSIZE = 1024
+
+# Bytes read per chunk when hashing the database file
+HASH_CHUNK_SIZE = 1 << 20
+
+def file_digest(filename):
+    """Get the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_signature(filename):
+    """Get what os.stat says about a file's identity and contents"""
+    stat = os.stat(filename)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+def normalize_conditions(conditions):
+    """Get a hashable key for query conditions that match the same records"""
+    unknown = set(conditions) - set(QUERY_CONDITIONS)
+    if unknown:
+        raise TypeError(f"unknown query conditions: {', '.join(sorted(unknown))}")
+    
+    key = []
+    for name in QUERY_CONDITIONS:
+        value = conditions.get(name)
+        if value is None:
+            continue
+        if name in ('brand', 'vehicle_type'):
+            value = value.lower()
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        key.append((name, value))
+    return tuple(key)
+
+class QueryCache:
+    """LRU cache of MotorcycleDB query results over one database file"""
+    
+    def __init__(self, filename, maxsize=DEFAULT_MAXSIZE, compact=False, auto_refresh=True):
+        self.filename = filename
+        self.maxsize = maxsize
+        self.compact = compact
+        # Whether queries check the file for changes before answering
+        self.auto_refresh = auto_refresh
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+        
+        self.db = None
+        self.version = None
+        self.signature = None
+        self.refresh()
+    
+    def load(self):
+        """Load and index the database file"""
+        if self.compact:
+            data = load_records(self.filename)
+            motorcycles = data.pop('motorcycles')
+            return MotorcycleDB(motorcycles, header=data)
+        return MotorcycleDB.load(self.filename)
+    
+    def refresh(self):
+        """Reload the database and drop the cached results if the file changed
+        
+        Returns True when the database was reloaded.
+        """
+        signature = self.changed()
+        if signature is None:
+            return False
+        return self.install(*self.load_version(signature))
+    
+    def changed(self):
+        """Get the file's new os.stat signature, or None when it is unchanged"""
+        signature = file_signature(self.filename)
+        return None if signature == self.signature else signature
+    
+    def load_version(self, signature):
+        """Hash the file and load it unless the contents are unchanged
+        
+        Returns the (signature, digest, database or None) to install(). Leaves
+        the cache untouched, so it can run in another thread while the
+        current database keeps answering.
+        """
+        digest = file_digest(self.filename)
+        if self.version is not None and digest == self.version[1]:
+            # Touched or rewritten with the same contents
+            return signature, digest, None
+        return signature, digest, self.load()
+    
+    def install(self, signature, digest, db):
+        """Swap in a database from load_version(); returns True when it was reloaded"""
+        self.signature = signature
+        if db is None:
+            return False
+        self.db = db
+        self.version = (db.header.get('last_updated'), digest)
+        self.results.clear()
+        self.reloads += 1
+        return True
+    
+    def query_rows(self, **conditions):
+        """Get the row numbers matching the conditions, from the cache when possible"""
+        if self.auto_refresh:
+            self.refresh()
+        key = (self.version, normalize_conditions(conditions))
+        rows = self.results.get(key)
+        if rows is not None:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return rows
+        
+        self.misses += 1
+        rows = tuple(self.db.query_rows(**conditions))
+        self.results[key] = rows
+        if len(self.results) > self.maxsize:
+            self.results.popitem(last=False)
+            self.evictions += 1
+        return rows
+    
+    def query(self, **conditions):
+        """Get the motorcycles matching the conditions (see MotorcycleDB.query)"""
+        rows = self.query_rows(**conditions)
+        motorcycles = self.db.motorcycles
+        return [motorcycles[row] for row in rows]
+    
+    def count(self, **conditions):
+        """Count the motorcycles matching the conditions"""
+        return len(self.query_rows(**conditions))
+    
+    def filter_by_brand(self, brand):
+        """Filter motorcycles by brand"""
+        return self.query(brand=brand)
+    
+    def filter_by_type(self, vehicle_type):
+        """Filter motorcycles by vehicle type"""
+        return self.query(vehicle_type=vehicle_type)
+    
+    def filter_by_displacement(self, min_cc=None, max_cc=None):
+        """Filter motorcycles by engine displacement"""
+        return self.query(min_cc=min_cc, max_cc=max_cc)
+    
+    def filter_by_price_range(self, max_price):
+        """Filter motorcycles by maximum price"""
+        return self.query(max_price=max_price)
+    
+    def clear(self):
+        """Drop every cached result (the counters are kept)"""
+        self.results.clear()
+    
+    def stats(self):
+        """Get the cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.results),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'evictions': self.evictions,
+            'reloads': self.reloads,
+            'last_updated': self.version[0],
+            'content_hash': self.version[1],
+        }
+
+def main():
+    """Run a few repeated queries and show the cache timings and counters"""
+    parser = argparse.ArgumentParser(description="Answer repeated motorcycle queries from an LRU cache")
+    parser.add_argument('filename', nargs='?', default='taiwan_specific_motorcycles.json',
+                        help="database file, .json or .ndjson (default: taiwan_specific_motorcycles.json)")
+    parser.add_argument('--maxsize', type=int, default=DEFAULT_MAXSIZE,
+                        help=f"cached queries kept (default: {DEFAULT_MAXSIZE})")
+    args = parser.parse_args()
+    
+    cache = QueryCache(args.filename, maxsize=args.maxsize)
+    queries = [
+        {'brand': 'Yamaha', 'max_price': 100000},
+        {'vehicle_type': 'scooter', 'min_cc': 100, 'max_cc': 150},
+        {'brand': 'yamaha', 'max_price': 100000.0},
+    ]
+    for _ in range(2):
+        for conditions in queries:
+            start = time.perf_counter()
+            count = cache.count(**conditions)
+            elapsed = time.perf_counter() - start
+            print(f"{conditions}: {count} models in {elapsed * 1e6:.0f} µs")
+    
+    stats = cache.stats()
+    print(f"\nHits: {stats['hits']}, misses: {stats['misses']}, hit rate: {stats['hit_rate']:.0%}")
+    print(f"Database version: {stats['last_updated']} ({stats['content_hash'][:12]})")
+
+if __name__ == "__main__":
+    main()
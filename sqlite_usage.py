@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+SQLite Motorcycle Database Queries
+
+The filter_by_* helpers and analysis statistics of example_usage.py and
+taiwan_specific_usage.py, reimplemented as SQL against a file written by
+export_sqlite.py. Every condition is answered from an index, so lookups
+against multi-million-row databases never load the whole fleet into Python.
+
+Usage:
+    python3 sqlite_usage.py taiwan_specific_motorcycles.db
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+
+RECORD_QUERY = """
+SELECT m.record FROM motorcycles m JOIN engines e ON e.motorcycle_id = m.id
+"""
+
+def connect(filename):
+    """Open an exported SQLite database read-only"""
+    if not os.path.exists(filename):
+        raise FileNotFoundError(filename)
+    conn = sqlite3.connect(f'file:{filename}?mode=ro', uri=True)
+    return conn
+
+def read_metadata(conn):
+    """Get the header fields (title, last_updated, ...) stored at export time"""
+    return {key: json.loads(value) for key, value in conn.execute('SELECT key, value FROM metadata')}
+
+def matching_types(conn, vehicle_type):
+    """Get the stored types that contain vehicle_type (case-insensitive)"""
+    return [t for (t,) in conn.execute('SELECT DISTINCT type FROM motorcycles')
+            if vehicle_type.lower() in t.lower()]
+
+def query_clauses(conn, brand=None, vehicle_type=None, availability=None, category=None,
+                  min_cc=None, max_cc=None, min_price=None, max_price=None,
+                  min_year=None, max_year=None):
+    """Get the WHERE clauses and parameters for a query (see query)"""
+    clauses, params = [], []
+    if brand is not None:
+        clauses.append('m.brand = ? COLLATE NOCASE')
+        params.append(brand)
+    if vehicle_type is not None:
+        # Resolve the substring match against the few distinct types so the type index is used
+        types = matching_types(conn, vehicle_type)
+        clauses.append(f'm.type IN ({", ".join("?" * len(types))})')
+        params.extend(types)
+    for column, value in (('m.availability', availability), ('m.category', category)):
+        if value is not None:
+            clauses.append(f'{column} = ?')
+            params.append(value)
+    
+    displacement = []
+    if min_cc is not None:
+        displacement.append('e.displacement_cc >= ?')
+        params.append(min_cc)
+    if max_cc is not None:
+        displacement.append('e.displacement_cc <= ?')
+        params.append(max_cc)
+    if displacement:
+        condition = ' AND '.join(displacement)
+        # Electric motors (no displacement) only match when there is no upper limit
+        clauses.append(condition if max_cc is not None else f'(e.displacement_cc IS NULL OR ({condition}))')
+    
+    for column, low, high in (('m.price_min', min_price, max_price), ('m.model_year', min_year, max_year)):
+        if low is not None:
+            clauses.append(f'{column} >= ?')
+            params.append(low)
+        if high is not None:
+            clauses.append(f'{column} <= ?')
+            params.append(high)
+    return clauses, params
+
+def query(conn, brand=None, vehicle_type=None, availability=None, category=None,
+          min_cc=None, max_cc=None, min_price=None, max_price=None,
+          min_year=None, max_year=None, limit=None):
+    """Get the motorcycles matching every given condition, in database order
+    
+    Conditions follow MotorcycleDB.query: brand is case-insensitive,
+    vehicle_type is a case-insensitive substring, prices apply to the lower
+    end of the price range, and electric motorcycles only match when max_cc
+    is not given.
+    """
+    clauses, params = query_clauses(conn, brand, vehicle_type, availability, category,
+                                    min_cc, max_cc, min_price, max_price, min_year, max_year)
+    sql = RECORD_QUERY
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    sql += ' ORDER BY m.id'
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(limit)
+    return [json.loads(record) for (record,) in conn.execute(sql, params)]
+
+def count(conn, **conditions):
+    """Count the motorcycles matching the query conditions without fetching them"""
+    clauses, params = query_clauses(conn, **conditions)
+    sql = 'SELECT COUNT(*) FROM motorcycles m JOIN engines e ON e.motorcycle_id = m.id'
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    return conn.execute(sql, params).fetchone()[0]
+
+def filter_by_brand(conn, brand):
+    """Filter motorcycles by brand"""
+    return query(conn, brand=brand)
+
+def filter_by_type(conn, vehicle_type):
+    """Filter motorcycles by vehicle type"""
+    return query(conn, vehicle_type=vehicle_type)
+
+def filter_by_displacement(conn, min_cc=None, max_cc=None):
+    """Filter motorcycles by engine displacement"""
+    return query(conn, min_cc=min_cc, max_cc=max_cc)
+
+def filter_by_price_range(conn, max_price):
+    """Filter motorcycles by maximum price"""
+    return query(conn, max_price=max_price)
+
+def database_statistics(conn):
+    """Compute the analysis statistics with aggregate queries"""
+    brands = conn.execute('SELECT brand, COUNT(*) AS n FROM motorcycles GROUP BY brand ORDER BY n DESC').fetchall()
+    types = conn.execute('SELECT type, COUNT(*) AS n FROM motorcycles GROUP BY type ORDER BY n DESC').fetchall()
+    displacement = conn.execute(
+        'SELECT MIN(displacement_cc), MAX(displacement_cc), AVG(displacement_cc), '
+        'SUM(displacement_cc IS NULL) FROM engines').fetchone()
+    return {
+        'total': conn.execute('SELECT COUNT(*) FROM motorcycles').fetchone()[0],
+        'brands': [(brand, n) for brand, n in brands],
+        'types': [(vtype, n) for vtype, n in types],
+        'displacement': {
+            'min': displacement[0],
+            'max': displacement[1],
+            'average': displacement[2],
+            'electric': displacement[3] or 0,
+        },
+    }
+
+def analyze_database(conn):
+    """Print the database analysis"""
+    stats = database_statistics(conn)
+    metadata = read_metadata(conn)
+    
+    print(f"=== {metadata.get('title', 'Motorcycle Database')} Analysis ===")
+    print(f"Total motorcycles: {stats['total']}")
+    print(f"Database last updated: {metadata.get('last_updated', 'Unknown')}")
+    print()
+    
+    print("Brand Distribution:")
+    for brand, n in stats['brands']:
+        print(f"  {brand}: {n}")
+    print()
+    
+    print("Vehicle Type Distribution:")
+    for vtype, n in stats['types']:
+        print(f"  {vtype}: {n}")
+    print()
+    
+    displacement = stats['displacement']
+    if displacement['min'] is not None:
+        print("Displacement Statistics:")
+        print(f"  Minimum: {displacement['min']}cc")
+        print(f"  Maximum: {displacement['max']}cc")
+        print(f"  Average: {displacement['average']:.1f}cc")
+    if displacement['electric'] > 0:
+        print(f"  Electric motorcycles: {displacement['electric']}")
+    print()
+
+def main():
+    """Analyze an exported database and run a few indexed queries"""
+    parser = argparse.ArgumentParser(description="Query a motorcycle database exported to SQLite")
+    parser.add_argument('filename', help="SQLite file written by export_sqlite.py")
+    args = parser.parse_args()
+    
+    try:
+        conn = connect(args.filename)
+    except FileNotFoundError:
+        print(f"Error: {args.filename} not found!")
+        print("Please run export_sqlite.py first to create the database.")
+        return
+    
+    try:
+        analyze_database(conn)
+        
+        print("=== Example Queries ===")
+        print(f"Honda scooters: {count(conn, brand='Honda', vehicle_type='scooter')} models")
+        print(f"Motorcycles 150cc and under: {count(conn, max_cc=150)} models")
+        print(f"Motorcycles under NT$ 100,000: {count(conn, max_price=100000)} models")
+        print()
+        
+        print("Yamaha motorcycles between 250cc and 600cc:")
+        for bike in query(conn, brand='Yamaha', min_cc=250, max_cc=600, limit=5):
+            print(f"  {bike['model']} - {bike['engine']['displacement']} ({bike['price_range']})")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Pre-aggregated Statistics Cube
+
+The generators collect a StatsCube while they write a database and save it
+next to the data file (<output>.cube.json). It holds the number of records
+and the count/min/max/sum of displacement, price and power for every
+brand x type x model_year x availability combination, plus a couple of
+sample records per model year.
+
+The analysis reports (see motorcycle_analytics) answer from the cube instead
+of scanning the records when it matches the data file, i.e. the file still
+has the size and modification time it had when the cube was written.
+
+Usage:
+    python3 stats_cube.py taiwan_specific_motorcycles.json
+"""
+
+import argparse
+import json
+import os
+import random
+from collections import Counter
+
+from motorcycle_fields import displacement_cc, model_year, power_hp, price_min
+from motorcycle_io import iter_records
+
+CUBE_SUFFIX = '.cube.json'
+CUBE_VERSION = 1
+
+DIMENSIONS = ('brand', 'type', 'model_year', 'availability')
+
+# Aggregated numeric fields and the parser that extracts them
+MEASURES = {
+    'displacement_cc': displacement_cc,
+    'price_min': price_min,
+    'power_hp': power_hp,
+}
+
+# Aggregates kept per measure: non-null count, minimum, maximum and sum
+AGGREGATES = ('count', 'min', 'max', 'sum')
+
+# Sample records kept per model year for the era samples of the reports
+SAMPLES_PER_YEAR = 2
+
+def cube_path(filename):
+    """Get the cube filename of a database file"""
+    return filename + CUBE_SUFFIX
+
+def data_signature(filename):
+    """Get the size and modification time a cube is matched against"""
+    stat = os.stat(filename)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def new_cell():
+    """Get an empty cell: the record count, then the aggregates of every measure"""
+    cell = [0]
+    for _ in MEASURES:
+        cell.extend([0, None, None, 0])
+    return cell
+
+class StatsCube:
+    """Record counts and measure aggregates grouped by brand, type, model year and availability"""
+    
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random(0)
+        # (brand, type, model_year, availability) -> new_cell() layout
+        self.cells = {}
+        # Model year -> sample records (reservoir sampled) and the records seen
+        self.samples = {}
+        self.sample_counts = Counter()
+    
+    def add(self, m):
+        """Add one motorcycle record"""
+        year = model_year(m)
+        key = (m['brand'], m['type'], year, m.get('availability'))
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = new_cell()
+        cell[0] += 1
+        
+        offset = 1
+        for parse in MEASURES.values():
+            value = parse(m)
+            if value is not None:
+                cell[offset] += 1
+                if cell[offset + 1] is None or value < cell[offset + 1]:
+                    cell[offset + 1] = value
+                if cell[offset + 2] is None or value > cell[offset + 2]:
+                    cell[offset + 2] = value
+                cell[offset + 3] += value
+            offset += 4
+        
+        if year is not None:
+            self.sample(year, m.to_dict() if hasattr(m, 'to_dict') else m)
+    
+    def sample(self, year, m):
+        """Keep a uniform random sample of each model year's records (reservoir sampling)"""
+        self.sample_counts[year] += 1
+        samples = self.samples.setdefault(year, [])
+        if len(samples) < SAMPLES_PER_YEAR:
+            samples.append(m)
+        else:
+            index = self.rng.randrange(self.sample_counts[year])
+            if index < SAMPLES_PER_YEAR:
+                samples[index] = m
+    
+    def update(self, motorcycles):
+        """Add every record of an iterable and return self"""
+        for m in motorcycles:
+            self.add(m)
+        return self
+    
+    def counted(self, motorcycles):
+        """Yield records unchanged while adding them, for use while writing them out"""
+        for m in motorcycles:
+            self.add(m)
+            yield m
+    
+    def merge(self, other, brands=None):
+        """Add the cells and samples of another cube, optionally only those of some brands"""
+        for key, cell in other.cells.items():
+            if brands is not None and key[0] not in brands:
+                continue
+            target = self.cells.get(key)
+            if target is None:
+                self.cells[key] = list(cell)
+                continue
+            target[0] += cell[0]
+            for offset in range(1, len(cell), 4):
+                if not cell[offset]:
+                    continue
+                target[offset] += cell[offset]
+                if target[offset + 1] is None or cell[offset + 1] < target[offset + 1]:
+                    target[offset + 1] = cell[offset + 1]
+                if target[offset + 2] is None or cell[offset + 2] > target[offset + 2]:
+                    target[offset + 2] = cell[offset + 2]
+                target[offset + 3] += cell[offset + 3]
+        
+        for year, samples in other.samples.items():
+            for m in samples:
+                if brands is None or m['brand'] in brands:
+                    self.sample(year, m)
+        return self
+    
+    @property
+    def total(self):
+        """Get the number of records"""
+        return sum(cell[0] for cell in self.cells.values())
+    
+    def counts(self, dimension):
+        """Get the record count of every value of one dimension, in order of first appearance"""
+        index = DIMENSIONS.index(dimension)
+        counts = Counter()
+        for key, cell in self.cells.items():
+            counts[key[index]] += cell[0]
+        return counts
+    
+    @staticmethod
+    def cell_measure(cell, name):
+        """Get the (count, min, max, sum) of a measure in one cell"""
+        offset = 1 + 4 * list(MEASURES).index(name)
+        return tuple(cell[offset:offset + 4])
+    
+    def measure(self, name):
+        """Get the count, min, max and sum of a measure over the whole cube"""
+        count, minimum, maximum, total = 0, None, None, 0
+        for cell in self.cells.values():
+            n, low, high, subtotal = self.cell_measure(cell, name)
+            if not n:
+                continue
+            count += n
+            total += subtotal
+            if minimum is None or low < minimum:
+                minimum = low
+            if maximum is None or high > maximum:
+                maximum = high
+        return {'count': count, 'min': minimum, 'max': maximum, 'sum': total}
+    
+    def to_dict(self):
+        """Get the cube as plain JSON-serializable values"""
+        return {
+            'version': CUBE_VERSION,
+            'columns': list(DIMENSIONS) + ['count'] + [f'{name}_{aggregate}' for name in MEASURES
+                                                       for aggregate in AGGREGATES],
+            'cells': [list(key) + cell for key, cell in self.cells.items()],
+            'samples': [[year, self.sample_counts[year], samples] for year, samples in self.samples.items()],
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a cube from to_dict() output"""
+        cube = cls()
+        width = len(DIMENSIONS)
+        for row in data['cells']:
+            cube.cells[tuple(row[:width])] = row[width:]
+        for year, seen, samples in data['samples']:
+            cube.samples[year] = samples
+            cube.sample_counts[year] = seen
+        return cube
+    
+    def save(self, filename):
+        """Write the cube next to a database file, tied to the file as it is now"""
+        data = self.to_dict()
+        data['data_file'] = data_signature(filename)
+        with open(cube_path(filename), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+def load_cube(filename):
+    """Load the cube of a database file
+    
+    Returns None when there is no cube, or when the data file changed since
+    the cube was written.
+    """
+    try:
+        with open(cube_path(filename), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        signature = data_signature(filename)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if data.get('version') != CUBE_VERSION or data.get('data_file') != signature:
+        return None
+    return StatsCube.from_dict(data)
+
+def remove_cube(filename):
+    """Drop the cube of a database file that is about to be rewritten"""
+    if os.path.exists(cube_path(filename)):
+        os.remove(cube_path(filename))
+
+def build_cube(filename):
+    """Scan a database file (JSON or NDJSON), write its cube and return it"""
+    cube = StatsCube().update(iter_records(filename))
+    cube.save(filename)
+    return cube
+
+def save_incremental_cube(filename, previous, generated, brands, reused, record_brand=str):
+    """Write the cube of an incrementally updated database file and return it
+    
+    The cells of reused brands come from previous, the cube of the file
+    before the update, and those of regenerated brands from generated, in
+    the brands' order in the file. record_brand maps a quota key to the
+    brand its records carry. Without a valid previous cube the file is
+    scanned instead.
+    """
+    if previous is None and reused:
+        return build_cube(filename)
+    cube = StatsCube()
+    for brand in brands:
+        cube.merge(previous if brand in reused else generated, {record_brand(brand)})
+    cube.save(filename)
+    return cube
+
+def main():
+    """Write the cube of an existing database file"""
+    parser = argparse.ArgumentParser(description="Write the statistics cube of a motorcycle database")
+    parser.add_argument('filename', help="database file, .json or .ndjson")
+    args = parser.parse_args()
+    
+    cube = build_cube(args.filename)
+    print(f"Wrote {cube_path(args.filename)}: {len(cube.cells)} cells over {cube.total} motorcycles")
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,19 @@ This script demonstrates how to use the taiwan_specific_motorcycles.json databas
 containing curated Taiwan motorcycle models.
 """
 
+import argparse
 import json
-from collections import Counter
 
-def load_taiwan_specific_database(filename='taiwan_specific_motorcycles.json'):
-    """Load the Taiwan specific motorcycle database"""
-    with open(filename, 'r', encoding='utf-8') as f:
-        return json.load(f)
+from motorcycle_analytics import analyze_database
+from motorcycle_fields import displacement_cc, price_min
+from motorcycle_io import load_database_file
+
+def load_taiwan_specific_database(filename='taiwan_specific_motorcycles.json', lazy=False, compact=False, workers=1):
+    """Load the Taiwan specific motorcycle database (JSON or NDJSON)
+    
+    lazy, compact and workers are passed to motorcycle_io.load_database_file.
+    """
+    return load_database_file(filename, lazy=lazy, compact=compact, workers=workers)
 
 def filter_by_brand(motorcycles, brand):
     """Filter motorcycles by brand"""
@@ -22,19 +28,16 @@ def filter_by_displacement(motorcycles, min_cc=None, max_cc=None):
     """Filter motorcycles by engine displacement"""
     result = []
     for m in motorcycles:
-        displacement = m['engine']['displacement']
-        if displacement == "Electric Motor":
-            # Include electric motorcycles if no max limit specified
+        cc = displacement_cc(m)
+        if cc is None:
+            # Electric motor: include if no max limit specified
             if max_cc is None:
                 result.append(m)
             continue
-            
-        cc_str = displacement.replace('cc', '')
-        cc = int(cc_str)
         
-        if min_cc and cc < min_cc:
+        if min_cc is not None and cc < min_cc:
             continue
-        if max_cc and cc > max_cc:
+        if max_cc is not None and cc > max_cc:
             continue
         
         result.append(m)
@@ -45,58 +48,49 @@ def filter_by_price_range(motorcycles, max_price):
     """Filter motorcycles by maximum price"""
     result = []
     for m in motorcycles:
-        price_range = m['price_range']
-        # Extract the lower price from range like "NT$ 65,000 - 72,000"
-        lower_price_str = price_range.split(' - ')[0].replace('NT$ ', '').replace(',', '')
-        lower_price = int(lower_price_str)
+        # Lower price of a range like "NT$ 65,000 - 72,000"
+        lower_price = price_min(m)
         
         if lower_price <= max_price:
             result.append(m)
     
     return result
 
-def analyze_taiwan_database(data):
-    """Perform analysis of the Taiwan specific database"""
-    motorcycles = data['motorcycles']
+def analyze_taiwan_database(data, filename=None):
+    """Perform analysis of the Taiwan specific database
+    
+    Given the database filename, the statistics come from its cube when it
+    is up to date (see stats_cube).
+    """
+    analytics = analyze_database(data['motorcycles'], filename)
     
     print("=== Taiwan Specific Motorcycle Database Analysis ===")
-    print(f"Total motorcycles: {len(motorcycles)}")
+    print(f"Total motorcycles: {analytics.total}")
     print(f"Database last updated: {data.get('last_updated', 'Unknown')}")
     print()
     
     # Brand distribution
-    brands = Counter(m['brand'] for m in motorcycles)
     print("Brand Distribution:")
-    for brand, count in brands.most_common():
+    for brand, count in analytics.brands.most_common():
         print(f"  {brand}: {count} models")
     print()
     
     # Vehicle type distribution
-    types = Counter(m['type'] for m in motorcycles)
     print("Vehicle Type Distribution:")
-    for vtype, count in types.most_common():
+    for vtype, count in analytics.types.most_common():
         print(f"  {vtype}: {count} models")
     print()
     
     # Displacement analysis
-    displacements = []
-    electric_count = 0
-    for m in motorcycles:
-        displacement = m['engine']['displacement']
-        if displacement == "Electric Motor":
-            electric_count += 1
-        else:
-            cc_str = displacement.replace('cc', '')
-            displacements.append(int(cc_str))
-    
-    if displacements:
+    displacement = analytics.displacement
+    if displacement.count:
         print("Displacement Statistics (Gas engines):")
-        print(f"  Minimum: {min(displacements)}cc")
-        print(f"  Maximum: {max(displacements)}cc")
-        print(f"  Average: {sum(displacements) / len(displacements):.1f}cc")
+        print(f"  Minimum: {displacement.minimum}cc")
+        print(f"  Maximum: {displacement.maximum}cc")
+        print(f"  Average: {displacement.mean:.1f}cc")
     
-    if electric_count > 0:
-        print(f"  Electric motorcycles: {electric_count}")
+    if analytics.electric > 0:
+        print(f"  Electric motorcycles: {analytics.electric}")
     print()
 
 def example_queries(motorcycles):
@@ -139,13 +133,20 @@ def example_queries(motorcycles):
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Analyze the Taiwan specific motorcycle database")
+    parser.add_argument('filename', nargs='?', default='taiwan_specific_motorcycles.json',
+                        help="database file, .json or .ndjson (default: taiwan_specific_motorcycles.json)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="number of processes parsing the database (default: 1)")
+    args = parser.parse_args()
+    
     try:
         # Load the Taiwan specific database
-        data = load_taiwan_specific_database()
+        data = load_taiwan_specific_database(args.filename, workers=args.workers)
         motorcycles = data['motorcycles']
         
         # Perform analysis
-        analyze_taiwan_database(data)
+        analyze_taiwan_database(data, args.filename)
         
         # Run example queries
         example_queries(motorcycles)
@@ -162,9 +163,9 @@ def main():
             print(f"   Price: {bike['price_range']}")
             print(f"   Features: {', '.join(bike['features'])}")
             print()
-            
+    
     except FileNotFoundError:
-        print("Error: taiwan_specific_motorcycles.json not found!")
+        print(f"Error: {args.filename} not found!")
         print("Please make sure the file exists in the current directory.")
     except json.JSONDecodeError as e:
         print(f"Error reading JSON file: {e}")
@@ -0,0 +1,171 @@
+"""Equivalence tests of the compiled query expressions of motorcycle_query"""
+
+import copy
+import os
+import random
+
+import pytest
+
+from motorcycle_db import MotorcycleDB
+from motorcycle_fields import (displacement_cc, fuel_efficiency_km_l, model_year, power_hp,
+                               price_min, torque_nm, weight_kg)
+from motorcycle_io import load_database_file
+from motorcycle_query import FIELDS, LOOKUPS, And, Condition, Not, Or, Q
+
+DATABASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'taiwan_specific_motorcycles.json')
+
+# Field values read without the generated code, for the plain evaluation
+READERS = {
+    'brand': lambda m: m['brand'],
+    'model': lambda m: m['model'],
+    'type': lambda m: m['type'],
+    'availability': lambda m: m.get('availability'),
+    'category': lambda m: m.get('category'),
+    'features': lambda m: m.get('features', ()),
+    'cc': displacement_cc,
+    'power': power_hp,
+    'torque': torque_nm,
+    'price': price_min,
+    'year': model_year,
+    'weight': weight_kg,
+    'fuel_efficiency': fuel_efficiency_km_l,
+}
+
+def evaluate(expression, m):
+    """Check one record by walking the expression tree, without generated code"""
+    if isinstance(expression, And):
+        return all(evaluate(part, m) for part in expression.parts)
+    if isinstance(expression, Or):
+        return any(evaluate(part, m) for part in expression.parts)
+    if isinstance(expression, Not):
+        return not evaluate(expression.part, m)
+    
+    value, wanted = READERS[expression.field](m), expression.value
+    lookup = expression.lookup
+    if lookup == 'isnull':
+        return (value is None) == bool(wanted)
+    if lookup == 'exact':
+        return value == wanted
+    if lookup == 'in':
+        return value in set(wanted)
+    if value is None:
+        return False
+    if lookup == 'iexact':
+        return value.lower() == wanted.lower()
+    if lookup == 'contains':
+        return wanted in value
+    if lookup == 'icontains':
+        if isinstance(value, str):
+            return wanted.lower() in value.lower()
+        return any(wanted.lower() in item.lower() for item in value)
+    if lookup == 'between':
+        return wanted[0] <= value <= wanted[1]
+    return {'gt': value > wanted, 'gte': value >= wanted, 'lt': value < wanted, 'lte': value <= wanted}[lookup]
+
+@pytest.fixture(scope='module')
+def motorcycles():
+    """The Taiwan catalogue, with some availability and category values missing"""
+    records = copy.deepcopy(load_database_file(DATABASE)['motorcycles'])
+    for row, m in enumerate(records):
+        if row % 7 == 0:
+            del m['category']
+        if row % 11 == 0:
+            m['availability'] = None
+    return records
+
+@pytest.fixture(scope='module')
+def db(motorcycles):
+    return MotorcycleDB(motorcycles)
+
+def random_condition(rng, motorcycles):
+    """Get a random lookup on a random field, with values taken from the records"""
+    field = rng.choice(list(FIELDS))
+    kind = FIELDS[field][1]
+    values = [READERS[field](m) for m in rng.sample(motorcycles, 5)]
+    if rng.random() < 0.1:
+        return Condition(field, 'isnull', rng.random() < 0.5)
+    
+    if kind == 'list':
+        features = [feature for value in values for feature in value] or ['ABS system']
+        feature = rng.choice(features)
+        lookup = rng.choice(['contains', 'icontains'])
+        return Condition(field, lookup, feature.upper() if lookup == 'icontains' else feature)
+    
+    if kind == 'text':
+        value = rng.choice(values)
+        lookup = rng.choice(['exact', 'iexact', 'contains', 'icontains', 'in'])
+        if lookup == 'in':
+            return Condition(field, lookup, [rng.choice(values) for _ in range(rng.randint(1, 3))])
+        if value is None:
+            return Condition(field, 'exact', None)
+        if lookup in ('contains', 'icontains'):
+            start = rng.randrange(len(value))
+            value = value[start:start + rng.randint(1, 3)]
+        return Condition(field, lookup, value.swapcase() if lookup.startswith('i') else value)
+    
+    numbers = [value for value in values if value is not None] or [0]
+    lookup = rng.choice(['exact', 'in', 'gt', 'gte', 'lt', 'lte', 'between'])
+    if lookup == 'in':
+        return Condition(field, lookup, numbers[:rng.randint(1, len(numbers))])
+    if lookup == 'between':
+        return Condition(field, lookup, tuple(sorted(rng.sample(numbers + numbers, 2))))
+    return Condition(field, lookup, rng.choice(numbers))
+
+def random_expression(rng, motorcycles, depth=3):
+    """Get a random tree of conditions joined by &, | and ~"""
+    if depth == 0 or rng.random() < 0.3:
+        return random_condition(rng, motorcycles)
+    roll = rng.random()
+    if roll < 0.15:
+        return ~random_expression(rng, motorcycles, depth - 1)
+    parts = [random_expression(rng, motorcycles, depth - 1) for _ in range(rng.randint(2, 3))]
+    return And(parts) if roll < 0.6 else Or(parts)
+
+def test_every_lookup_is_generated():
+    assert set(LOOKUPS) == {'exact', 'iexact', 'contains', 'icontains', 'in', 'gt', 'gte', 'lt', 'lte',
+                            'between', 'isnull'}
+
+@pytest.mark.parametrize('seed', range(4))
+def test_compiled_matches_plain_evaluation(motorcycles, db, seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        expression = random_expression(rng, motorcycles)
+        expected = [row for row, m in enumerate(motorcycles) if evaluate(expression, m)]
+        
+        predicate = expression.compile()
+        assert [row for row, m in enumerate(motorcycles) if predicate(m)] == expected, expression
+        indexed_predicate = expression.compile(db)
+        assert [row for row, m in enumerate(motorcycles) if indexed_predicate(m)] == expected, expression
+        assert [id(m) for m in expression.filter(motorcycles)] == [id(motorcycles[row]) for row in expected], \
+            expression
+        assert db.filter_rows(expression) == expected, expression
+
+def test_missing_values_never_match_comparisons(motorcycles, db):
+    electric = [row for row, m in enumerate(motorcycles) if displacement_cc(m) is None]
+    assert electric
+    for expression in (Q(cc__gte=0), Q(cc__lte=10000), Q(cc__between=(0, 10000)), Q(cc__gt=-1)):
+        rows = db.filter_rows(expression)
+        assert not set(rows) & set(electric)
+        assert len(rows) == len(motorcycles) - len(electric)
+    assert db.filter_rows(Q(cc__isnull=True)) == electric
+    assert db.filter_rows(Q(cc__gte=0) | Q(cc__isnull=True)) == list(range(len(motorcycles)))
+
+def test_missing_text_fields(motorcycles, db):
+    no_category = [row for row, m in enumerate(motorcycles) if 'category' not in m]
+    no_availability = [row for row, m in enumerate(motorcycles) if m['availability'] is None]
+    assert db.filter_rows(Q(category__isnull=True)) == no_category
+    assert db.filter_rows(Q(category=None)) == no_category
+    assert db.filter_rows(Q(availability__in=[None])) == no_availability
+    assert not set(db.filter_rows(Q(availability__icontains='a'))) & set(no_availability)
+    assert db.filter_rows(~Q(category__isnull=False)) == no_category
+
+@pytest.mark.parametrize('value', ['SYM', b'SYM', 150])
+def test_in_needs_a_collection(value):
+    with pytest.raises(ValueError, match='brand__in'):
+        Q(brand__in=value)
+
+def test_unknown_field_and_lookup():
+    with pytest.raises(TypeError):
+        Q(colour='red')
+    with pytest.raises(TypeError):
+        Q(brand__startswith='S')